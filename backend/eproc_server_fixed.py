@@ -12,10 +12,14 @@ from datetime import datetime
 import shutil
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 import uuid
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
 from scrapers.search import run_eproc_scraper_with_bot
+from scrapers.output_sink import list_outputs, read_output, resolve_output, remove_output
+from scrapers.merge_engine import merge_outputs, load_merged
+from scrapers.eproc_batch import EprocBatch, CaptchaQueue
+from scrapers.browser_pool import get_pool
+from scrapers.driver_factory import create_driver, find_driver, IS_WINDOWS
+from scrapers.remote_pool import get_node_pool, pin_session, unpin_session, node_stats
+from scrapers.session_governor import governor, SessionRejected
 from database_operations_mysql import EProcurementDBMySQL
 
 # Set environment variables directly for MySQL connection (AWS)
@@ -34,6 +38,25 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 logs_buffer = []
 MAX_LOG_LINES = 1000
 
+def emit_file_written_event(log_line):
+    """Turn a "[FILE_WRITTEN] filename session_id" log line into a file_written event."""
+    if '[FILE_WRITTEN]' not in log_line:
+        return
+    try:
+        # Parse the file_written message: [FILE_WRITTEN] filename session_id
+        parts = log_line.split('[FILE_WRITTEN]')[1].strip().split()
+        if len(parts) >= 2:
+            filename = parts[0]
+            file_session_id = parts[1]
+            socketio.emit('file_written', {
+                'filename': filename,
+                'session_id': file_session_id,
+                'timestamp': datetime.now().isoformat()
+            })
+            print(f"[DEBUG] Emitted file_written event for {filename} in session {file_session_id}")
+    except Exception as e:
+        print(f"[ERROR] Failed to parse FILE_WRITTEN message: {e}")
+
 # WebSocket event handler to receive logs from the scraper
 @socketio.on('log_message')
 def handle_log_message(message):
@@ -42,21 +65,7 @@ def handle_log_message(message):
     print(f"[WS-IN] {log_line}") # Print to backend console for debugging
     
     # Check for file written events
-    if '[FILE_WRITTEN]' in log_line:
-        try:
-            # Parse the file_written message: [FILE_WRITTEN] filename session_id
-            parts = log_line.split('[FILE_WRITTEN]')[1].strip().split()
-            if len(parts) >= 2:
-                filename = parts[0]
-                file_session_id = parts[1]
-                socketio.emit('file_written', {
-                    'filename': filename,
-                    'session_id': file_session_id,
-                    'timestamp': datetime.now().isoformat()
-                })
-                print(f"[DEBUG] Emitted file_written event for {filename} in session {file_session_id}")
-        except Exception as e:
-            print(f"[ERROR] Failed to parse FILE_WRITTEN message: {e}")
+    emit_file_written_event(log_line)
     
     # Add to buffer
     if len(logs_buffer) > MAX_LOG_LINES:
@@ -70,6 +79,7 @@ def emit_log_to_frontend(msg, session_id=None):
     if len(logs_buffer) > MAX_LOG_LINES:
         logs_buffer.pop(0)
     logs_buffer.append(msg)
+    emit_file_written_event(msg)
     
     # Emit immediately with session_id if provided
     if session_id:
@@ -95,6 +105,24 @@ OUTPUT_BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'outp
 if not os.path.exists(OUTPUT_BASE_DIR):
     os.makedirs(OUTPUT_BASE_DIR)
 
+def list_session_outputs(session_dir):
+    """Map of workbook name -> file to read (sink or workbook), for a session directory."""
+    return list_outputs(session_dir)
+
+def read_session_output(file_path):
+    return read_output(file_path)
+
+def resolve_session_output(session_id, filename):
+    """Path of a downloadable workbook, building it from its sink if needed."""
+    return resolve_output(os.path.join(OUTPUT_BASE_DIR, session_id), filename,
+                          date_column='Closing Date', date_input_format='%d/%m/%Y')
+
+def merge_progress(session_id=None):
+    """Progress callback for merge_outputs, reported on the scraping log."""
+    def report(done, total, rows):
+        socketio.emit('scraping_log', {'message': f'🔄 Merging: {done}/{total} files, {rows} rows', 'session_id': session_id})
+    return report
+
 # Database file for storing merge records
 DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'merge_records.json')
 
@@ -129,6 +157,12 @@ def store_merge_in_database(merge_record):
 
 pending_eproc_sessions = {}
 
+EDGE_DRIVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers', 'edgedriver_win64', 'msedgedriver.exe')
+
+def create_edge_driver(pin=None):
+    # Edge on Windows, headless Chromium/Edge on Linux or a remote node (see scrapers/driver_factory.py)
+    return create_driver(blocking_profile="eproc", pin=pin)
+
 def build_advanced_search_url(base_url):
     parsed = urlparse(base_url)
     qs = parse_qs(parsed.query)
@@ -194,28 +228,49 @@ def open_edge():
         url = build_advanced_search_url(data.get('url', ''))
         print(f"[DEBUG] Final Edge URL: {url}")
 
-        edge_driver_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scrapers', 'edgedriver_win64', 'msedgedriver.exe')
-        print(f"[DEBUG] Checking Edge WebDriver at: {edge_driver_path}")
-        print(f"[DEBUG] Edge WebDriver exists: {os.path.exists(edge_driver_path)}")
-        if not os.path.exists(edge_driver_path):
-            return jsonify({'error': f'Edge WebDriver not found at {edge_driver_path}'}), 500
+        edge_driver_path = find_driver("edge")
+        print(f"[DEBUG] Edge WebDriver: {edge_driver_path or 'selenium-manager'}")
+        if IS_WINDOWS and edge_driver_path is None:
+            return jsonify({'error': f'Edge WebDriver not found at {EDGE_DRIVER_PATH}'}), 500
 
-        options = Options()
-        # options.add_argument('--user-data-dir=...')  # Optional: use a persistent profile
-
-        service = Service(executable_path=edge_driver_path)
-        bot = webdriver.Edge(service=service, options=options)
-        print(f"[DEBUG] Navigating Edge to: {url}")
-        bot.get(url)
+        try:
+            governor.admit()
+        except SessionRejected as e:
+            return jsonify({'error': str(e)}), 429
+        try:
+            lease = get_pool("eproc-edge", create_edge_driver).lease()
+            print(f"[DEBUG] Navigating Edge to: {url}")
+            lease.driver.get(url)
+        except Exception:
+            governor.cancel()
+            raise
 
         session_id = str(uuid.uuid4())
-        pending_eproc_sessions[session_id] = bot
+        pending_eproc_sessions[session_id] = lease
+        # Shard browsers for this captcha session start on the same node
+        pin_session(session_id, lease.driver)
+        governor.register(session_id, lease.driver, close=lambda: close_pending_session(session_id), label=url)
         print(f"[DEBUG] Edge opened, session_id: {session_id}")
         return jsonify({'message': 'Edge opened successfully', 'session_id': session_id, 'url': url}), 200
     except Exception as e:
         print(f"[ERROR] Failed to open Edge: {e}")
         return jsonify({'error': f'Failed to open Edge: {e}'}), 500
 
+def close_pending_session(session_id):
+    """Governor close hook: return an opened Edge to the pool."""
+    lease = pending_eproc_sessions.pop(session_id, None)
+    unpin_session(session_id)
+    if lease is not None:
+        lease.release()
+
+@app.route('/api/session-stats', methods=['GET'])
+def session_stats():
+    return jsonify(governor.stats())
+
+@app.route('/api/webdriver-nodes', methods=['GET'])
+def webdriver_nodes():
+    return jsonify(node_stats())
+
 @app.route('/api/start-eproc-scraping', methods=['POST'])
 def start_eproc_scraping():
     try:
@@ -223,9 +278,11 @@ def start_eproc_scraping():
         session_id = data.get('session_id')
         if not session_id:
             return jsonify({'error': 'Session ID is required. Please open Edge first.'}), 400
-        bot = pending_eproc_sessions.get(session_id)
-        if not bot:
+        lease = pending_eproc_sessions.get(session_id)
+        if not lease:
             return jsonify({'error': 'Session not found. Please open Edge first.'}), 400
+        bot = lease.driver
+        governor.set_busy(session_id, True)
         print(f"[DEBUG] Using existing Edge session: {session_id}")
         url = build_advanced_search_url(data.get('base_url', ''))
         print(f"[DEBUG] Start scraping with URL: {url}")
@@ -256,6 +313,12 @@ def start_eproc_scraping():
         print(f"[DEBUG] Start page: {data.get('start_page', 1)}")
         print(f"[DEBUG] Captcha: {data.get('captcha', None)}")
         
+        def worker_driver_factory(pin=None):
+            if get_node_pool() is not None:
+                # Cookies from the captcha browser are only valid from its node
+                return create_edge_driver(pin=pin)
+            return get_pool("eproc-edge", create_edge_driver).lease()
+
         run_eproc_scraper_with_bot(
             bot=bot,
             tender_type=data.get('tender_type', ''),
@@ -263,7 +326,12 @@ def start_eproc_scraping():
             start_page=data.get('start_page', 1),
             captcha=data.get('captcha', None),
             log_callback=emit_log_to_frontend,
-            session_id=session_id
+            session_id=session_id,
+            detail_mode=data.get('detail_mode', 'browser'),
+            page_workers=data.get('page_workers', 1),
+            worker_driver_factory=worker_driver_factory,
+            resume=data.get('resume', True),
+            prefetch_next=data.get('prefetch_next', False)
         )
 
         # Emit completion status
@@ -280,14 +348,15 @@ def start_eproc_scraping():
             'timestamp': datetime.now().isoformat()
         })
         
-        bot.quit()
-        del pending_eproc_sessions[session_id]
+        governor.release(session_id)
         return jsonify({'message': 'Scraping completed successfully!'}), 200
     except Exception as e:
         print(f"[ERROR] Failed to start scraping: {e}")
         
         # Emit error status
         if session_id:
+            # Keep the Edge for a retry, the reaper closes it if nobody comes back
+            governor.set_busy(session_id, False)
             socketio.emit('status_update', {
                 'active': False,
                 'session_id': session_id,
@@ -562,9 +631,8 @@ def debug_session_files(session_id):
             all_files = os.listdir(session_dir)
             result['all_files'] = all_files
             
-            # List Excel files
-            excel_files = glob.glob(os.path.join(session_dir, '*.xlsx'))
-            result['excel_files'] = [os.path.basename(f) for f in excel_files]
+            # List Excel files (including ones still streamed as sinks)
+            result['excel_files'] = sorted(list_session_outputs(session_dir))
             
             print(f"[DEBUG] All files: {all_files}")
             print(f"[DEBUG] Excel files: {result['excel_files']}")
@@ -589,11 +657,10 @@ def get_session_files(session_id):
             return jsonify({'files': []}), 200
         
         files = []
-        excel_files = glob.glob(os.path.join(session_dir, '*.xlsx'))
+        excel_files = list_session_outputs(session_dir)
         print(f"[DEBUG] Found {len(excel_files)} Excel files")
         
-        for file_path in excel_files:
-            filename = os.path.basename(file_path)
+        for filename, file_path in sorted(excel_files.items()):
             file_size = os.path.getsize(file_path)
             files.append({
                 'name': filename,
@@ -613,7 +680,7 @@ def get_session_files(session_id):
 def download_file(session_id, filename):
     """Download a specific file from a session"""
     try:
-        file_path = os.path.join(OUTPUT_BASE_DIR, session_id, filename)
+        file_path = resolve_session_output(session_id, filename)
         if not os.path.exists(file_path):
             return jsonify({'error': 'File not found'}), 404
         
@@ -632,10 +699,7 @@ def delete_file(session_id):
         if not filename:
             return jsonify({'error': 'Filename is required'}), 400
         
-        file_path = os.path.join(OUTPUT_BASE_DIR, session_id, filename)
-        
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if remove_output(os.path.join(OUTPUT_BASE_DIR, session_id), filename):
             socketio.emit('scraping_log', {'message': f'🗑️ Deleted file: {filename}', 'session_id': session_id})
             return jsonify({'success': True, 'message': f'File {filename} deleted successfully'})
         else:
@@ -647,43 +711,31 @@ def delete_file(session_id):
 def merge_session_files(session_id):
     """Merge all Excel files in a session into one file"""
     try:
-        import pandas as pd
-        
         session_dir = os.path.join(OUTPUT_BASE_DIR, session_id)
         if not os.path.exists(session_dir):
             return jsonify({'error': 'Session directory not found'}), 404
         
-        excel_files = glob.glob(os.path.join(session_dir, '*.xlsx'))
+        merged_filename = f'merged_data_{session_id}.xlsx'
+        excel_files = [f for name, f in list_session_outputs(session_dir).items() if name != merged_filename]
         if not excel_files:
             return jsonify({'error': 'No Excel files found in session'}), 404
         
-        # Read and merge all Excel files
-        all_data = []
-        for file_path in excel_files:
-            try:
-                df = pd.read_excel(file_path)
-                all_data.append(df)
-            except Exception as e:
-                socketio.emit('scraping_log', {'message': f'⚠️ Warning: Could not read {os.path.basename(file_path)}: {str(e)}', 'session_id': session_id})
+        # Read and merge all Excel files, streamed into the merged workbook
+        merged_path = os.path.join(session_dir, merged_filename)
+        result = merge_outputs(excel_files, merged_path, progress=merge_progress(session_id), build=True)
+        for file_path, error in result['failed']:
+            socketio.emit('scraping_log', {'message': f'⚠️ Warning: Could not read {os.path.basename(file_path)}: {error}', 'session_id': session_id})
         
-        if not all_data:
+        if not result['merged']:
             return jsonify({'error': 'No valid Excel files found'}), 404
         
-        # Merge all dataframes
-        merged_df = pd.concat(all_data, ignore_index=True)
-        
-        # Save merged file
-        merged_filename = f'merged_data_{session_id}.xlsx'
-        merged_path = os.path.join(session_dir, merged_filename)
-        merged_df.to_excel(merged_path, index=False)
-        
         socketio.emit('scraping_log', {'message': f'📊 Merged {len(excel_files)} files into {merged_filename}', 'session_id': session_id})
         
         return jsonify({
             'message': 'Files merged successfully',
             'merged_file': merged_filename,
             'total_files': len(excel_files),
-            'total_rows': len(merged_df)
+            'total_rows': result['rows']
         }), 200
         
     except Exception as e:
@@ -693,40 +745,23 @@ def merge_session_files(session_id):
 def merge_download_session(session_id):
     """Merge all Excel files in a session and download as CSV"""
     try:
-        import pandas as pd
-        
         session_dir = os.path.join(OUTPUT_BASE_DIR, session_id)
         if not os.path.exists(session_dir):
             return jsonify({'error': 'Session directory not found'}), 404
         
-        excel_files = glob.glob(os.path.join(session_dir, '*.xlsx'))
+        excel_files = list(list_session_outputs(session_dir).values())
         if not excel_files:
             return jsonify({'error': 'No Excel files found in session'}), 404
         
-        # Read and merge all Excel files
-        all_data = []
-        for file_path in excel_files:
-            try:
-                df = pd.read_excel(file_path)
-                all_data.append(df)
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-                continue
+        # Read and merge all Excel files, streamed to a CSV in the session
+        csv_filename = f'merged_data_{session_id}.csv'
+        csv_path = os.path.join(session_dir, csv_filename)
+        result = merge_outputs(excel_files, csv_path, progress=merge_progress(session_id))
         
-        if not all_data:
+        if not result['merged']:
             return jsonify({'error': 'No valid Excel files found'}), 404
         
-        # Concatenate all dataframes
-        merged_df = pd.concat(all_data, ignore_index=True)
-        
-        # Create CSV content
-        csv_content = merged_df.to_csv(index=False)
-        
-        # Create response with CSV content
-        response = Response(csv_content, mimetype='text/csv')
-        response.headers['Content-Disposition'] = f'attachment; filename=merged_data_{session_id}.csv'
-        
-        return response
+        return send_file(csv_path, mimetype='text/csv', as_attachment=True, download_name=csv_filename)
         
     except Exception as e:
         return jsonify({'error': f'Failed to merge and download: {str(e)}'}), 500
@@ -735,14 +770,12 @@ def merge_download_session(session_id):
 def merge_single_file(session_id, filename):
     """Merge a single Excel file and download as CSV"""
     try:
-        import pandas as pd
-        
-        file_path = os.path.join(OUTPUT_BASE_DIR, session_id, filename)
-        if not os.path.exists(file_path):
+        file_path = list_session_outputs(os.path.join(OUTPUT_BASE_DIR, session_id)).get(filename)
+        if not file_path:
             return jsonify({'error': 'File not found'}), 404
         
         # Read the Excel file
-        df = pd.read_excel(file_path)
+        df = read_session_output(file_path)
         
         # Create CSV content
         csv_content = df.to_csv(index=False)
@@ -760,7 +793,6 @@ def merge_single_file(session_id, filename):
 def merge_global_files():
     """Merge all files from all sessions and store in database"""
     try:
-        import pandas as pd
         from datetime import datetime
         
         data = request.get_json()
@@ -775,43 +807,39 @@ def merge_global_files():
         if not os.path.exists(global_dir):
             os.makedirs(global_dir)
         
-        # Read and merge all files
-        all_data = []
-        processed_files = []
-        
+        # Source information added to each file's rows
+        paths = []
+        names = {}
+        extras = {}
         for file_info in files:
             session_id = file_info.get('session_id')
             filename = file_info.get('filename')
-            file_path = os.path.join(OUTPUT_BASE_DIR, session_id, filename)
+            file_path = list_session_outputs(os.path.join(OUTPUT_BASE_DIR, session_id)).get(filename)
             
-            if os.path.exists(file_path):
-                try:
-                    df = pd.read_excel(file_path)
-                    # Add source information
-                    df['source_session'] = session_id
-                    df['source_file'] = filename
-                    df['processed_date'] = datetime.now().isoformat()
-                    all_data.append(df)
-                    processed_files.append(filename)
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
-                    continue
+            if file_path:
+                paths.append(file_path)
+                names[file_path] = filename
+                extras[file_path] = {
+                    'source_session': session_id,
+                    'source_file': filename,
+                    'processed_date': datetime.now().isoformat(),
+                }
+        
+        # Read and merge all files, streamed to the merged CSV
+        merged_file_path = os.path.join(global_dir, f'global_merged_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
+        result = merge_outputs(paths, merged_file_path, extras=extras, progress=merge_progress(global_session_id))
+        failed = {file_path for file_path, error in result['failed']}
+        processed_files = [names[file_path] for file_path in paths if file_path not in failed]
         
-        if not all_data:
+        if not processed_files:
+            os.remove(merged_file_path)
             return jsonify({'error': 'No valid files found'}), 404
         
-        # Concatenate all dataframes
-        merged_df = pd.concat(all_data, ignore_index=True)
-        
-        # Save merged file
-        merged_file_path = os.path.join(global_dir, f'global_merged_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv')
-        merged_df.to_csv(merged_file_path, index=False)
-        
         # Store in database
         try:
             db = EProcurementDBMySQL()
             db_result = db.store_merged_data(
-                df=merged_df,
+                df=load_merged(result),
                 merge_session_id=global_session_id,
                 source_session_id=files[0].get('session_id') if files else None,
                 source_file=','.join(processed_files)
@@ -837,7 +865,7 @@ def merge_global_files():
         merge_record = {
             'session_id': global_session_id,
             'files_processed': len(processed_files),
-            'total_records': len(merged_df),
+            'total_records': result['rows'],
             'merged_file': merged_file_path,
             'timestamp': datetime.now().isoformat(),
             'source_files': processed_files,
@@ -852,7 +880,7 @@ def merge_global_files():
         
         return jsonify({
             'success': True,
-            'message': f'Successfully merged {len(processed_files)} files with {len(merged_df)} total records',
+            'message': f'Successfully merged {len(processed_files)} files with {result["rows"]} total records',
             'data': merge_record
         }), 200
         
@@ -935,6 +963,63 @@ def delete_eprocurement_data(merge_session_id):
     except Exception as e:
         return jsonify({'error': f'Failed to delete e-procurement data: {str(e)}'}), 500
 
+# Multi-portal batches: batch_id -> EprocBatch
+eproc_batches = {}
+
+def emit_batch_captcha(captcha):
+    socketio.emit('captcha_required', captcha)
+
+@app.route('/api/batch/start', methods=['POST'])
+def start_eproc_batch():
+    """Scrape several NIC portals in parallel with one shared captcha queue"""
+    try:
+        data = request.get_json()
+        base_urls = data.get('base_urls', [])
+        if not base_urls:
+            return jsonify({'error': 'base_urls is required'}), 400
+        if IS_WINDOWS and find_driver("edge") is None:
+            return jsonify({'error': f'Edge WebDriver not found at {EDGE_DRIVER_PATH}'}), 500
+
+        batch = EprocBatch(
+            base_urls=base_urls,
+            tender_type=data.get('tender_type', 'O'),
+            days_interval=data.get('days_interval', 7),
+            driver_factory=create_edge_driver,
+            max_browsers=data.get('max_browsers', 3),
+            start_page=data.get('start_page', 1),
+            log_callback=emit_log_to_frontend,
+            captcha_queue=CaptchaQueue(on_new=emit_batch_captcha),
+            detail_mode=data.get('detail_mode', 'http'),
+            resume=data.get('resume', True)
+        )
+        for session_id in batch.portals:
+            os.makedirs(os.path.join(OUTPUT_BASE_DIR, session_id), exist_ok=True)
+        eproc_batches[batch.batch_id] = batch
+        batch.start()
+        return jsonify({'message': 'Batch started', **batch.status()}), 200
+    except Exception as e:
+        print(f"[ERROR] Failed to start batch: {e}")
+        return jsonify({'error': f'Failed to start batch: {str(e)}'}), 500
+
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+def get_eproc_batch(batch_id):
+    """Portal statuses and captchas waiting for the operator"""
+    batch = eproc_batches.get(batch_id)
+    if not batch:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(batch.status()), 200
+
+@app.route('/api/batch/<batch_id>/captcha', methods=['POST'])
+def answer_batch_captcha(batch_id):
+    """Answer one queued captcha"""
+    batch = eproc_batches.get(batch_id)
+    if not batch:
+        return jsonify({'error': 'Batch not found'}), 404
+    data = request.get_json()
+    if not batch.captchas.answer(data.get('captcha_id'), data.get('captcha', '')):
+        return jsonify({'error': 'Captcha not pending'}), 404
+    return jsonify({'success': True}), 200
+
 @app.route('/api/sessions', methods=['GET'])
 def list_sessions():
     """List all scraping sessions"""
@@ -944,7 +1029,7 @@ def list_sessions():
             for session_dir in os.listdir(OUTPUT_BASE_DIR):
                 session_path = os.path.join(OUTPUT_BASE_DIR, session_dir)
                 if os.path.isdir(session_path):
-                    files = glob.glob(os.path.join(session_path, '*.xlsx'))
+                    files = list_session_outputs(session_path)
                     sessions.append({
                         'session_id': session_dir,
                         'file_count': len(files),
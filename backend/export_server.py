@@ -6,6 +6,11 @@ import datetime
 import zipfile
 import io
 
+try:
+    from backend.scrapers.output_sink import list_outputs, resolve_output
+except ImportError:
+    from scrapers.output_sink import list_outputs, resolve_output
+
 app = FastAPI()
 
 # Configure CORS
@@ -34,11 +39,13 @@ async def export_user_data(request: Request):
                     for file in files:
                         file_path = os.path.join(output_path, file)
                         if os.path.isdir(file_path):
-                            sub_files = os.listdir(file_path)
+                            # Sinks listed under the workbook name resolve_output builds
+                            sub_files = list(list_outputs(file_path)) + sorted(
+                                f for f in os.listdir(file_path) if f.endswith('.csv'))
                             available_files.append({
                                 "tool": dir_name.upper(),
                                 "sessionId": file,
-                                "files": [f for f in sub_files if f.endswith(('.xlsx', '.csv'))],
+                                "files": sub_files,
                                 "path": f"outputs/{dir_name}/{file}"
                             })
                 except Exception as e:
@@ -86,9 +93,11 @@ async def export_output_files(request: Request):
                         if files:
                             # Add the entire directory to the zip
                             for root, dirs, files in os.walk(output_path):
-                                for file in files:
-                                    file_path = os.path.join(root, file)
-                                    arc_name = os.path.relpath(file_path, "outputs")
+                                # Workbooks (built from their sinks), then the other files
+                                workbooks = list_outputs(root)
+                                for file in list(workbooks) + [f for f in files if not f.endswith(('.xlsx', '.ndjson'))]:
+                                    file_path = resolve_output(root, file) if file in workbooks else os.path.join(root, file)
+                                    arc_name = os.path.relpath(os.path.join(root, file), "outputs")
                                     zip_file.write(file_path, arc_name)
                                     has_files = True
                     except Exception as e:
@@ -4,10 +4,11 @@ os.environ['FLASK_LOAD_DOTENV'] = 'false'
 
 from flask import Flask, send_file, jsonify, request
 from flask_cors import CORS
-import pandas as pd
 import zipfile
 import io
 import pymysql
+from scrapers.output_sink import list_outputs, resolve_output, remove_output, output_exists
+from scrapers.merge_engine import merge_outputs, iter_merged
 
 app = Flask(__name__)
 CORS(app)  # Add CORS support to allow requests from the frontend
@@ -34,7 +35,7 @@ def list_files(run_id):
     if error:
         return jsonify({"error": error}), 400
     try:
-        files = [f for f in os.listdir(run_dir) if f.endswith('.xlsx')]
+        files = list(list_outputs(run_dir))
         return jsonify(files)
     except FileNotFoundError:
         return jsonify([])
@@ -45,11 +46,12 @@ def download_file(run_id, filename):
     if error:
         return jsonify({"error": error}), 400
     
-    file_path = os.path.join(run_dir, filename)
-    if not os.path.exists(file_path):
+    if not output_exists(run_dir, filename):
         return "File not found", 404
-        
-    return send_file(file_path, as_attachment=True)
+
+    # Scrapers write NDJSON, the workbook is built (and kept) on first download
+    file_path = resolve_output(run_dir, filename)
+    return send_file(file_path, as_attachment=True, download_name=filename)
 
 @app.route('/api/merge-download/<run_id>', methods=['GET'])
 def merge_download(run_id):
@@ -71,18 +73,10 @@ def merge_download(run_id):
             download_name=csv_filename
         )
 
-    files = [f for f in os.listdir(run_dir) if f.endswith('.xlsx')]
+    files = list_outputs(run_dir)
     if not files:
         return "No files to merge", 404
     
-    merged_df = pd.DataFrame()
-    for file in files:
-        df = pd.read_excel(os.path.join(run_dir, file))
-        merged_df = pd.concat([merged_df, df], ignore_index=True)
-    
-    # Replace NaN with None for MySQL compatibility (handles all dtypes)
-    merged_df = merged_df.astype(object).where(pd.notnull(merged_df), None)
-
     # Rename columns to match MySQL table
     column_rename_map = {
         'user name': 'user_name',
@@ -111,10 +105,6 @@ def merge_download(run_id):
         'tachment l': 'attachment_link',
         'End Date': 'end_date',
     }
-    merged_df.rename(columns=column_rename_map, inplace=True)
-
-    # Remove duplicate columns, keeping only the first occurrence
-    merged_df = merged_df.loc[:, ~merged_df.columns.duplicated()]
 
     # Keep only columns that match the MySQL table
     valid_columns = [
@@ -122,19 +112,13 @@ def merge_download(run_id):
         'quantity', 'emd', 'exemption', 'estimation_value', 'state',
         'location', 'apply_mode', 'website_link', 'document_link', 'attachment_link', 'end_date'
     ]
-    merged_df = merged_df[[col for col in merged_df.columns if col in valid_columns]]
 
-    # Remove rows where all values are None/NaN
-    merged_df = merged_df.dropna(how='all')
-    
-    # Create CSV filename and filepath
-    # (already defined above)
-    
-    # Save merged data as CSV
-    merged_df.to_csv(csv_filepath, index=False, encoding='utf-8')
-    
+    # Renamed duplicates keep the first column; rows with no values are dropped
+    spec = {'rename': column_rename_map, 'columns': valid_columns, 'dropna_all': True}
+    result = merge_outputs(list(files.values()), csv_filepath, spec=spec)
+
     # --- Insert merged data into MySQL gem_data table (AWS) ---
-    if not merged_df.empty:
+    if result['rows'] and result['columns']:
         try:
             connection = pymysql.connect(
                 host='54.149.111.114',
@@ -147,13 +131,14 @@ def merge_download(run_id):
             )
             with connection:
                 with connection.cursor() as cursor:
-                    cols = ','.join(f'`{col}`' for col in merged_df.columns)
-                    placeholders = ','.join(['%s'] * len(merged_df.columns))
+                    cols = ','.join(f'`{col}`' for col in result['columns'])
+                    placeholders = ','.join(['%s'] * len(result['columns']))
                     sql = f'INSERT INTO gem_data ({cols}) VALUES ({placeholders})'
-                    for row in merged_df.itertuples(index=False, name=None):
-                        cursor.execute(sql, row)
+                    # Chunks of the merged file, NaN already None
+                    for chunk in iter_merged(result):
+                        cursor.executemany(sql, list(chunk.itertuples(index=False, name=None)))
                 connection.commit()
-                print(f"[SUCCESS] Inserted {len(merged_df)} rows into gem_data table (AWS)")
+                print(f"[SUCCESS] Inserted {result['rows']} rows into gem_data table (AWS)")
         except Exception as e:
             print(f"[ERROR] Failed to insert merged data into gem_data (AWS): {e}")
     # --- End MySQL insert ---
@@ -176,9 +161,7 @@ def delete_file_endpoint(run_id, filename):
     if error:
         return jsonify({"error": error}), 400
 
-    file_path = os.path.join(run_dir, filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    if remove_output(run_dir, filename):
         return jsonify({'success': True})
     else:
         return jsonify({'success': False, 'error': 'File not found'}), 404
@@ -189,14 +172,14 @@ def download_all(run_id):
     if error:
         return jsonify({"error": error}), 400
         
-    files = [f for f in os.listdir(run_dir) if f.endswith('.xlsx')]
+    files = list(list_outputs(run_dir))
     if not files:
         return "No files to zip", 404
 
     mem_zip = io.BytesIO()
     with zipfile.ZipFile(mem_zip, 'w') as zf:
         for file in files:
-            zf.write(os.path.join(run_dir, file), arcname=file)
+            zf.write(resolve_output(run_dir, file), arcname=file)
     mem_zip.seek(0)
     
     return send_file(
@@ -216,7 +199,7 @@ def gem_list_files(run_id):
     if error:
         return jsonify({"error": error}), 400
     try:
-        files = [f for f in os.listdir(run_dir) if f.endswith('.xlsx')]
+        files = list(list_outputs(run_dir))
         # Return file URLs for frontend
         file_objs = [{
             'name': f,
@@ -231,9 +214,7 @@ def gem_delete_file(run_id, filename):
     run_dir, error = get_run_dir(run_id)
     if error:
         return jsonify({"error": error}), 400
-    file_path = os.path.join(run_dir, filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    if remove_output(run_dir, filename):
         return jsonify({'success': True})
     else:
         return jsonify({'success': False, 'error': 'File not found'}), 404
@@ -243,17 +224,13 @@ def gem_merge_files(run_id):
     run_dir, error = get_run_dir(run_id)
     if error:
         return jsonify({"error": error}), 400
-    files = [f for f in os.listdir(run_dir) if f.endswith('.xlsx')]
+    files = list_outputs(run_dir)
+    files.pop(f'merged_data_{run_id}.xlsx', None)
     if not files:
         return jsonify({'error': 'No files to merge'}), 404
-    merged_df = pd.DataFrame()
-    for file in files:
-        df = pd.read_excel(os.path.join(run_dir, file))
-        merged_df = pd.concat([merged_df, df], ignore_index=True)
     merged_filename = f'merged_data_{run_id}.xlsx'
     merged_filepath = os.path.join(run_dir, merged_filename)
-    with pd.ExcelWriter(merged_filepath, engine='xlsxwriter') as writer:
-        merged_df.to_excel(writer, index=False, sheet_name='MergedData')
+    merge_outputs(list(files.values()), merged_filepath, build=True)
     return jsonify({'success': True, 'merged_file': merged_filename, 'url': f'/api/download/{run_id}/{merged_filename}'})
 
 @app.route('/api/ireps-merge-download/<run_id>', methods=['GET'])
@@ -275,21 +252,10 @@ def ireps_merge_download(run_id):
             download_name=csv_filename
         )
 
-    files = [f for f in os.listdir(run_dir) if f.endswith('.xlsx')]
+    files = list_outputs(run_dir)
     if not files:
         return "No files to merge", 404
 
-    merged_df = pd.DataFrame()
-    for file in files:
-        df = pd.read_excel(os.path.join(run_dir, file))
-        merged_df = pd.concat([merged_df, df], ignore_index=True)
-
-    # Remove rows where all values are null
-    merged_df = merged_df.dropna(how='all')
-
-    # Remove duplicate rows
-    merged_df = merged_df.drop_duplicates()
-
     # Rename columns to match tenders table
     column_rename_map = {
         'Deptt./Rly. Unit': 'dept_unit',
@@ -299,17 +265,16 @@ def ireps_merge_download(run_id):
         'Work Area': 'work_area',
         'Due Date/Time': 'due_datetime'
     }
-    merged_df.rename(columns=column_rename_map, inplace=True)
 
     # Keep only the columns needed for the database
     valid_columns = ['dept_unit', 'tender_no', 'tender_title', 'status', 'work_area', 'due_datetime']
-    merged_df = merged_df[[col for col in merged_df.columns if col in valid_columns]]
 
-    # Save as CSV
-    merged_df.to_csv(csv_filepath, index=False, encoding='utf-8')
+    # Rows with no values and duplicate rows (as read) are dropped while merging
+    spec = {'rename': column_rename_map, 'columns': valid_columns, 'dropna_all': True, 'dedupe_before': True}
+    result = merge_outputs(list(files.values()), csv_filepath, spec=spec)
 
     # Insert into MySQL (AWS) for IREPS 'tender' table
-    if not merged_df.empty:
+    if result['rows'] and result['columns']:
         try:
             connection = pymysql.connect(
                 host='54.149.111.114',
@@ -322,11 +287,11 @@ def ireps_merge_download(run_id):
             )
             with connection:
                 with connection.cursor() as cursor:
-                    cols = ','.join(f'`{col}`' for col in merged_df.columns)
-                    placeholders = ','.join(['%s'] * len(merged_df.columns))
+                    cols = ','.join(f'`{col}`' for col in result['columns'])
+                    placeholders = ','.join(['%s'] * len(result['columns']))
                     sql = f'INSERT INTO tender ({cols}) VALUES ({placeholders})'
-                    for row in merged_df.itertuples(index=False, name=None):
-                        cursor.execute(sql, row)
+                    for chunk in iter_merged(result):
+                        cursor.executemany(sql, list(chunk.itertuples(index=False, name=None)))
                 connection.commit()
         except Exception as e:
             print(f"[ERROR] Failed to insert merged data into tender (AWS): {e}")
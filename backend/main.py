@@ -36,6 +36,16 @@ except ImportError as e:
         tools = None
         print("Warning: Could not import router modules")
 
+try:
+    from backend.scrapers.browser_pool import get_pool
+except ImportError:
+    from scrapers.browser_pool import get_pool
+
+try:
+    from backend.scrapers.output_sink import list_outputs
+except ImportError:
+    from scrapers.output_sink import list_outputs
+
 try:
     import gem_api, eproc_api, admin_metrics_api, analytics_api
 except ImportError:
@@ -83,6 +93,25 @@ if admin_metrics_api:
 if analytics_api:
     app.mount("/analytics", analytics_api.app)
 
+def make_open_edge():
+    # Try to use the existing WebDriver first
+    DRIVER_PATH = os.path.abspath('scrapers/edgedriver_win64/msedgedriver.exe')
+    options = Options()
+    options.add_experimental_option("detach", True)  # Keeps the browser open after script ends
+    options.add_argument("--ignore-certificate-errors")
+    options.add_argument("--ignore-ssl-errors")
+    options.add_argument("--ignore-certificate-errors-spki-list")
+    
+    try:
+        service = Service(executable_path=DRIVER_PATH)
+        return webdriver.Edge(service=service, options=options)
+    except Exception as driver_error:
+        # If WebDriver fails, try using the system's default Edge installation
+        print(f"WebDriver error: {driver_error}")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        return webdriver.Edge(options=options)
+
 @app.post('/api/open-edge')
 async def open_edge(request: Request):
     data = await request.json()
@@ -90,24 +119,9 @@ async def open_edge(request: Request):
     if not url:
         return JSONResponse({'error': 'No URL provided'}, status_code=400)
     try:
-        # Try to use the existing WebDriver first
-        DRIVER_PATH = os.path.abspath('scrapers/edgedriver_win64/msedgedriver.exe')
-        options = Options()
-        options.add_experimental_option("detach", True)  # Keeps the browser open after script ends
-        options.add_argument("--ignore-certificate-errors")
-        options.add_argument("--ignore-ssl-errors")
-        options.add_argument("--ignore-certificate-errors-spki-list")
-        
-        try:
-            service = Service(executable_path=DRIVER_PATH)
-            driver = webdriver.Edge(service=service, options=options)
-        except Exception as driver_error:
-            # If WebDriver fails, try using the system's default Edge installation
-            print(f"WebDriver error: {driver_error}")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            driver = webdriver.Edge(options=options)
-        
+        # The browser stays open for the user, so it leaves the pool for good
+        # and the pool pre-launches a replacement for the next request
+        driver = get_pool("open-edge", make_open_edge).lease().detach()
         driver.get(url)
         return JSONResponse({'status': 'success'}, status_code=200)
     except Exception as e:
@@ -318,11 +332,13 @@ async def export_user_data(request: Request):
                     for file in files:
                         file_path = os.path.join(output_path, file)
                         if os.path.isdir(file_path):
-                            sub_files = os.listdir(file_path)
+                            # Sinks listed under the workbook name resolve_output builds
+                            sub_files = list(list_outputs(file_path)) + sorted(
+                                f for f in os.listdir(file_path) if f.endswith('.csv'))
                             available_files.append({
                                 "tool": dir_name.upper(),
                                 "sessionId": file,
-                                "files": [f for f in sub_files if f.endswith(('.xlsx', '.csv'))],
+                                "files": sub_files,
                                 "path": f"outputs/{dir_name}/{file}"
                             })
                 except Exception as e:
@@ -46,7 +46,13 @@ def handle_start_scraping(data):
         return
     
     # Validate required fields (city_input and days_interval are optional)
-    required_args = ['startingpage', 'totalpages', 'username', 'state_index', 'run_id']
+    sweep = bool(data.get('sweep'))
+    if sweep:
+        # One run over every state, totalpages optionally caps pages per state/city
+        required_args = ['username', 'run_id']
+    else:
+        # totalpages is optional, gem.py reads the page count from numFound
+        required_args = ['startingpage', 'username', 'state_index', 'run_id']
     missing = [arg for arg in required_args if not data.get(arg)]
     if missing:
         error_msg = f"[ERROR] Missing required fields: {', '.join(missing)}\n"
@@ -56,16 +62,31 @@ def handle_start_scraping(data):
     
     backend_dir = os.path.dirname(os.path.abspath(__file__))
     gem_path = os.path.join(backend_dir, "scrapers", "gem.py")
-    cmd = [
-        "python", "-u", gem_path,
-        "--startingpage", str(data['startingpage']),
-        "--totalpages", str(data['totalpages']),
-        "--username", data['username'],
-        "--state_index", str(data['state_index']),
-        "--city_input", data.get('city_input', ''),
-        "--days_interval", str(data.get('days_interval', 1)),
-        "--run_id", data['run_id']
-    ]
+    if sweep:
+        cmd = [
+            "python", "-u", gem_path,
+            "--sweep",
+            "--username", data['username'],
+            "--days_interval", str(data.get('days_interval', 1)),
+            "--run_id", data['run_id']
+        ]
+        if data.get('totalpages'):
+            cmd += ["--totalpages", str(data['totalpages'])]
+    else:
+        cmd = [
+            "python", "-u", gem_path,
+            "--startingpage", str(data['startingpage']),
+            "--username", data['username'],
+            "--state_index", str(data['state_index']),
+            "--city_input", data.get('city_input', ''),
+            "--days_interval", str(data.get('days_interval', 1)),
+            "--run_id", data['run_id']
+        ]
+        if data.get('totalpages'):
+            cmd += ["--totalpages", str(data['totalpages'])]
+    if data.get('delta'):
+        # Only bids that are new or changed since the last run
+        cmd.append("--delta")
     print("Running command:", " ".join(cmd))
     
     try:
@@ -3,18 +3,13 @@ eventlet.monkey_patch()
 
 from flask import Flask, Response, request, jsonify
 from flask_socketio import SocketIO, emit
-import subprocess
 import os
 from flask_cors import CORS
 
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
-from time import sleep
 import pandas as pd
 from os import path, makedirs
 from datetime import date, timedelta
@@ -24,6 +19,12 @@ import base64
 import re
 import uuid
 
+from scrapers.eproc_detail import extract_detail_fields
+from scrapers.search import build_tender_row
+from scrapers.session_governor import governor, SessionRejected
+from scrapers.driver_factory import create_driver, minimize, maximize
+from scrapers.waits import wait_until, wait_dom_ready, wait_for_element, wait_for_value, log_wait_stats
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}}, supports_credentials=True, allow_headers="*", methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 socketio = SocketIO(app, cors_allowed_origins="*")
@@ -38,10 +39,17 @@ OUTPUT_DIR = path.join(BASE_DIR, "scrapers", "OUTPUT")
 if not path.exists(OUTPUT_DIR):
     makedirs(OUTPUT_DIR)
 FILE_NAME = "open-tenders_output_page-{}.xlsx"  # default, will be set dynamically
+# Set EPROC_DEBUG_SNAPSHOTS=1 to save a screenshot + page source after captcha submit
+DEBUG_SNAPSHOTS = os.environ.get("EPROC_DEBUG_SNAPSHOTS", "0") == "1"
 
 # Add global variable to store the bot/session for captcha step
 pending_eproc_sessions = {}
 
+def close_pending_session(session_id, bot):
+    """Governor close hook for an Edge opened by /api/open-edge."""
+    pending_eproc_sessions.pop(session_id, None)
+    bot.quit()
+
 def debug_page_state(bot, step_name):
     """Take screenshot and save page source for debugging"""
     try:
@@ -57,6 +65,12 @@ def debug_page_state(bot, step_name):
     except Exception as e:
         print(f"Debug save failed: {e}")
 
+def captcha_result_shown(bot):
+    """True once the search results or a captcha error message are on the page."""
+    if bot.find_elements(By.CLASS_NAME, "list_footer") or bot.find_elements(By.ID, "table"):
+        return True
+    return bool(bot.find_elements(By.XPATH, "//*[contains(text(), 'Invalid') or contains(text(), 'incorrect')]"))
+
 def solve_captcha_main(bot, captcha=None):
     WebDriverWait(bot, TIMEOUT).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
     if captcha is not None:
@@ -66,16 +80,16 @@ def solve_captcha_main(bot, captcha=None):
     
     print(f"Entering captcha: {solvcap}")
     bot.find_element(By.ID, "captchaText").send_keys(solvcap)
-    sleep(2)
+    wait_for_value(bot, By.ID, "captchaText", solvcap, timeout=2, replaces=2)
     
     print("Clicking search button")
     bot.find_element(By.XPATH, "//input[@title='Search']").click()
     
-    # Wait a bit for the page to process
-    sleep(3)
+    # Wait for the result page (or an error message) instead of a fixed pause
+    wait_until(bot, captcha_result_shown, timeout=TIMEOUT, name="captcha result", replaces=3)
     
-    # Debug: Take screenshot after captcha submission
-    debug_page_state(bot, "after_captcha")
+    if DEBUG_SNAPSHOTS:
+        debug_page_state(bot, "after_captcha")
     
     # Check for multiple success indicators
     success_indicators = [
@@ -128,135 +142,32 @@ def solve_captcha_main(bot, captcha=None):
         print("Could not determine page state")
         return False
 
-def get_basic_details(bot):
-    organisation_chain = ""
-    organisation_chain_filter = "Organisation Chain"
-    tender_reference_number = ""
-    tender_reference_number_filter = "Tender Reference Number"
-    tender_id = ""
-    tender_id_filter = "Tender ID"
-    tender_type = ""
-    tender_type_filter = "Tender Category"
-    tender_category = ""
-    tender_category_filter = "Tender Category"
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-            if organisation_chain_filter == captain_text:
-                organisation_chain = field.text.strip()
-            if tender_reference_number_filter == captain_text:
-                tender_reference_number = field.text.strip()
-            if tender_id_filter == captain_text:
-                tender_id = field.text.strip()
-            if tender_type_filter == captain_text:
-                tender_type = field.text.strip()
-            if tender_category_filter == captain_text:
-                tender_category = field.text.strip()
-    return organisation_chain, tender_reference_number, tender_id, tender_category, tender_type
-
-def get_fee_details(bot):
-    tender_fee = ""
-    tender_fee_filter = "Tender Fee in ₹"
-    fee_payable_to = ""
-    fee_payable_to_filter = "Fee Payable To"
-    exepm_allowed = ""
-    exep_filter = "Tender Fee Exemption Allowed"
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-            if tender_fee_filter == captain_text:
-                tender_fee = field.text.strip()
-            if fee_payable_to_filter == captain_text:
-                fee_payable_to = field.text.strip()
-            if exep_filter == captain_text:
-                exepm_allowed = field.text.strip()
-    return tender_fee, fee_payable_to, exepm_allowed
-
-def get_emd_details(bot):
-    emd_amout = ""
-    emd_amout_filter = "EMD Amount in ₹"
-    emd_payable_to = ""
-    emd_payable_to_filter = "EMD Payable To"
-    emd_exepm_allowed = ""
-    emd_exepm_allowed_filter = "EMD through BG/ST or EMD Exemption Allowed"
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-            if emd_amout_filter == captain_text:
-                emd_amout = field.text.strip()
-            if emd_payable_to_filter == captain_text:
-                emd_payable_to = field.text.strip()
-            if emd_exepm_allowed_filter == captain_text:
-                emd_exepm_allowed = field.text.strip()
-    return emd_amout, emd_payable_to, emd_exepm_allowed
-
-def get_work_details(bot):
-    title = ""
-    title_filter = "Title"
-    word_desc = ""
-    word_desc_filter = "Work Description"
-    tander_value_in = ""
-    tander_value_in_filter = "Tender Value in ₹"
-    location = ""
-    location_filter = "Location"
-    pincode = ""
-    pincode_filter = "Pincode"   
-    pre_bid_address = ""
-    pre_bid_address_filter = "Pre Bid Meeting Address"
-    pre_bid_date = ""
-    pre_bid_date_filter = "Pre Bid Meeting Date"
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-            if title_filter in captain_text:
-                title = field.text.strip()
-            if tander_value_in_filter in captain_text:
-                tander_value_in = field.text.strip()
-            if location_filter in captain_text:
-                location = field.text.strip()
-            if pincode_filter in captain_text:
-                pincode = field.text.strip()            
-            if pre_bid_address_filter in captain_text:
-                pre_bid_address = field.text.strip()
-            if pre_bid_date_filter in captain_text:
-                pre_bid_date = field.text.strip()
-            if word_desc_filter in captain_text:
-                word_desc = field.text.strip()
-    return title, word_desc, tander_value_in, location, pincode, pre_bid_date, pre_bid_address
-
-def get_critical_dates(bot):
-    published_date = ""
-    published_date_filter = "Published Date"
-    bid_sub_end_date = ""
-    bid_sub_end_date_filter = "Bid Submission End Date"
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-            if published_date_filter == captain_text:
-                published_date = field.text.strip()
-            if bid_sub_end_date_filter == captain_text:
-                bid_sub_end_date = field.text.strip()
-    return published_date, bid_sub_end_date
+def get_basic_details(bot, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return (fields["organisation_chain"], fields["tender_reference_number"], fields["tender_id"],
+            fields["tender_category"], fields["tender_type"])
+
+def get_fee_details(bot, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["tender_fee"], fields["fee_payable_to"], fields["fee_exemption_allowed"]
+
+def get_emd_details(bot, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["emd_amount"], fields["emd_payable_to"], fields["emd_exemption_allowed"]
+
+def get_work_details(bot, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return (fields["title"], fields["work_description"], fields["tender_value"], fields["location"],
+            fields["pincode"], fields["pre_bid_meeting_date"], fields["pre_bid_meeting_address"])
+
+def get_critical_dates(bot, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["published_date"], fields["bid_submission_end_date"]
 
 def save_to_excel(data_list, idx):
     headers = (["Bid User", "Tender ID", "Name of Work", "Tender Category", "Department", "Quantity", "EMD", "Exemption", 
@@ -283,16 +194,9 @@ def get_all_detail(bot, tender_links):
         bot.switch_to.window(bot.window_handles[1])
         try:
             WebDriverWait(bot, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "page_content")))
-            organisation_chain, _, tender_id, _, tender_category = get_basic_details(bot)
-            _, _, exepm_allowed = get_fee_details(bot)
-            emd_amout, _, emd_exepm_allowed = get_emd_details(bot)
-            title, word_desc, tander_value_in, location, pincode, _, _ = get_work_details(bot)
-            published_date, bid_sub_end_date = get_critical_dates(bot)
-            all_detail.append([
-                '', tender_id, word_desc, tender_category, organisation_chain, '',
-                emd_amout, emd_exepm_allowed, tander_value_in, '', location, 'Online',
-                '', '', bid_sub_end_date, pincode, ''
-            ])
+            # One execute_script for the whole caption -> value map
+            fields = extract_detail_fields(bot)
+            all_detail.append(build_tender_row(fields, ''))
         except Exception as e:
             print(f"[ERROR] Skipping tender due to error: {e}")
         finally:
@@ -324,55 +228,8 @@ def solve_captcha_2captcha(api_key, image_path):
 # Modify run_eproc_scraper_api to use 2Captcha if captcha is 'auto'
 def run_eproc_scraper_api(base_url, tender_type, days_interval, start_page, captcha=None):
     global FILE_NAME
-    options = Options()
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
-    prefs = {"download_restrictions": 3}
-    options.add_experimental_option("prefs", prefs)
-    
-    PATH = BASE_DIR + "\\scrapers\\edgedriver_win64\\msedgedriver.exe"
-    
-    # Check if driver file exists
-    if not os.path.exists(PATH):
-        raise Exception(f"Edge driver not found at: {PATH}")
-    
-    # Try different service configurations
-    try:
-        # Method 1: With service
-        servicee = Service(executable_path=PATH)
-        bot = webdriver.Edge(service=servicee, options=options)
-    except Exception as e1:
-        print(f"[SCRAPER] Method 1 failed: {e1}")
-        try:
-            # Method 2: Without service (let Selenium find driver)
-            bot = webdriver.Edge(options=options)
-        except Exception as e2:
-            print(f"[SCRAPER] Method 2 failed: {e2}")
-            try:
-                # Method 3: With service and log_path
-                servicee = Service(executable_path=PATH, log_path="edge_driver.log")
-                bot = webdriver.Edge(service=servicee, options=options)
-            except Exception as e3:
-                print(f"[SCRAPER] Method 3 failed: {e3}")
-                # Method 4: Try with Chrome driver as fallback
-                try:
-                    from selenium.webdriver.chrome.service import Service as ChromeService
-                    from selenium.webdriver.chrome.options import Options as ChromeOptions
-                    chrome_options = ChromeOptions()
-                    chrome_options.add_argument('--disable-gpu')
-                    chrome_options.add_argument('--no-sandbox')
-                    chrome_options.add_argument('--disable-dev-shm-usage')
-                    chrome_service = ChromeService(executable_path=PATH.replace('msedgedriver.exe', 'chromedriver.exe'))
-                    bot = webdriver.Chrome(service=chrome_service, options=chrome_options)
-                    print("[SCRAPER] Using Chrome as fallback")
-                except Exception as e4:
-                    print(f"[SCRAPER] All methods failed: {e4}")
-                    raise Exception(f"Could not start browser. Please check Edge driver installation. Error: {str(e1)}")
-    bot.minimize_window()
+    bot = create_driver(prefs={"download_restrictions": 3}, blocking_profile="eproc")
+    minimize(bot)
     URL = f"{base_url}?page=FrontEndAdvancedSearch&service=page"
     bot.get(URL)
     try:
@@ -382,7 +239,7 @@ def run_eproc_scraper_api(base_url, tender_type, days_interval, start_page, capt
     except NoSuchElementException:
         print("Popup not present.")
     print("[BIDALERT INFO] WELCOME ** BID ALERT *** USER :: PAGE LOADED ")    
-    sleep(2)
+    wait_dom_ready(bot, replaces=2)
     try:
         WebDriverWait(bot, TIMEOUT).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
     except Exception as e:
@@ -394,7 +251,7 @@ def run_eproc_scraper_api(base_url, tender_type, days_interval, start_page, capt
         EC.element_to_be_clickable((By.ID, "dateCriteria"))
     )
     bot.execute_script("arguments[0].scrollIntoView(true);", date_criteria)
-    sleep(1)
+    wait_for_element(bot, By.ID, "dateCriteria", "clickable", timeout=1, replaces=1)
     date_criteria.click()
     date_criteria.send_keys("Published Date")
     if (tender_type.lower() == 'o'):
@@ -450,13 +307,7 @@ def run_eproc_scraper_api(base_url, tender_type, days_interval, start_page, capt
     print(f"[BIDALERT INFO] FOUND {total_pages} PAGES TO SCRAPE")
     start_page = int(start_page)
     
-    # Try to maximize window safely, but don't fail if it doesn't work
-    try:
-        bot.maximize_window()
-        print("[DEBUG] Window maximized successfully")
-    except Exception as e:
-        print(f"[WARNING] Could not maximize window: {e}")
-        # Continue without maximizing
+    maximize(bot)
     for idx in range(start_page, total_pages + 1):
         all_detail = []
         print(f"[BIDALERT INFO] SCRAPING PAGE [{idx}/{total_pages}]")
@@ -481,8 +332,9 @@ def run_eproc_scraper_api(base_url, tender_type, days_interval, start_page, capt
         # GOING TO NEXT PAGE
         next_page_url = f"{base_url}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp={idx+1}"
         bot.get(next_page_url)
-        sleep(2)
+        wait_for_element(bot, By.ID, "table", timeout=TIMEOUT, replaces=2)
     print("E-PROC SCRAPING COMPLETED")
+    log_wait_stats()
     bot.quit()
     print("[BIDALERT INFO] Edge browser closed after scraping.")
 
@@ -519,19 +371,11 @@ def get_captcha():
         data = request.get_json() or {}
         # url = data.get('url', 'https://mahatenders.gov.in/nicgep/app?page=FrontEndAdvancedSearch&service=page')
         
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        
-        PATH = BASE_DIR + "\\scrapers\\edgedriver_win64\\msedgedriver.exe"
-        servicee = Service(executable_path=PATH)
-        bot = webdriver.Edge(service=servicee, options=options)
+        bot = create_driver(headless=True)
         
         try:
             bot.get(url)
-            sleep(3)
+            wait_dom_ready(bot, replaces=3)
             
             # Wait for captcha to be available
             WebDriverWait(bot, TIMEOUT).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
@@ -566,88 +410,28 @@ def open_edge():
         url = f"{url}?page=FrontEndAdvancedSearch&service=page"
     
     try:
-        options = Options()
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-plugins')
-        options.add_argument('--disable-images')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        prefs = {"download_restrictions": 3}
-        options.add_experimental_option("prefs", prefs)
-        
-        PATH = BASE_DIR + "\\scrapers\\edgedriver_win64\\msedgedriver.exe"
-        
-        # Check if driver file exists
-        if not os.path.exists(PATH):
-            return {"status": "error", "message": f"Edge driver not found at: {PATH}"}, 500
-        
-        print(f"[OPEN EDGE] Attempting to open Edge at {url} with driver {PATH}")
-        
-        # Try different service configurations
-        bot = None
-        last_error = None
-        
-        # Method 1: With service and verbose logging
+        governor.admit()
+    except SessionRejected as e:
+        return {"status": "error", "message": str(e)}, 429
+    registered = False
+    try:
+        print(f"[OPEN EDGE] Attempting to open browser at {url}")
         try:
-            print("[OPEN EDGE] Trying Method 1: With service and verbose logging")
-            servicee = Service(executable_path=PATH, log_path="edge_driver.log", log_output=subprocess.STDOUT)
-            bot = webdriver.Edge(service=servicee, options=options)
-            print("[OPEN EDGE] Method 1 succeeded!")
-        except Exception as e1:
-            last_error = e1
-            print(f"[OPEN EDGE] Method 1 failed: {e1}")
-            
-            # Method 2: Without service (let Selenium find driver)
-            try:
-                print("[OPEN EDGE] Trying Method 2: Without service")
-                bot = webdriver.Edge(options=options)
-                print("[OPEN EDGE] Method 2 succeeded!")
-            except Exception as e2:
-                last_error = e2
-                print(f"[OPEN EDGE] Method 2 failed: {e2}")
-                
-                # Method 3: With minimal options
-                try:
-                    print("[OPEN EDGE] Trying Method 3: With minimal options")
-                    minimal_options = Options()
-                    minimal_options.add_argument('--disable-gpu')
-                    servicee = Service(executable_path=PATH)
-                    bot = webdriver.Edge(service=servicee, options=minimal_options)
-                    print("[OPEN EDGE] Method 3 succeeded!")
-                except Exception as e3:
-                    last_error = e3
-                    print(f"[OPEN EDGE] Method 3 failed: {e3}")
-                    
-                    # Method 4: Try with Chrome driver as fallback
-                    try:
-                        print("[OPEN EDGE] Trying Method 4: Chrome as fallback")
-                        from selenium.webdriver.chrome.service import Service as ChromeService
-                        from selenium.webdriver.chrome.options import Options as ChromeOptions
-                        chrome_options = ChromeOptions()
-                        chrome_options.add_argument('--disable-gpu')
-                        chrome_options.add_argument('--no-sandbox')
-                        chrome_options.add_argument('--disable-dev-shm-usage')
-                        chrome_service = ChromeService(executable_path=PATH.replace('msedgedriver.exe', 'chromedriver.exe'))
-                        bot = webdriver.Chrome(service=chrome_service, options=chrome_options)
-                        print("[OPEN EDGE] Method 4 succeeded - Using Chrome as fallback")
-                    except Exception as e4:
-                        last_error = e4
-                        print(f"[OPEN EDGE] Method 4 failed: {e4}")
-        
-        if bot is None:
-            error_msg = f"Could not start browser. All methods failed. Last error: {str(last_error)}"
+            # Edge first, Chrome as fallback, headless on Linux servers
+            bot = create_driver(arguments=["--disable-plugins"], prefs={"download_restrictions": 3},
+                                blocking_profile="eproc")
+        except Exception as e:
+            error_msg = f"Could not start browser. {e}"
             print(f"[OPEN EDGE ERROR] {error_msg}")
             return {"status": "error", "message": error_msg}, 500
         
         try:
-            bot.minimize_window()
+            minimize(bot)
             bot.get(url)
             session_id = str(uuid.uuid4())
             pending_eproc_sessions[session_id] = {'bot': bot}
+            governor.register(session_id, bot, close=lambda: close_pending_session(session_id, bot), label=url)
+            registered = True
             print(f"[OPEN EDGE] Edge opened successfully, session_id: {session_id}")
             return {"status": "success", "session_id": session_id}, 200
         except Exception as e:
@@ -657,6 +441,13 @@ def open_edge():
     except Exception as e:
         print(f"[OPEN EDGE ERROR] {e}")
         return {"status": "error", "message": str(e)}, 500
+    finally:
+        if not registered:
+            governor.cancel()
+
+@app.route('/api/session-stats', methods=['GET'])
+def session_stats():
+    return jsonify(governor.stats())
 
 @app.route('/api/start-eproc-session', methods=['POST'])
 def start_eproc_session():
@@ -669,6 +460,7 @@ def start_eproc_session():
     session = pending_eproc_sessions.pop(session_id, None)
     if not session:
         return {"status": "error", "message": "Session not found or expired."}, 404
+    governor.set_busy(session_id, True)
     bot = session['bot']
     tender_type = data['tender_type']
     days_interval = data['days_interval']
@@ -679,7 +471,7 @@ def start_eproc_session():
             EC.element_to_be_clickable((By.ID, "dateCriteria"))
         )
         bot.execute_script("arguments[0].scrollIntoView(true);", date_criteria)
-        sleep(1)
+        wait_for_element(bot, By.ID, "dateCriteria", "clickable", timeout=1, replaces=1)
         date_criteria.click()
         date_criteria.send_keys("Published Date")
         if (tender_type.lower() == 'o'):
@@ -726,13 +518,7 @@ def start_eproc_session():
         print(f"[BIDALERT INFO] FOUND {total_pages} PAGES TO SCRAPE")
         start_page = int(start_page)
         
-        # Try to maximize window safely, but don't fail if it doesn't work
-        try:
-            bot.maximize_window()
-            print("[DEBUG] Window maximized successfully")
-        except Exception as e:
-            print(f"[WARNING] Could not maximize window: {e}")
-            # Continue without maximizing
+        maximize(bot)
         for idx in range(start_page, total_pages + 1):
             all_detail = []
             print(f"[BIDALERT INFO] SCRAPING PAGE [{idx}/{total_pages}]")
@@ -757,15 +543,16 @@ def start_eproc_session():
             # GOING TO NEXT PAGE
             next_page_url = f"{data['base_url']}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp={idx+1}"
             bot.get(next_page_url)
-            sleep(2)
+            wait_for_element(bot, By.ID, "table", timeout=TIMEOUT, replaces=2)
         print("E-PROC SCRAPING COMPLETED")
-        bot.quit()
+        log_wait_stats()
+        governor.release(session_id)
         print("[BIDALERT INFO] Edge browser closed after scraping.")
         return {"status": "success", "message": "Scraping started and completed."}, 200
     except Exception as e:
         print(f"[ERROR] Exception in start_eproc_session: {e}")
         bot.save_screenshot("error_start_eproc_session.png")
-        bot.quit()
+        governor.release(session_id)
         return {"status": "error", "message": str(e)}, 500
 
 @app.route('/api/submit-eproc-captcha', methods=['POST'])
@@ -781,6 +568,7 @@ def submit_eproc_captcha():
     session = pending_eproc_sessions.pop(session_id, None)
     if not session:
         return {"status": "error", "message": "Session not found or expired."}, 404
+    governor.set_busy(session_id, True)
     bot = session['bot']
     base_url = session['base_url'] # This will be None, but the new logic doesn't use it for the bot
     try:
@@ -823,10 +611,10 @@ def submit_eproc_captcha():
         # 4. Enter captcha
         bot.find_element(By.ID, "captchaText").clear()
         bot.find_element(By.ID, "captchaText").send_keys(captcha)
-        sleep(2)
+        wait_for_value(bot, By.ID, "captchaText", captcha, timeout=2, replaces=2)
         # 5. Click Search
         bot.find_element(By.XPATH, "//input[@title='Search']").click()
-        sleep(3)
+        wait_until(bot, captcha_result_shown, timeout=TIMEOUT, name="captcha result", replaces=3)
         # Continue with scraping as before
         try:
             list_footer = bot.find_element(By.CLASS_NAME, "list_footer")
@@ -839,13 +627,7 @@ def submit_eproc_captcha():
         print(f"[BIDALERT INFO] FOUND {total_pages} PAGES TO SCRAPE")
         start_page = int(start_page)
         
-        # Try to maximize window safely, but don't fail if it doesn't work
-        try:
-            bot.maximize_window()
-            print("[DEBUG] Window maximized successfully")
-        except Exception as e:
-            print(f"[WARNING] Could not maximize window: {e}")
-            # Continue without maximizing
+        maximize(bot)
         for idx in range(start_page, total_pages + 1):
             all_detail = []
             print(f"[BIDALERT INFO] SCRAPING PAGE [{idx}/{total_pages}]")
@@ -869,15 +651,16 @@ def submit_eproc_captcha():
             print("-" * 300)
             next_page_url = f"{base_url}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp={idx+1}"
             bot.get(next_page_url)
-            sleep(2)
+            wait_for_element(bot, By.ID, "table", timeout=TIMEOUT, replaces=2)
         print("E-PROC SCRAPING COMPLETED")
-        bot.quit()
+        log_wait_stats()
+        governor.release(session_id)
         print("[BIDALERT INFO] Edge browser closed after scraping.")
         return {"status": "success", "message": "Scraping completed."}, 200
     except Exception as e:
         print(f"[ERROR] Exception in submit_eproc_captcha: {e}")
         bot.save_screenshot("error_submit_captcha.png")
-        bot.quit()
+        governor.release(session_id)
         return {"status": "error", "message": str(e)}, 500
 
 @socketio.on('start_eproc_scraping')
@@ -2,9 +2,6 @@ from fastapi import FastAPI, Query, Body, WebSocket, WebSocketDisconnect, Reques
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
@@ -13,8 +10,13 @@ from uuid import uuid4
 from threading import Lock
 from .search import run_eproc_scraper
 from . import ireps
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.chrome.service import Service as ChromeService
+from .browser_pool import get_pool, pool_stats
+from .resource_blocking import blocking_stats
+from .driver_factory import create_driver, find_driver, IS_WINDOWS
+from .remote_pool import pin_session, unpin_session, node_stats
+from .session_governor import governor, SessionRejected
+from .output_sink import list_outputs, resolve_output, remove_output, output_exists
+from .merge_engine import merge_outputs, iter_merged
 import shutil
 from datetime import datetime
 import asyncio
@@ -93,23 +95,60 @@ async def websocket_logs(websocket: WebSocket):
 # Example usage: await log_manager.send_log("Scraping started...")
 # In your scraping logic, call this to send logs to the frontend.
 
-# In-memory session management
+# In-memory session management: session_id -> BrowserLease (eproc)
+# or {"lease": BrowserLease, ...} (ireps)
 sessions = {}
 sessions_lock = Lock()
 
+def make_eproc_edge():
+    print("[DEBUG] Attempting to launch Edge browser...")
+    return create_driver("edge", prefs={"download_restrictions": 3}, blocking_profile="eproc")
+
+def make_ireps_chrome():
+    print("[DEBUG] Launching Chrome browser...")
+    # --disable-images is not a Chrome switch, images are blocked over CDP instead
+    return create_driver("chrome", arguments=["--disable-plugins"], blocking_profile="ireps")
+
+def release_session(session):
+    """Give a session's browser back to its pool."""
+    lease = session.get("lease") if isinstance(session, dict) else session
+    if lease is not None:
+        lease.release()
+
+def close_session(session_id):
+    """Governor close hook: forget the session and free its browser."""
+    with sessions_lock:
+        session = sessions.pop(session_id, None)
+    unpin_session(session_id)
+    if session is None:
+        return
+    if isinstance(session, dict):
+        # Let a running IREPS thread stop before its browser goes away
+        session["stop_flag"] = True
+    release_session(session)
+
+@app.get("/browser-pool")
+def browser_pool_stats():
+    return {"pools": pool_stats(), "blocking": blocking_stats()}
+
+@app.get("/sessions/stats")
+def session_stats():
+    return governor.stats()
+
+@app.get("/webdriver-nodes")
+def webdriver_nodes():
+    return node_stats()
+
 @app.post("/test-edge-launch")
 def test_edge_launch():
-    options = Options()
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    PATH = os.path.join(BASE_DIR, "edgedriver_win64", "msedgedriver.exe")
+    PATH = find_driver("edge")
     print(f"[DEBUG] Checking for EdgeDriver at: {PATH}")
-    if not os.path.exists(PATH):
-        print(f"[ERROR] EdgeDriver not found at {PATH}")
-        return JSONResponse(status_code=500, content={"error": f"EdgeDriver not found at {PATH}"})
+    if IS_WINDOWS and PATH is None:
+        print("[ERROR] EdgeDriver not found")
+        return JSONResponse(status_code=500, content={"error": "EdgeDriver not found"})
     try:
         print("[DEBUG] Attempting to launch Edge browser for test...")
-        servicee = Service(executable_path=PATH)
-        bot = webdriver.Edge(service=servicee, options=options)
+        bot = create_driver("edge")
         print("[DEBUG] Edge browser should be opening now (test)...")
         bot.get("https://www.google.com")
         print("[DEBUG] Edge browser navigated to Google (test).")
@@ -125,27 +164,25 @@ def start_scraping(
     days_interval: int = Query(...),
     start_page: int = Query(...),
 ):
-    # Start Selenium, open Edge, navigate to URL, return session_id
-    options = Options()
-    prefs = {"download_restrictions": 3}
-    options.add_experimental_option("prefs", prefs)
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    PATH = os.path.join(BASE_DIR, "edgedriver_win64", "msedgedriver.exe")
-    print(f"[DEBUG] Checking for EdgeDriver at: {PATH}")
-    if not os.path.exists(PATH):
-        print(f"[ERROR] EdgeDriver not found at {PATH}")
-    else:
-        print(f"[DEBUG] EdgeDriver found at {PATH}")
-    print("[DEBUG] Attempting to launch Edge browser...")
-    servicee = Service(executable_path=PATH)
-    bot = webdriver.Edge(service=servicee, options=options)
-    print("[DEBUG] Edge browser should be opening now...")
-    bot.get(base_url + "?page=FrontEndAdvancedSearch&service=page")
-    print("[DEBUG] Edge browser navigated to URL.")
+    # Lease a warm Edge from the pool, navigate to URL, return session_id
+    try:
+        governor.admit()
+    except SessionRejected as e:
+        return JSONResponse(status_code=429, content={"error": str(e)})
+    try:
+        lease = get_pool("eproc-edge", make_eproc_edge).lease()
+        print("[DEBUG] Edge browser leased from pool...")
+        lease.driver.get(base_url + "?page=FrontEndAdvancedSearch&service=page")
+        print("[DEBUG] Edge browser navigated to URL.")
+    except Exception:
+        governor.cancel()
+        raise
     # Optionally handle popups here
     session_id = str(uuid4())
     with sessions_lock:
-        sessions[session_id] = bot
+        sessions[session_id] = lease
+    pin_session(session_id, lease.driver)
+    governor.register(session_id, lease.driver, close=lambda: close_session(session_id), label=base_url)
     return {"session_id": session_id}
 
 @app.post("/submit-captcha")
@@ -155,9 +192,11 @@ def submit_captcha(
 ):
     # Use Selenium to enter captcha and continue scraping
     with sessions_lock:
-        bot = sessions.get(session_id)
-    if not bot:
+        lease = sessions.get(session_id)
+    if not lease:
         return JSONResponse(status_code=404, content={"error": "Session not found"})
+    governor.touch(session_id)
+    bot = lease.driver
     try:
         WebDriverWait(bot, 10).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
         bot.find_element(By.ID, "captchaText").send_keys(captcha_value)
@@ -209,54 +248,48 @@ def scrape(
 def ireps_open_edge(name: str = Body(...), starting_page: int = Body(...)):
     # Always open Chrome for IREPS
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    CHROME_PATH = os.path.join(BASE_DIR, "edgedriver_win64", "chromedriver.exe")
+    CHROME_PATH = find_driver("chrome")
     browser = None
+    admitted = False
     try:
         print(f"[DEBUG] Checking for ChromeDriver at: {CHROME_PATH}")
-        if not os.path.exists(CHROME_PATH):
-            print(f"[ERROR] ChromeDriver not found at {CHROME_PATH}")
+        # Off Windows Selenium Manager can still provide a driver
+        if IS_WINDOWS and CHROME_PATH is None:
+            print(f"[ERROR] ChromeDriver not found in {BASE_DIR}")
             return JSONResponse(
                 status_code=500, 
                 content={
-                    "error": f"Chrome WebDriver not found at {CHROME_PATH}",
-                    "path": CHROME_PATH,
+                    "error": f"Chrome WebDriver not found in {BASE_DIR}",
                     "base_dir": BASE_DIR,
                     "files_in_dir": os.listdir(BASE_DIR) if os.path.exists(BASE_DIR) else "Directory not found"
                 }
             )
         
-        print("[DEBUG] ChromeDriver found, creating Chrome options...")
-        options = ChromeOptions()
-        # Add some common options to avoid issues
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-plugins")
-        options.add_argument("--disable-images")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        print("[DEBUG] Creating Chrome service...")
-        servicec = ChromeService(executable_path=CHROME_PATH)
-        
-        print("[DEBUG] Launching Chrome browser...")
-        bot = webdriver.Chrome(service=servicec, options=options)
+        try:
+            governor.admit()
+        except SessionRejected as e:
+            return JSONResponse(status_code=429, content={"error": str(e)})
+        admitted = True
+        lease = get_pool("ireps-chrome", make_ireps_chrome).lease()
         
-        print("[DEBUG] Chrome browser launched, navigating to IREPS...")
-        bot.get("https://www.ireps.gov.in/epsn/guestLogin.do")
+        print("[DEBUG] Chrome browser leased from pool, navigating to IREPS...")
+        lease.driver.get("https://www.ireps.gov.in/epsn/guestLogin.do")
         
         print("[DEBUG] Successfully navigated to IREPS website")
         browser = "chrome"
         
         session_id = str(uuid4())
         with sessions_lock:
-            sessions[session_id] = {"bot": bot, "name": name, "starting_page": starting_page}
+            sessions[session_id] = {"lease": lease, "name": name, "starting_page": starting_page}
+        pin_session(session_id, lease.driver)
+        governor.register(session_id, lease.driver, close=lambda: close_session(session_id), label=f"ireps {name}")
         
         print(f"[DEBUG] Session created with ID: {session_id}")
         return {"session_id": session_id, "browser": browser}
         
     except Exception as e:
+        if admitted:
+            governor.cancel()
         print(f"[ERROR] Failed to open Chrome: {e}")
         import traceback
         traceback.print_exc()
@@ -280,7 +313,7 @@ async def ireps_start_scraping(request: Request):
             print(f"[ERROR] Session {session_id} not found")
             return JSONResponse(status_code=404, content={"error": "Session not found"})
         
-        bot = session["bot"]
+        bot = session["lease"].driver
         # Use name and starting_page from request, fallback to session if not provided
         name = name or session.get("name")
         starting_page = starting_page or session.get("starting_page")
@@ -304,6 +337,8 @@ async def ireps_start_scraping(request: Request):
                 traceback.print_exc()
         
         def run_scraper():
+            # Never reap a session while it is scraping
+            governor.set_busy(session_id, True)
             try:
                 print(f"[DEBUG] Starting scraper thread for session {session_id}")
                 log_callback("[IREPS] Scraping started...")
@@ -323,6 +358,8 @@ async def ireps_start_scraping(request: Request):
                 import traceback
                 traceback.print_exc()
                 log_callback(f"[ERROR] Scraping failed: {str(e)}")
+            finally:
+                governor.set_busy(session_id, False)
         
         import threading
         thread = threading.Thread(target=run_scraper)
@@ -356,9 +393,7 @@ async def ireps_start_scraping(request: Request):
 def delete_file(session_id: str = Body(...), filename: str = Body(...)):
     BASEDIR = os.path.dirname(os.path.abspath(__file__))
     OUTPUTDIR = os.path.join(BASEDIR, "ireps", session_id)
-    file_path = os.path.join(OUTPUTDIR, filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    if remove_output(OUTPUTDIR, filename):
         return {"status": "deleted"}
     return JSONResponse(status_code=404, content={"error": "File not found"})
 
@@ -374,48 +409,22 @@ def merge_files(session_id: str = Body(...)):
             print(f"[ERROR] Output directory not found: {OUTPUTDIR}")
             return JSONResponse(status_code=404, content={"error": "Output directory not found"})
         
-        import pandas as pd
-        import fnmatch
         file_prefix = "tenders_page"
-        filenames = [os.path.join(OUTPUTDIR, filename)
-                     for filename in os.listdir(OUTPUTDIR)
-                     if fnmatch.fnmatch(filename, f"{file_prefix}*.xlsx")]
+        filenames = list(list_outputs(OUTPUTDIR, f"{file_prefix}*.xlsx").values())
         print(f"[DEBUG] Files to merge: {filenames}")
         
         if not filenames:
             print("[ERROR] No files found to merge")
             return JSONResponse(status_code=400, content={"error": "No Excel files found to merge"})
         
-        if len(filenames) == 1:
-            print(f"[DEBUG] Only one file found, returning it as merged file: {filenames[0]}")
-            from fastapi.responses import FileResponse
-            return FileResponse(
-                filenames[0], 
-                filename=f"merged_data_{session_id}.csv",
-                media_type='text/csv'
-            )
-        
-        dataframes = []
-        for file_path in filenames:
-            try:
-                print(f"[DEBUG] Reading file: {os.path.basename(file_path)}")
-                df = pd.read_excel(file_path, engine='openpyxl')
-                print(f"[DEBUG] DataFrame shape: {df.shape}")
-                dataframes.append(df)
-            except Exception as e:
-                print(f"[ERROR] Error reading {file_path}: {e}")
-                continue
+        output_csv_file = os.path.join(OUTPUTDIR, f"merged_data_{session_id}.csv")
+        result = merge_outputs(filenames, output_csv_file, read_kwargs={"engine": "openpyxl"})
         
-        if not dataframes:
+        if not result["merged"]:
             print("[ERROR] No valid dataframes to merge after filtering unreadable files.")
             return JSONResponse(status_code=400, content={"error": "No valid Excel files could be read. Check file format and content."})
         
-        print(f"[DEBUG] Merging {len(dataframes)} dataframes")
-        merged_df = pd.concat(dataframes, ignore_index=True)
-        print(f"[DEBUG] Merged DataFrame shape: {merged_df.shape}")
-        
-        output_csv_file = os.path.join(OUTPUTDIR, f"merged_data_{session_id}.csv")
-        merged_df.to_csv(output_csv_file, index=False)
+        print(f"[DEBUG] Merged {result['merged']} files, {result['rows']} rows")
         print(f"[DEBUG] Merged CSV file saved to: {output_csv_file}")
         
         from fastapi.responses import FileResponse
@@ -433,32 +442,19 @@ def merge_files(session_id: str = Body(...)):
 
 @app.post("/ireps/kmerge-files")
 def kmerge_files(session_id: str = Body(...)):
-    import pandas as pd
-    import fnmatch
     BASEDIR = os.path.dirname(os.path.abspath(__file__))
     OUTPUTDIR = os.path.join(BASEDIR, "ireps", session_id)
     file_prefix = "tenders_page"
-    filenames = [os.path.join(OUTPUTDIR, filename)
-                 for filename in os.listdir(OUTPUTDIR)
-                 if fnmatch.fnmatch(filename, f"{file_prefix}*.xlsx")]
-    dataframes = []
-    for file_path in filenames:
-        try:
-            df = pd.read_excel(file_path, engine='openpyxl')
-            # Filter for Karnataka rows (case-insensitive, any column containing 'karnataka')
-            mask = df.apply(lambda row: row.astype(str).str.contains('karnataka', case=False, na=False).any(), axis=1)
-            karnataka_df = df[mask]
-            if not karnataka_df.empty:
-                dataframes.append(karnataka_df)
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-    if dataframes:
-        merged_df = pd.concat(dataframes, ignore_index=True)
-        output_csv_file = os.path.join(OUTPUTDIR, f"karnataka_merged_{session_id}.csv")
-        merged_df.to_csv(output_csv_file, index=False)
+    filenames = list(list_outputs(OUTPUTDIR, f"{file_prefix}*.xlsx").values())
+    output_csv_file = os.path.join(OUTPUTDIR, f"karnataka_merged_{session_id}.csv")
+    # Filter for Karnataka rows (case-insensitive, any column containing 'karnataka')
+    result = merge_outputs(filenames, output_csv_file, spec={"contains": "karnataka"},
+                           read_kwargs={"engine": "openpyxl"})
+    if result["rows"]:
         from fastapi.responses import FileResponse
         return FileResponse(output_csv_file, filename=f"karnataka_merged_{session_id}.csv", media_type='text/csv')
     else:
+        os.remove(output_csv_file)
         return JSONResponse(status_code=400, content={"error": "No Karnataka data found to merge."})
 
 @app.post("/ireps/stop-session")
@@ -484,17 +480,11 @@ def stop_session(session_id: str = Body(...)):
                     if thread.is_alive():
                         print(f"[WARNING] Scraping thread did not stop within timeout")
             
-            # Close browser
-            if 'bot' in session:
-                try:
-                    print(f"[DEBUG] Closing browser for session: {session_id}")
-                    session['bot'].quit()
-                    print(f"[DEBUG] Browser closed for session: {session_id}")
-                except Exception as e:
-                    print(f"[ERROR] Error closing browser: {e}")
-            
-            # Remove session from memory
-            sessions.pop(session_id, None)
+            # Return browser to the pool and remove session from memory
+            print(f"[DEBUG] Releasing browser for session: {session_id}")
+            if not governor.release(session_id):
+                close_session(session_id)
+            print(f"[DEBUG] Browser released for session: {session_id}")
         
         print(f"[DEBUG] Session {session_id} stopped successfully")
         return {"status": "stopped", "session_id": session_id}
@@ -519,7 +509,8 @@ def ireps_list_files(session_id: str = Query(...)):
     all_files = os.listdir(OUTPUTDIR)
     print(f"[DEBUG] All files in directory: {all_files}")
     
-    files = [f for f in all_files if f.endswith(".xlsx")]
+    # Sinks are listed under the workbook name they download as
+    files = list(list_outputs(OUTPUTDIR))
     print(f"[DEBUG] Excel files found: {files}")
     
     result = {"files": files}
@@ -531,18 +522,17 @@ def ireps_download_file(session_id: str, filename: str, request: Request):
     print(f"[DEBUG] IREPS download request: {request.method} for {session_id}/{filename}")
     BASEDIR = os.path.dirname(os.path.abspath(__file__))
     OUTPUTDIR = os.path.join(BASEDIR, "ireps", session_id)
-    file_path = os.path.join(OUTPUTDIR, filename)
-    if not os.path.exists(file_path):
-        print(f"[ERROR] File not found: {file_path}")
+    if not output_exists(OUTPUTDIR, filename):
+        print(f"[ERROR] File not found: {os.path.join(OUTPUTDIR, filename)}")
         return JSONResponse(status_code=404, content={"error": "File not found"})
+    # Builds the workbook from its sink on first download
+    file_path = resolve_output(OUTPUTDIR, filename)
     print(f"[DEBUG] Serving file: {file_path}")
     return FileResponse(file_path, filename=filename)
 
 @app.get("/ireps/merge-download/{session_id}")
 def ireps_merge_download(session_id: str):
     """GEM-style merge and download endpoint for IREPS, with DB insert"""
-    import pandas as pd
-    import fnmatch
     import pymysql
     try:
         BASEDIR = os.path.dirname(os.path.abspath(__file__))
@@ -551,33 +541,11 @@ def ireps_merge_download(session_id: str):
             print(f"[ERROR] Output directory not found: {OUTPUTDIR}")
             return JSONResponse(status_code=400, content={"error": "Output directory not found"})
         file_prefix = "tenders_page"
-        filenames = [os.path.join(OUTPUTDIR, filename)
-                     for filename in os.listdir(OUTPUTDIR)
-                     if fnmatch.fnmatch(filename, f"{file_prefix}*.xlsx")]
+        filenames = list(list_outputs(OUTPUTDIR, f"{file_prefix}*.xlsx").values())
         print(f"[DEBUG] Files to merge: {filenames}")
         if not filenames:
             print("[ERROR] No files found to merge")
             return JSONResponse(status_code=400, content={"error": "No Excel files found to merge"})
-        dataframes = []
-        for file_path in filenames:
-            try:
-                print(f"[DEBUG] Reading file: {os.path.basename(file_path)}")
-                df = pd.read_excel(file_path, engine='openpyxl')
-                print(f"[DEBUG] DataFrame shape: {df.shape}")
-                dataframes.append(df)
-            except Exception as e:
-                print(f"[ERROR] Error reading {file_path}: {e}")
-                continue
-        if not dataframes:
-            print("[ERROR] No valid dataframes to merge after filtering unreadable files.")
-            return JSONResponse(status_code=400, content={"error": "No valid Excel files could be read. Check file format and content."})
-        print(f"[DEBUG] Merging {len(dataframes)} dataframes")
-        merged_df = pd.concat(dataframes, ignore_index=True)
-        print(f"[DEBUG] Merged DataFrame shape: {merged_df.shape}")
-        # Remove rows where all values are null
-        merged_df = merged_df.dropna(how='all')
-        # Remove duplicate rows
-        merged_df = merged_df.drop_duplicates()
         # Rename columns to match existing MySQL `tender` table structure
         column_rename_map = {
             'Deptt./Rly. Unit': 'department',
@@ -587,28 +555,31 @@ def ireps_merge_download(session_id: str):
             'Due Date/Time': 'closing_date',
             'Website': 'website'  # if present
         }
-        merged_df.rename(columns=column_rename_map, inplace=True)
-
-        # Normalize date format for closing_date to YYYY-MM-DD
-        if 'closing_date' in merged_df.columns:
-            try:
-                merged_df['closing_date'] = merged_df['closing_date'].astype(str).str.slice(0, 10)
-            except Exception:
-                pass
 
         # Keep only columns that exist in `tender` table
         valid_columns = [
             'tender_id', 'name_of_work', 'department', 'location', 'closing_date', 'website'
         ]
-        merged_df = merged_df[[col for col in merged_df.columns if col in valid_columns]]
+        # Empty rows and duplicate rows (as read) are dropped, closing_date cut to YYYY-MM-DD
+        spec = {
+            "rename": column_rename_map,
+            "truncate": {"closing_date": 10},
+            "columns": valid_columns,
+            "dropna_all": True,
+            "dedupe_before": True,
+        }
 
         # Save as CSV (for download)
         output_csv_file = os.path.join(OUTPUTDIR, f"merged_data_{session_id}.csv")
-        merged_df.to_csv(output_csv_file, index=False)
+        result = merge_outputs(filenames, output_csv_file, spec=spec, read_kwargs={"engine": "openpyxl"})
+        if not result["merged"]:
+            print("[ERROR] No valid dataframes to merge after filtering unreadable files.")
+            return JSONResponse(status_code=400, content={"error": "No valid Excel files could be read. Check file format and content."})
+        print(f"[DEBUG] Merged {result['merged']} files, {result['rows']} rows")
         print(f"[DEBUG] Merged CSV file saved to: {output_csv_file}")
         
         # Insert into MySQL tender table (AWS) with existing columns only
-        if not merged_df.empty:
+        if result["rows"] and result["columns"]:
             try:
                 connection = pymysql.connect(
                     host='54.149.111.114',
@@ -621,13 +592,13 @@ def ireps_merge_download(session_id: str):
                 )
                 with connection:
                     with connection.cursor() as cursor:
-                        cols = ','.join(f'`{col}`' for col in merged_df.columns)
-                        placeholders = ','.join(['%s'] * len(merged_df.columns))
+                        cols = ','.join(f'`{col}`' for col in result["columns"])
+                        placeholders = ','.join(['%s'] * len(result["columns"]))
                         sql = f'INSERT INTO tender ({cols}) VALUES ({placeholders})'
-                        for row in merged_df.itertuples(index=False, name=None):
-                            cursor.execute(sql, row)
+                        for chunk in iter_merged(result):
+                            cursor.executemany(sql, list(chunk.itertuples(index=False, name=None)))
                     connection.commit()
-                    print(f"[SUCCESS] Inserted {len(merged_df)} rows into tender table (AWS)")
+                    print(f"[SUCCESS] Inserted {result['rows']} rows into tender table (AWS)")
             except Exception as e:
                 print(f"[ERROR] Failed to insert merged data into tender (AWS): {e}")
         
@@ -0,0 +1,289 @@
+"""
+Warm Selenium browser pool.
+
+Launching Edge/Chrome costs several seconds and a few hundred MB per request.
+A BrowserPool keeps pre-launched drivers around and leases them out:
+
+    pool = get_pool("eproc-edge", make_edge)
+    lease = pool.lease()
+    bot = lease.driver
+    ...
+    lease.release()          # reset and back into the pool
+
+On return a driver is reset (extra windows closed, cookies and storage
+cleared, about:blank). It is recycled (quit and replaced) after
+BROWSER_MAX_USES leases or when its process tree uses more than
+BROWSER_MAX_RSS_MB.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    print("[WARNING] psutil not installed, browser memory recycling disabled")
+    psutil = None
+
+POOL_WARM_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "1"))
+POOL_MAX_SIZE = int(os.environ.get("BROWSER_POOL_MAX", "5"))
+MAX_USES = int(os.environ.get("BROWSER_MAX_USES", "20"))
+MAX_RSS_MB = int(os.environ.get("BROWSER_MAX_RSS_MB", "1024"))
+LEASE_TIMEOUT = 120
+
+
+def driver_rss_mb(driver):
+    """Resident memory of the driver process and its browser children, in MB."""
+    if psutil is None:
+        return 0
+    try:
+        proc = psutil.Process(driver.service.process.pid)
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+    except Exception:
+        return 0
+
+
+def reset_driver(driver):
+    """Bring a used driver back to a blank single-window state."""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    try:
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+    except Exception:
+        pass
+    driver.delete_all_cookies()
+    if hasattr(driver, "execute_cdp_cmd"):
+        # delete_all_cookies only covers the current domain
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get("about:blank")
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created = time.time()
+
+
+class BrowserLease:
+    """A driver borrowed from a BrowserPool.
+
+    ``quit()`` returns the driver to the pool instead of killing it, so code
+    written for raw drivers can hold a lease unchanged.
+    """
+
+    def __init__(self, pool, entry):
+        self.pool = pool
+        self._entry = entry
+        self.driver = entry.driver
+        self.leased_at = time.time()
+        self.released = False
+
+    def release(self, discard=False):
+        if self.released:
+            return
+        self.released = True
+        self.pool._give_back(self._entry, discard)
+
+    def detach(self):
+        """Hand the driver over for good (e.g. a browser left open for the user)."""
+        if self.released:
+            return self.driver
+        self.released = True
+        self.pool._forget(self._entry)
+        return self.driver
+
+    def quit(self):
+        self.release()
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A driver that blew up mid-lease is not worth resetting
+        self.release(discard=exc_type is not None)
+        return False
+
+
+class BrowserPool:
+    def __init__(self, name, factory, warm_size=POOL_WARM_SIZE, max_size=POOL_MAX_SIZE,
+                 max_uses=MAX_USES, max_rss_mb=MAX_RSS_MB):
+        self.name = name
+        self.factory = factory
+        self.warm_size = warm_size
+        self.max_size = max(max_size, warm_size, 1)
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self._idle = []
+        self._total = 0
+        self._starting = 0
+        self._cond = threading.Condition()
+        self.stats_counters = {"leases": 0, "launches": 0, "recycled": 0, "warm_hits": 0}
+
+    # --- launching -----------------------------------------------------------
+
+    def _launch(self):
+        started = time.time()
+        driver = self.factory()
+        print(f"[INFO] BROWSER POOL {self.name}: launched driver in {time.time() - started:.1f}s")
+        self.stats_counters["launches"] += 1
+        return _PooledDriver(driver)
+
+    def _warm_one(self):
+        try:
+            entry = self._launch()
+        except Exception as e:
+            print(f"[WARNING] BROWSER POOL {self.name}: could not pre-launch driver: {e}")
+            with self._cond:
+                self._starting -= 1
+                self._total -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._starting -= 1
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def warm(self):
+        """Pre-launch drivers in the background until warm_size are idle."""
+        with self._cond:
+            missing = self.warm_size - len(self._idle) - self._starting
+            missing = min(missing, self.max_size - self._total)
+            for _ in range(max(missing, 0)):
+                self._starting += 1
+                self._total += 1
+                threading.Thread(target=self._warm_one, daemon=True).start()
+        return self
+
+    # --- lease / return ----------------------------------------------------
+
+    def lease(self, timeout=LEASE_TIMEOUT):
+        deadline = time.time() + timeout
+        launch = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    self.stats_counters["warm_hits"] += 1
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    launch = True
+                    break
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise RuntimeError(f"No browser available in pool {self.name} after {timeout}s")
+                self._cond.wait(remaining)
+        if launch:
+            try:
+                entry = self._launch()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+        entry.uses += 1
+        self.stats_counters["leases"] += 1
+        # Top the pool back up for the next caller
+        self.warm()
+        return BrowserLease(self, entry)
+
+    def _quit(self, entry):
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            print(f"[WARNING] BROWSER POOL {self.name}: error closing driver: {e}")
+
+    def _give_back(self, entry, discard=False):
+        reason = None
+        if discard:
+            reason = "discarded"
+        elif entry.uses >= self.max_uses:
+            reason = f"{entry.uses} uses"
+        else:
+            rss = driver_rss_mb(entry.driver)
+            if rss > self.max_rss_mb:
+                reason = f"{rss:.0f} MB"
+        if reason is None:
+            try:
+                reset_driver(entry.driver)
+            except Exception as e:
+                reason = f"reset failed ({e})"
+        if reason is not None:
+            print(f"[INFO] BROWSER POOL {self.name}: recycling driver ({reason})")
+            self.stats_counters["recycled"] += 1
+            self._quit(entry)
+            self._forget(entry)
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def _forget(self, entry):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+        self.warm()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "idle": len(self._idle),
+                "total": self._total,
+                "starting": self._starting,
+                "max_size": self.max_size,
+                **self.stats_counters,
+            }
+
+    def shutdown(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for entry in idle:
+            self._quit(entry)
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(name, factory, **kwargs):
+    """Pool registered under ``name``, created (and warmed) on first use."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(name)
+        if pool is None:
+            pool = BrowserPool(name, factory, **kwargs)
+            _POOLS[name] = pool
+            pool.warm()
+        return pool
+
+
+def pool_stats():
+    with _POOLS_LOCK:
+        return [pool.stats() for pool in _POOLS.values()]
+
+
+def shutdown_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.shutdown()
+
+
+# Idle drivers would otherwise outlive a script that used the pool
+atexit.register(shutdown_pools)
@@ -0,0 +1,144 @@
+"""
+Direct paging and bulk extraction for jQuery DataTables grids (AP/TS eProcurement).
+
+Instead of clicking "Next" n times to reach page n and reading every cell
+with its own ``find_element(...).text`` round trip, these drive the grid's
+own API from JavaScript and pull a whole page in one ``execute_script``:
+
+    set_page_length(driver, "pagetable13", 100)
+    goto_page(driver, "pagetable13", 80)        # one draw, not 79 clicks
+    rows = extract_rows(driver, "pagetable13")  # [[{"text", "href"}, ...], ...]
+
+Both the 1.10+ API (``$(t).DataTable()``) and the legacy one
+(``$(t).dataTable().fnPageChange``) are supported. A draw is awaited through
+a one-shot ``draw.dt`` handler, so it works for client-side and server-side
+(ajax) grids alike. Where the API is missing, ``click_next`` falls back to
+the pager's "Next" link.
+"""
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.wait import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+try:
+    from .waits import wait_until
+except ImportError:
+    from waits import wait_until
+
+# Resolves ``table`` (the grid's element id) to its DataTables API, or null
+_API_JS = """
+var id = arguments[0];
+var el = document.getElementById(id) || document.querySelector('table.dataTable');
+var $ = window.jQuery;
+if (!el || !$ || !$.fn.dataTable) { return null; }
+var modern = typeof $.fn.dataTable.Api === 'function';
+var api = modern ? $(el).DataTable() : null;
+var legacy = modern ? null : $(el).dataTable();
+"""
+
+_INFO_JS = _API_JS + """
+if (modern) {
+    var info = api.page.info();
+    return {page: info.page + 1, pages: info.pages, length: info.length, records: info.recordsDisplay};
+}
+var s = legacy.fnSettings();
+var length = s._iDisplayLength;
+var records = s.fnRecordsDisplay();
+return {page: Math.floor(s._iDisplayStart / length) + 1, pages: Math.ceil(records / length),
+        length: length, records: records};
+"""
+
+# Marks the next draw in window.__dtDrawn, then runs ``action``
+_DRAW_JS = _API_JS + """
+var arg = arguments[1];
+window.__dtDrawn = false;
+$(el).one('draw.dt', function () { window.__dtDrawn = true; });
+%s
+return true;
+"""
+
+_GOTO_JS = _DRAW_JS % """
+if (modern) { api.page(arg - 1).draw('page'); }
+else { legacy.fnPageChange(arg - 1); }
+"""
+
+_LENGTH_JS = _DRAW_JS % """
+if (modern) { api.page.len(arg).draw(); }
+else { legacy.fnSettings()._iDisplayLength = arg; legacy.fnDraw(); }
+"""
+
+# Every body row as a list of {text, href} cells, in one call
+_ROWS_JS = """
+var id = arguments[0];
+var el = document.getElementById(id) || document.querySelector('table.dataTable');
+if (!el) { return null; }
+var body = el.tBodies.length ? el.tBodies[0] : el;
+var rows = [];
+for (var i = 0; i < body.rows.length; i++) {
+    var cells = [];
+    var tr = body.rows[i];
+    for (var j = 0; j < tr.cells.length; j++) {
+        var td = tr.cells[j];
+        var a = td.querySelector('a[href]');
+        cells.push({text: (td.innerText || td.textContent || '').trim(), href: a ? a.href : null});
+    }
+    rows.push(cells);
+}
+return rows;
+"""
+
+
+def page_info(driver, table_id):
+    """``{"page", "pages", "length", "records"}`` of the grid (page is
+    1-based), or None when the grid or jQuery DataTables isn't there."""
+    return driver.execute_script(_INFO_JS, table_id)
+
+
+def _draw(driver, script, table_id, arg, timeout, name):
+    if not driver.execute_script(script, table_id, arg):
+        return False
+    return bool(wait_until(driver, lambda d: d.execute_script("return window.__dtDrawn === true;"),
+                           timeout=timeout, name=name))
+
+
+def set_page_length(driver, table_id, length, timeout=30):
+    """Show ``length`` rows per page. False if the grid API isn't available."""
+    info = page_info(driver, table_id)
+    if info is None:
+        return False
+    if info["length"] == length:
+        return True
+    return _draw(driver, _LENGTH_JS, table_id, length, timeout, f"datatable length {length}")
+
+
+def goto_page(driver, table_id, page, timeout=30):
+    """Jump straight to 1-based ``page``. False if the grid API isn't
+    available or the page never drew."""
+    info = page_info(driver, table_id)
+    if info is None:
+        return False
+    if info["page"] == page:
+        return True
+    if not _draw(driver, _GOTO_JS, table_id, page, timeout, f"datatable page {page}"):
+        return False
+    info = page_info(driver, table_id)
+    return bool(info) and info["page"] == page
+
+
+def click_next(driver, timeout=10):
+    """Fallback for grids without the API: click the pager's "Next" link and
+    wait for it to go stale. False if there is no next page or it never drew."""
+    try:
+        next_button = driver.find_element(By.LINK_TEXT, "Next")
+        next_button.click()
+        WebDriverWait(driver, timeout).until(EC.staleness_of(next_button))
+        return True
+    except Exception as e:
+        print(f"[WARNING] Next page click failed: {e}")
+        return False
+
+
+def extract_rows(driver, table_id):
+    """Body rows of the grid's current page, as lists of ``{"text", "href"}``
+    cells, fetched in a single script call."""
+    return driver.execute_script(_ROWS_JS, table_id) or []
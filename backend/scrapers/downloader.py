@@ -1,22 +1,265 @@
-import requests
+"""
+Attachment download manager.
+
+Downloads stream to disk in DOWNLOAD_CHUNK_SIZE chunks over one pooled
+session, DOWNLOAD_WORKERS at a time, so a large tender ZIP never sits in
+memory whole:
+
+    manager = DownloadManager(session_from_driver(bot))
+    futures = [manager.submit(tender_id, DOWNLOAD_DIR, url) for url in links]
+    paths = manager.wait(futures)
+
+Each download is written to ``<file>.part`` first, with the response's ETag /
+Last-Modified saved next to it in ``<file>.part.json``. An interrupted
+download resumes from the end of its .part with an HTTP Range request guarded
+by If-Range on that validator, so a file changed on the server is fetched
+whole again; a .part without a validator is restarted from byte 0. Files are
+only renamed into place once complete.
+
+Every download directory keeps a small index (``.downloads.json``) of url ->
+ETag, size and SHA-256. A url already downloaded is re-requested with
+If-None-Match and skipped on 304; a file whose content hash matches one
+already on disk is dropped and the existing path returned.
+"""
+
+import hashlib
+import json
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
 
-def download_file(tender_id, download_dir, url, cookie):
+try:
+    from .http_pool import make_session, backoff_delay
+except ImportError:
+    from http_pool import make_session, backoff_delay
+
+DOWNLOAD_WORKERS = int(os.environ.get("DOWNLOAD_WORKERS", "4"))
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+DOWNLOAD_RETRIES = int(os.environ.get("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_TIMEOUT = int(os.environ.get("DOWNLOAD_TIMEOUT", "60"))
+INDEX_NAME = ".downloads.json"
+PART_EXT = ".part"
+PART_META_EXT = ".part.json"
+
+
+def safe_name(url):
+    """File name for ``url``: its last path segment, without the query."""
+    name = unquote(os.path.basename(urlparse(url).path))
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")
+    return name or hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+def _file_hash(path, hasher=None):
+    hasher = hasher or hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+def _validator(headers):
+    """If-Range value for a response: a strong ETag, else Last-Modified."""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _read_part_meta(meta_path, url):
     try:
-        headers = {
-            'Cookie': f'JSESSIONID={cookie}',
-            'User-Agent': 'Mozilla/5.0'
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            filename = os.path.basename(url)
-            file_path = os.path.join(download_dir, f"{tender_id}_{filename}")
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
-            return file_path
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        return None
+    return meta if meta.get("url") == url else None
+
+
+def _write_part_meta(meta_path, url, validator):
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"url": url, "validator": validator}, f)
+
+
+class DownloadIndex:
+    """url -> {path, etag, size, sha256} for one download directory."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, INDEX_NAME)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"[WARNING] Ignoring unreadable download index {self.path}: {e}")
+
+    def get(self, url):
+        with self._lock:
+            entry = self.entries.get(url)
+        if entry and os.path.exists(entry["path"]):
+            return entry
+        return None
+
+    def by_hash(self, sha256, exclude=None):
+        with self._lock:
+            for entry in self.entries.values():
+                if entry.get("sha256") == sha256 and entry["path"] != exclude and os.path.exists(entry["path"]):
+                    return entry
+        return None
+
+    def put(self, url, entry):
+        with self._lock:
+            self.entries[url] = entry
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class DownloadManager:
+    """Bounded pool of streaming, resumable, de-duplicated downloads."""
+
+    def __init__(self, session=None, workers=None, chunk_size=None):
+        self.workers = workers or DOWNLOAD_WORKERS
+        self.session = session or make_session(self.workers)
+        self.chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._indexes = {}
+        self._lock = threading.Lock()
+        self.counts = {"downloaded": 0, "resumed": 0, "not_modified": 0, "duplicate": 0, "failed": 0, "bytes": 0}
+
+    def _index(self, directory):
+        with self._lock:
+            index = self._indexes.get(directory)
+            if index is None:
+                index = self._indexes[directory] = DownloadIndex(directory)
+            return index
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counts[key] += n
+
+    def submit(self, tender_id, download_dir, url, headers=None):
+        return self.executor.submit(self.download, tender_id, download_dir, url, headers)
+
+    def wait(self, futures):
+        """Paths of the finished downloads, failures left out."""
+        paths = []
+        for future in futures:
+            path = future.result()
+            if path is not None:
+                paths.append(path)
+        return paths
+
+    def download(self, tender_id, download_dir, url, headers=None):
+        """Download ``url`` to ``download_dir``; returns the file path or None."""
+        os.makedirs(download_dir, exist_ok=True)
+        file_path = os.path.join(download_dir, f"{tender_id}_{safe_name(url)}")
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            try:
+                return self._fetch(url, file_path, self._index(download_dir), headers)
+            except Exception as e:
+                if attempt == DOWNLOAD_RETRIES:
+                    print(f"[ERROR] Failed to download file: {url} ({e})")
+                    self._count("failed")
+                    return None
+                delay = backoff_delay(attempt)
+                print(f"[WARNING] Download {url}: attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _fetch(self, url, file_path, index, headers=None):
+        part_path = file_path + PART_EXT
+        meta_path = file_path + PART_META_EXT
+        known = index.get(url)
+        request_headers = dict(headers or {})
+        if known and known.get("etag"):
+            request_headers["If-None-Match"] = known["etag"]
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        meta = _read_part_meta(meta_path, url) if offset else None
+        if offset and not (meta and meta.get("validator")):
+            # Nothing to tell whether the server's file changed, start over
+            os.remove(part_path)
+            offset = 0
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+            request_headers["If-Range"] = meta["validator"]
+
+        with self.session.get(url, headers=request_headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status_code == 304 and known:
+                self._count("not_modified")
+                return known["path"]
+            if response.status_code == 416 and offset:
+                # The .part is already the whole file (or stale), start over
+                os.remove(part_path)
+                raise IOError("range not satisfiable, restarting")
+            response.raise_for_status()
+            if response.status_code == 206 and offset:
+                hasher = _file_hash(part_path)
+                mode = "ab"
+                self._count("resumed")
+            else:
+                # A 200 to an If-Range request means the file changed
+                hasher = hashlib.sha256()
+                mode = "wb"
+                _write_part_meta(meta_path, url, _validator(response.headers))
+            etag = response.headers.get("ETag")
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        self._count("bytes", len(chunk))
+            expected = response.headers.get("Content-Length")
+            written = os.path.getsize(part_path)
+            if expected is not None and expected.isdigit() and not response.headers.get("Content-Encoding"):
+                # A 206 body is only the rest of the file
+                total = int(expected) + (offset if mode == "ab" else 0)
+                if written != total:
+                    raise IOError(f"short read, {written} of {total} bytes")
+
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        sha256 = hasher.hexdigest()
+        duplicate = index.by_hash(sha256, exclude=file_path)
+        if duplicate:
+            os.remove(part_path)
+            self._count("duplicate")
+            path = duplicate["path"]
         else:
-            print(f"Failed to download file: {url}")
-            return None
+            os.replace(part_path, file_path)
+            self._count("downloaded")
+            path = file_path
+        index.put(url, {"path": path, "etag": etag, "size": written, "sha256": sha256})
+        return path
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        c = self.counts
+        print(f"[METRIC] DOWNLOADS: {c['downloaded']} downloaded ({c['resumed']} resumed), "
+              f"{c['not_modified']} unchanged, {c['duplicate']} duplicates, {c['failed']} failed, "
+              f"{c['bytes'] / (1024 * 1024):.1f} MB")
+
+
+_DEFAULT_MANAGER = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_manager():
+    global _DEFAULT_MANAGER
+    with _DEFAULT_LOCK:
+        if _DEFAULT_MANAGER is None:
+            _DEFAULT_MANAGER = DownloadManager()
+        return _DEFAULT_MANAGER
+
+
+def download_file(tender_id, download_dir, url, cookie):
+    """Download one file with a JSESSIONID cookie; returns its path or None."""
+    headers = {'Cookie': f'JSESSIONID={cookie}'} if cookie else None
+    try:
+        return default_manager().download(tender_id, download_dir, url, headers)
     except Exception as e:
         print(f"Error downloading file: {e}")
-        return None 
\ No newline at end of file
+        return None
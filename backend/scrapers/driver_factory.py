@@ -0,0 +1,206 @@
+"""
+One place to start Selenium browsers, on a Windows desktop or a Linux server.
+
+    bot = create_driver()                                   # Edge or Chrome, whatever is installed
+    bot = create_driver("chrome", blocking_profile="ireps")
+    minimize(bot) / maximize(bot)                           # no-ops in headless mode
+
+Driver lookup: the bundled ``edgedriver_win64`` executables on Windows, then
+EDGE_DRIVER / CHROME_DRIVER, then msedgedriver / chromedriver on PATH, then
+Selenium Manager. Browser binaries (chromium, google-chrome, microsoft-edge)
+are found on PATH or via CHROME_BINARY / EDGE_BINARY.
+
+With REMOTE_WEBDRIVER_NODES set the browser is started on a remote WebDriver
+node instead (see remote_pool.py); ``pin=session_id`` keeps it on the node
+that solved that session's captcha.
+
+Settings (env):
+  SCRAPER_BROWSER       auto | edge | chrome            (default auto)
+  BROWSER_HEADLESS      auto | 1 | 0                    (auto = headless unless
+                        on Windows or a DISPLAY is set)
+  BROWSER_WINDOW_SIZE   "1920,1080"
+  REMOTE_HEADLESS       1 | 0                           (default 1)
+"""
+
+import os
+import shutil
+import sys
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.edge.options import Options as EdgeOptions
+from selenium.webdriver.edge.service import Service as EdgeService
+
+try:
+    from .resource_blocking import apply_profile
+    from .remote_pool import get_node_pool
+except ImportError:
+    from resource_blocking import apply_profile
+    from remote_pool import get_node_pool
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_DRIVER_DIR = os.path.join(BASE_DIR, "edgedriver_win64")
+IS_WINDOWS = sys.platform.startswith("win")
+
+BROWSER = os.environ.get("SCRAPER_BROWSER", "auto").lower()
+HEADLESS_SETTING = os.environ.get("BROWSER_HEADLESS", "auto").lower()
+WINDOW_SIZE = os.environ.get("BROWSER_WINDOW_SIZE", "1920,1080")
+REMOTE_HEADLESS = os.environ.get("REMOTE_HEADLESS", "1") == "1"
+
+_BROWSERS = {
+    "edge": {
+        "options": EdgeOptions,
+        "service": EdgeService,
+        "webdriver": "Edge",
+        "driver_exe": "msedgedriver",
+        "driver_env": "EDGE_DRIVER",
+        "binaries": ["microsoft-edge", "microsoft-edge-stable"],
+        "binary_env": "EDGE_BINARY",
+    },
+    "chrome": {
+        "options": ChromeOptions,
+        "service": ChromeService,
+        "webdriver": "Chrome",
+        "driver_exe": "chromedriver",
+        "driver_env": "CHROME_DRIVER",
+        "binaries": ["chromium", "chromium-browser", "google-chrome", "google-chrome-stable"],
+        "binary_env": "CHROME_BINARY",
+    },
+}
+
+DEFAULT_ARGUMENTS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-blink-features=AutomationControlled",
+]
+# Needed for root / container runs on Linux
+LINUX_ARGUMENTS = ["--no-sandbox", "--disable-dev-shm-usage"]
+
+
+def headless_default():
+    if HEADLESS_SETTING in ("1", "true", "yes"):
+        return True
+    if HEADLESS_SETTING in ("0", "false", "no"):
+        return False
+    return not IS_WINDOWS and not os.environ.get("DISPLAY")
+
+
+def find_driver(browser):
+    """Path to the WebDriver executable, or None to let Selenium Manager fetch one."""
+    spec = _BROWSERS[browser]
+    if IS_WINDOWS:
+        bundled = os.path.join(BUNDLED_DRIVER_DIR, spec["driver_exe"] + ".exe")
+        if os.path.exists(bundled):
+            return bundled
+    configured = os.environ.get(spec["driver_env"])
+    if configured and os.path.exists(configured):
+        return configured
+    return shutil.which(spec["driver_exe"])
+
+
+def find_binary(browser):
+    """Browser executable on PATH (Linux), None means the driver's default."""
+    spec = _BROWSERS[browser]
+    configured = os.environ.get(spec["binary_env"])
+    if configured and os.path.exists(configured):
+        return configured
+    if IS_WINDOWS:
+        return None
+    for name in spec["binaries"]:
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+def browser_order(browser=None):
+    browser = (browser or BROWSER).lower()
+    if browser in _BROWSERS:
+        return [browser]
+    if IS_WINDOWS:
+        return ["edge", "chrome"]
+    # On Linux try whatever is actually installed first
+    return sorted(_BROWSERS, key=lambda name: find_binary(name) is None)
+
+
+def build_options(browser, headless, arguments=(), prefs=None, remote=False):
+    spec = _BROWSERS[browser]
+    options = spec["options"]()
+    for arg in DEFAULT_ARGUMENTS + list(arguments):
+        options.add_argument(arg)
+    # Remote nodes are Linux containers
+    if remote or not IS_WINDOWS:
+        for arg in LINUX_ARGUMENTS:
+            options.add_argument(arg)
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument(f"--window-size={WINDOW_SIZE}")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+    binary = None if remote else find_binary(browser)
+    if binary:
+        options.binary_location = binary
+    return options
+
+
+def create_driver(browser=None, headless=None, arguments=(), prefs=None, blocking_profile=None, pin=None):
+    """Start a browser, on a remote node when configured, locally otherwise."""
+    node_pool = get_node_pool()
+    if node_pool is None:
+        driver = create_local_driver(browser, headless, arguments, prefs)
+    else:
+        # Nodes advertise one browser each, Chrome unless asked otherwise
+        name = (browser or BROWSER).lower()
+        name = name if name in _BROWSERS else "chrome"
+        remote_headless = REMOTE_HEADLESS if headless is None else headless
+        options = build_options(name, remote_headless, arguments, prefs, remote=True)
+        driver = node_pool.acquire(options, pin=pin,
+                                   local_factory=lambda: create_local_driver(browser, headless, arguments, prefs))
+        if not hasattr(driver, "headless"):
+            driver.headless = remote_headless
+    if blocking_profile:
+        apply_profile(driver, blocking_profile)
+    return driver
+
+
+def create_local_driver(browser=None, headless=None, arguments=(), prefs=None):
+    """Start a browser on this machine, trying Edge and Chrome in turn unless
+    ``browser`` is given."""
+    headless = headless_default() if headless is None else headless
+    last_error = None
+    for name in browser_order(browser):
+        spec = _BROWSERS[name]
+        driver_path = find_driver(name)
+        try:
+            options = build_options(name, headless, arguments, prefs)
+            service = spec["service"](executable_path=driver_path) if driver_path else spec["service"]()
+            print(f"[DEBUG] Launching {name} (headless={headless}, driver={driver_path or 'selenium-manager'})")
+            driver = getattr(webdriver, spec["webdriver"])(service=service, options=options)
+        except Exception as e:
+            print(f"[WARNING] Could not start {name}: {e}")
+            last_error = e
+            continue
+        driver.headless = headless
+        return driver
+    raise RuntimeError(f"No browser could be started: {last_error}")
+
+
+def minimize(driver):
+    if getattr(driver, "headless", False):
+        return
+    try:
+        driver.minimize_window()
+    except Exception as e:
+        print(f"[WARNING] Could not minimize window: {e}")
+
+
+def maximize(driver):
+    if getattr(driver, "headless", False):
+        return
+    try:
+        driver.maximize_window()
+    except Exception as e:
+        print(f"[WARNING] Could not maximize window: {e}")
@@ -0,0 +1,195 @@
+"""
+Batch runner for NIC-style e-procurement portals.
+
+Many state portals run the same software, so one search + detail flow
+(run_eproc_scraper_with_bot) works for all of them. The batch runner takes a
+list of base URLs and scrapes them concurrently:
+
+  * at most ``max_browsers`` portals hold a browser at the same time;
+  * every portal's captcha goes into one shared CaptchaQueue that the
+    operator answers (see the /api/batch endpoints in eproc_server_fixed.py);
+  * every portal writes into its own session directory.
+"""
+
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlparse
+
+try:
+    from .search import run_eproc_scraper_with_bot
+except ImportError:
+    from search import run_eproc_scraper_with_bot
+
+CAPTCHA_TIMEOUT = 600
+
+
+def search_page_url(base_url):
+    return f"{base_url}?page=FrontEndAdvancedSearch&service=page"
+
+
+def portal_name(base_url):
+    parsed = urlparse(base_url)
+    return re.sub(r"[^A-Za-z0-9]+", "-", parsed.netloc + parsed.path).strip("-") or "portal"
+
+
+class CaptchaQueue:
+    """Captchas from every running portal, waiting for the operator."""
+
+    def __init__(self, on_new=None):
+        self.on_new = on_new
+        self._lock = threading.Lock()
+        self._items = {}
+
+    def request(self, portal, image_data, timeout=CAPTCHA_TIMEOUT):
+        """Queue a captcha image and block until it is answered (None on timeout)."""
+        captcha_id = uuid.uuid4().hex[:12]
+        item = {
+            "captcha_id": captcha_id,
+            "portal": portal,
+            "image": image_data,
+            "created": datetime.now().isoformat(),
+            "answer": None,
+            "event": threading.Event(),
+        }
+        with self._lock:
+            self._items[captcha_id] = item
+        if self.on_new:
+            self.on_new(self.public(item))
+        answered = item["event"].wait(timeout)
+        with self._lock:
+            self._items.pop(captcha_id, None)
+        if not answered:
+            print(f"[WARNING] Captcha for {portal} was not answered in {timeout}s")
+        return item["answer"]
+
+    def answer(self, captcha_id, text):
+        with self._lock:
+            item = self._items.get(captcha_id)
+        if item is None:
+            return False
+        item["answer"] = text
+        item["event"].set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return [self.public(item) for item in self._items.values()]
+
+    @staticmethod
+    def public(item):
+        return {k: item[k] for k in ("captcha_id", "portal", "image", "created")}
+
+
+class EprocBatch:
+    """Scrape several portals in parallel under one browser budget."""
+
+    def __init__(self, base_urls, tender_type, days_interval, driver_factory, max_browsers=3,
+                 start_page=1, log_callback=None, captcha_queue=None, batch_id=None, **scrape_kwargs):
+        self.batch_id = batch_id or uuid.uuid4().hex[:8]
+        self.base_urls = [u.strip() for u in base_urls if u and u.strip()]
+        self.tender_type = tender_type
+        self.days_interval = days_interval
+        self.start_page = start_page
+        self.driver_factory = driver_factory
+        self.max_browsers = max(1, int(max_browsers))
+        self.log_callback = log_callback
+        self.captchas = captcha_queue or CaptchaQueue()
+        self.scrape_kwargs = scrape_kwargs
+        self._budget = threading.BoundedSemaphore(self.max_browsers)
+        self._lock = threading.Lock()
+        self._threads = []
+        self.started = None
+        self.finished = None
+        self.portals = {}
+        for base_url in self.base_urls:
+            session_id = f"batch-{self.batch_id}-{portal_name(base_url)}"
+            self.portals[session_id] = {"base_url": base_url, "session_id": session_id, "status": "queued",
+                                        "error": None, "started": None, "finished": None}
+
+    def log(self, msg, session_id=None):
+        if self.log_callback:
+            self.log_callback(msg, session_id)
+        print(msg)
+
+    def _set(self, session_id, **fields):
+        with self._lock:
+            self.portals[session_id].update(fields)
+
+    def _run_portal(self, session_id):
+        portal = self.portals[session_id]
+        base_url = portal["base_url"]
+        name = portal_name(base_url)
+
+        def portal_log(msg):
+            self.log(f"[{name}] {msg}", session_id)
+
+        def ask_operator(image_data):
+            self._set(session_id, status="waiting_captcha")
+            text = self.captchas.request(name, image_data)
+            self._set(session_id, status="running")
+            return text
+
+        with self._budget:
+            bot = None
+            self._set(session_id, status="starting", started=datetime.now().isoformat())
+            try:
+                bot = self.driver_factory()
+                bot.get(search_page_url(base_url))
+                self._set(session_id, status="running")
+                run_eproc_scraper_with_bot(
+                    bot=bot,
+                    tender_type=self.tender_type,
+                    days_interval=self.days_interval,
+                    start_page=self.start_page,
+                    log_callback=portal_log,
+                    base_url=base_url,
+                    session_id=session_id,
+                    captcha_callback=ask_operator,
+                    **self.scrape_kwargs
+                )
+                self._set(session_id, status="done")
+            except Exception as e:
+                portal_log(f"[ERROR] Portal failed: {e}")
+                self._set(session_id, status="failed", error=str(e))
+            finally:
+                if bot is not None:
+                    try:
+                        bot.quit()
+                    except Exception as e:
+                        print(f"[WARNING] Could not close browser for {name}: {e}")
+                self._set(session_id, finished=datetime.now().isoformat())
+
+    def start(self):
+        """Start every portal thread, portals beyond the budget wait for a browser."""
+        self.started = time.time()
+        self.log(f"[INFO] BATCH {self.batch_id}: {len(self.portals)} PORTALS, {self.max_browsers} BROWSERS AT A TIME")
+        for session_id in self.portals:
+            t = threading.Thread(target=self._run_portal, args=(session_id,), daemon=True)
+            t.start()
+            self._threads.append(t)
+        threading.Thread(target=self._wait_all, daemon=True).start()
+        return self
+
+    def _wait_all(self):
+        for t in self._threads:
+            t.join()
+        self.finished = time.time()
+        done = sum(1 for p in self.portals.values() if p["status"] == "done")
+        self.log(f"[METRIC] BATCH {self.batch_id}: {done}/{len(self.portals)} PORTALS DONE IN {self.finished - self.started:.1f}s")
+
+    def is_running(self):
+        return self.started is not None and self.finished is None
+
+    def status(self):
+        with self._lock:
+            portals = [dict(p) for p in self.portals.values()]
+        return {
+            "batch_id": self.batch_id,
+            "running": self.is_running(),
+            "max_browsers": self.max_browsers,
+            "portals": portals,
+            "captchas": self.captchas.pending(),
+        }
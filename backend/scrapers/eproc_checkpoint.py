@@ -0,0 +1,143 @@
+"""
+Per-portal checkpoints for e-procurement scrapes.
+
+A checkpoint file remembers, per portal and tender type:
+  * which result pages of each search window (date range) are finished, so a
+    crashed run resumes without a hand-picked start_page;
+  * which tenders were already scraped (tender IDs and DirectLink hashes),
+    so overlapping days_interval windows don't fetch the same tenders again.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from urllib.parse import urlparse, parse_qsl
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.path.join(BASE_DIR, "OUTPUT", "checkpoints")
+
+# Seen tenders older than this are forgotten, no search window is that long
+SEEN_RETENTION_DAYS = 60
+
+
+def date_window(days_interval, on=None):
+    """The (from, to) Published Date range the search form is filled with."""
+    on = on or date.today()
+    days_interval = int(days_interval)
+    if days_interval == 1:
+        day = (on - timedelta(days=1)).strftime("%d/%m/%Y")
+        return day, day
+    if days_interval > 1:
+        return ((on - timedelta(days=days_interval)).strftime("%d/%m/%Y"),
+                (on - timedelta(days=1)).strftime("%d/%m/%Y"))
+    return "", ""
+
+
+def link_hash(link):
+    """Stable hash of a DirectLink, ignoring parameter order and the host."""
+    query = sorted(parse_qsl(urlparse(link).query, keep_blank_values=True))
+    return hashlib.sha1(json.dumps(query).encode("utf-8")).hexdigest()[:20]
+
+
+def portal_key(base_url, tender_type):
+    parsed = urlparse(base_url or "")
+    raw = f"{parsed.netloc}{parsed.path}_{(tender_type or '').lower()}"
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", raw).strip("_") or "default"
+
+
+class ScrapeCheckpoint:
+    """Thread-safe JSON checkpoint for one portal + tender type."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self.windows = {}
+        self.seen_ids = {}
+        self.seen_links = {}
+        self._load()
+
+    @classmethod
+    def for_portal(cls, base_url, tender_type, checkpoint_dir=CHECKPOINT_DIR):
+        return cls(os.path.join(checkpoint_dir, portal_key(base_url, tender_type) + ".json"))
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Ignoring unreadable checkpoint {self.file_path}: {e}")
+            return
+        cutoff = (date.today() - timedelta(days=SEEN_RETENTION_DAYS)).isoformat()
+        self.windows = data.get("windows", {})
+        self.seen_ids = {k: v for k, v in data.get("seen_ids", {}).items() if v >= cutoff}
+        self.seen_links = {k: v for k, v in data.get("seen_links", {}).items() if v >= cutoff}
+
+    def save(self):
+        with self._lock:
+            data = {
+                "updated": datetime.now().isoformat(),
+                "windows": self.windows,
+                "seen_ids": self.seen_ids,
+                "seen_links": self.seen_links,
+            }
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            tmp_path = self.file_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.file_path)
+
+    # --- pages -------------------------------------------------------------
+
+    def pages_done(self, window):
+        with self._lock:
+            return set(self.windows.get(window, {}).get("pages_done", []))
+
+    def resume_page(self, window, start_page, total_pages):
+        """First page >= start_page that is not finished yet (total_pages + 1 if all are)."""
+        done = self.pages_done(window)
+        page = int(start_page)
+        while page <= total_pages and page in done:
+            page += 1
+        return page
+
+    def mark_page_done(self, window, page, total_pages):
+        with self._lock:
+            entry = self.windows.setdefault(window, {"pages_done": []})
+            if page not in entry["pages_done"]:
+                entry["pages_done"].append(page)
+                entry["pages_done"].sort()
+            entry["total_pages"] = total_pages
+            entry["updated"] = datetime.now().isoformat()
+        self.save()
+
+    # --- tenders -----------------------------------------------------------
+
+    def new_links(self, tender_links):
+        """Drop links whose tender was already scraped."""
+        with self._lock:
+            return [link for link in tender_links if link_hash(link) not in self.seen_links]
+
+    def claim_tender(self, tender_id, link=None):
+        """Record a tender as scraped. Returns False if its ID was already seen."""
+        today_iso = date.today().isoformat()
+        with self._lock:
+            if link:
+                self.seen_links[link_hash(link)] = today_iso
+            if tender_id and tender_id in self.seen_ids:
+                return False
+            if tender_id:
+                self.seen_ids[tender_id] = today_iso
+            return True
+
+    def release_tender(self, tender_id, link=None):
+        """Undo claim_tender for a tender whose row could not be written."""
+        with self._lock:
+            if link:
+                self.seen_links.pop(link_hash(link), None)
+            if tender_id:
+                self.seen_ids.pop(tender_id, None)
@@ -0,0 +1,159 @@
+"""
+Tender detail extraction for NIC e-procurement portals.
+
+The detail page is a set of ``tablebg`` tables made of ``td_caption`` /
+``td_field`` cell pairs. Walking them with ``find_element`` / ``.text`` costs
+one WebDriver HTTP round-trip per call, so a single tender used to take
+several hundred round-trips. Here the whole caption -> value map is pulled
+with one ``execute_script`` call and dispatched to columns in Python.
+"""
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+# Collects [caption, value] pairs exactly like the old per-getter loops did:
+# every .tablebg under .page_content, captions and fields zipped in order.
+_DETAIL_PAIRS_JS = """
+var root = document.getElementsByClassName('page_content')[0];
+if (!root) { return null; }
+var pairs = [];
+var tables = root.getElementsByClassName('tablebg');
+for (var t = 0; t < tables.length; t++) {
+    var fields = tables[t].getElementsByClassName('td_field');
+    var captions = tables[t].getElementsByClassName('td_caption');
+    var n = Math.min(fields.length, captions.length);
+    for (var i = 0; i < n; i++) {
+        pairs.push([captions[i].innerText, fields[i].innerText]);
+    }
+}
+return pairs;
+"""
+
+# (column, caption, exact match). The work details section always matched
+# captions with "in", everything else with "==", so that is kept as-is.
+DETAIL_FIELDS = [
+    ("organisation_chain", "Organisation Chain", True),
+    ("tender_reference_number", "Tender Reference Number", True),
+    ("tender_id", "Tender ID", True),
+    ("tender_category", "Tender Category", True),
+    ("tender_type", "Tender Category", True),
+    ("tender_fee", "Tender Fee in ₹", True),
+    ("fee_payable_to", "Fee Payable To", True),
+    ("fee_exemption_allowed", "Tender Fee Exemption Allowed", True),
+    ("emd_amount", "EMD Amount in ₹", True),
+    ("emd_payable_to", "EMD Payable To", True),
+    ("emd_exemption_allowed", "EMD through BG/ST or EMD Exemption Allowed", True),
+    ("title", "Title", False),
+    ("work_description", "Work Description", False),
+    ("tender_value", "Tender Value in ₹", False),
+    ("location", "Location", False),
+    ("pincode", "Pincode", False),
+    ("pre_bid_meeting_date", "Pre Bid Meeting Date", False),
+    ("pre_bid_meeting_address", "Pre Bid Meeting Address", False),
+    ("published_date", "Published Date", True),
+    ("bid_submission_end_date", "Bid Submission End Date", True),
+    ("address", "Address", True),
+]
+
+
+def _compile_dispatch(fields):
+    exact = {}
+    contains = []
+    for column, caption, is_exact in fields:
+        if is_exact:
+            exact.setdefault(caption, []).append(column)
+        else:
+            contains.append((caption, column))
+    return exact, contains
+
+
+_EXACT_CAPTIONS, _CONTAINS_CAPTIONS = _compile_dispatch(DETAIL_FIELDS)
+_EMPTY_DETAIL = {column: "" for column, _, _ in DETAIL_FIELDS}
+
+
+def map_detail_fields(pairs):
+    """Map raw [caption, value] pairs onto the DETAIL_FIELDS columns.
+
+    Later matches overwrite earlier ones, same as the original getters.
+    """
+    detail = dict(_EMPTY_DETAIL)
+    for caption, value in pairs:
+        caption = (caption or "").strip()
+        value = (value or "").strip()
+        for column in _EXACT_CAPTIONS.get(caption, ()):
+            detail[column] = value
+        for needle, column in _CONTAINS_CAPTIONS:
+            if needle in caption:
+                detail[column] = value
+    return detail
+
+
+def extract_detail_pairs(bot):
+    pairs = bot.execute_script(_DETAIL_PAIRS_JS)
+    if pairs is None:
+        raise NoSuchElementException("page_content not found on tender detail page")
+    return pairs
+
+
+def extract_detail_fields(bot):
+    """Read every detail column of the currently open tender page in one round-trip."""
+    return map_detail_fields(extract_detail_pairs(bot))
+
+
+def legacy_detail_pairs(bot):
+    """The old element-by-element walk, kept only to benchmark round-trips."""
+    pairs = []
+    page_content = bot.find_element(By.CLASS_NAME, "page_content")
+    for tablebg in page_content.find_elements(By.CLASS_NAME, "tablebg"):
+        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
+        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
+        for field, caption in zip(td_field, td_caption):
+            pairs.append([caption.text, field.text])
+    return pairs
+
+
+class RoundTripCounter:
+    """Counts WebDriver commands sent through ``bot`` while the block runs.
+
+    Every command (including WebElement ones) funnels through
+    ``WebDriver.execute``, so wrapping it on the instance sees all of them.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.count = 0
+        self._original = None
+        self._had_own = False
+
+    def __enter__(self):
+        # An outer counter may already have wrapped this instance
+        self._had_own = "execute" in vars(self.bot)
+        self._original = self.bot.execute
+        original = self._original
+
+        def counting_execute(driver_command, params=None):
+            self.count += 1
+            return original(driver_command, params)
+
+        self.bot.execute = counting_execute
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._had_own:
+            self.bot.execute = self._original
+        else:
+            # Drop the instance attribute so the class method is used again
+            del self.bot.execute
+        return False
+
+
+def compare_round_trips(bot):
+    """Return round-trips needed by the old walk vs. the single-script path
+    for the detail page that is currently open."""
+    with RoundTripCounter(bot) as before:
+        # The old flow walked the page once per getter
+        for _ in range(5):
+            map_detail_fields(legacy_detail_pairs(bot))
+    with RoundTripCounter(bot) as after:
+        extract_detail_fields(bot)
+    return {"before": before.count, "after": after.count}
@@ -0,0 +1,66 @@
+"""
+Browserless tender detail fetching for NIC e-procurement portals.
+
+After search + captcha the DirectLink detail pages are plain server-rendered
+HTML, so they are fetched with the browser's cookies over a pooled requests
+session and parsed with BeautifulSoup instead of opening a window per tender.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup
+
+try:
+    from .eproc_detail import map_detail_fields
+except ImportError:
+    from eproc_detail import map_detail_fields
+
+HTTP_WORKERS = 8
+HTTP_TIMEOUT = 20
+
+
+class DetailPageError(Exception):
+    """Detail page came back without tender tables (session expired, error page...)."""
+
+
+def parse_detail_pairs(html):
+    """Same [caption, value] pairs as eproc_detail._DETAIL_PAIRS_JS, from raw HTML."""
+    soup = BeautifulSoup(html, "html.parser")
+    page_content = soup.find(class_="page_content")
+    if page_content is None:
+        raise DetailPageError("page_content not found on tender detail page")
+    pairs = []
+    for tablebg in page_content.find_all(class_="tablebg"):
+        fields = tablebg.find_all(class_="td_field")
+        captions = tablebg.find_all(class_="td_caption")
+        for field, caption in zip(fields, captions):
+            pairs.append([caption.get_text(" ", strip=True), field.get_text(" ", strip=True)])
+    return pairs
+
+
+def fetch_detail_fields(session, link, timeout=HTTP_TIMEOUT):
+    response = session.get(link, timeout=timeout)
+    response.raise_for_status()
+    return map_detail_fields(parse_detail_pairs(response.text))
+
+
+def fetch_all_detail_fields(session, tender_links, max_workers=HTTP_WORKERS, timeout=HTTP_TIMEOUT):
+    """Fetch every tender link concurrently.
+
+    Returns ``(results, elapsed)`` where results is a list of
+    ``(link, fields, error)`` in the same order as ``tender_links``.
+    """
+    def work(link):
+        try:
+            return link, fetch_detail_fields(session, link, timeout), None
+        except Exception as e:
+            return link, None, e
+
+    started = time.time()
+    if not tender_links:
+        return [], 0.0
+    workers = max(1, min(max_workers, len(tender_links)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(work, tender_links))
+    return results, time.time() - started
@@ -0,0 +1,53 @@
+"""
+Speculative prefetch of the next e-procurement results page.
+
+While page N's tenders are being fetched, page N+1's listing is requested on
+a background thread (over an HTTP session cloned from the browser) and its
+DirectLink URLs parsed, so the next page starts without waiting for navigation.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ListingPrefetcher:
+    """Fetches one listing page ahead with a page worker from eproc_shards."""
+
+    def __init__(self, worker):
+        self.worker = worker
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = {}
+
+    def _fetch(self, page):
+        started = time.time()
+        links = self.worker.tender_links(page)
+        return links, time.time() - started
+
+    def schedule(self, page):
+        if page not in self._pending:
+            self._pending[page] = self._executor.submit(self._fetch, page)
+
+    def take(self, page):
+        """Wait for a scheduled page.
+
+        Returns ``(links, waited, fetch_time)``: ``waited`` is how long the
+        caller blocked, ``fetch_time`` how long the fetch itself took. Returns
+        None if the page wasn't scheduled or the fetch failed.
+        """
+        future = self._pending.pop(page, None)
+        if future is None:
+            return None
+        started = time.time()
+        try:
+            links, fetch_time = future.result()
+        except Exception as e:
+            print(f"[WARNING] Prefetch of page {page} failed: {e}")
+            return None
+        return links, time.time() - started, fetch_time
+
+    def close(self):
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=False)
+        self.worker.close()
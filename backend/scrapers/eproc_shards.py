@@ -0,0 +1,243 @@
+"""
+Page-range sharding for one e-procurement search.
+
+After the captcha is solved once, the result pages are reachable directly via
+the ``TablePages.linkPage`` URL with ``sp=<page>``. The coordinator here splits
+``start_page..total_pages`` into contiguous shards and runs one worker per
+shard in parallel. A worker is either an HTTP session or an extra browser,
+both carrying the authenticated cookies of the browser that solved the captcha.
+"""
+
+import threading
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+
+try:
+    from .http_pool import session_from_driver
+except ImportError:
+    from http_pool import session_from_driver
+
+NEXT_PAGE_URL = "{}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp={}"
+
+_LISTING_LINKS_JS = """
+var table = document.getElementById('table');
+if (!table) { return []; }
+var links = [];
+var anchors = table.getElementsByTagName('a');
+for (var i = 0; i < anchors.length; i++) {
+    if (anchors[i].href && anchors[i].href.indexOf('DirectLink') !== -1) {
+        links.push(anchors[i].href);
+    }
+}
+return links;
+"""
+
+
+def page_url(base_url, page):
+    return NEXT_PAGE_URL.format(base_url, page)
+
+
+def get_total_pages(bot):
+    """Read the page count from the ``linkLast`` pager link, 1 if there is none."""
+    try:
+        list_footer = bot.find_element(By.CLASS_NAME, "list_footer")
+        total_pages_link = list_footer.find_element(By.ID, "linkLast")
+        return int(total_pages_link.get_attribute("href").split("=")[-1].strip())
+    except Exception:
+        return 1
+
+
+def split_pages(start_page, total_pages, shards, skip=()):
+    """Split ``start_page..total_pages`` (minus ``skip``) into at most ``shards``
+    contiguous ranges."""
+    pages = [page for page in range(start_page, total_pages + 1) if page not in skip]
+    if not pages:
+        return []
+    shards = max(1, min(shards, len(pages)))
+    size, extra = divmod(len(pages), shards)
+    ranges = []
+    pos = 0
+    for i in range(shards):
+        step = size + (1 if i < extra else 0)
+        ranges.append(pages[pos:pos + step])
+        pos += step
+    return ranges
+
+
+def parse_listing_links(html, base_url):
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find(id="table")
+    if table is None:
+        return []
+    links = []
+    for a in table.find_all("a", href=True):
+        if "DirectLink" in a["href"]:
+            links.append(urljoin(base_url, a["href"]))
+    return links
+
+
+class HttpPageWorker:
+    """Walks result pages with a requests session cloned from the browser."""
+
+    kind = "http"
+
+    def __init__(self, session, base_url, timeout=20):
+        self.session = session
+        self.base_url = base_url
+        self.timeout = timeout
+        self.bot = None
+
+    def tender_links(self, page):
+        response = self.session.get(page_url(self.base_url, page), timeout=self.timeout)
+        response.raise_for_status()
+        return parse_listing_links(response.text, self.base_url)
+
+    def close(self):
+        self.session.close()
+
+
+class BrowserPageWorker:
+    """Walks result pages in its own browser window."""
+
+    kind = "browser"
+
+    def __init__(self, bot, base_url, owns_bot=False):
+        self.bot = bot
+        self.base_url = base_url
+        self.owns_bot = owns_bot
+        self.session = None
+
+    def tender_links(self, page):
+        self.bot.get(page_url(self.base_url, page))
+        return self.bot.execute_script(_LISTING_LINKS_JS) or []
+
+    def close(self):
+        if self.owns_bot:
+            try:
+                self.bot.quit()
+            except Exception as e:
+                print(f"[WARNING] Could not close shard browser: {e}")
+
+
+def clone_browser(source_bot, driver_factory, base_url, pin=None):
+    """Start a new browser via ``driver_factory(pin=pin)`` and give it
+    ``source_bot``'s cookies. ``pin`` is the captcha session id, so the clone
+    starts on the node that session is pinned to."""
+    bot = driver_factory(pin=pin)
+    # Cookies can only be set for the domain that is currently loaded
+    bot.get(base_url)
+    for cookie in source_bot.get_cookies():
+        cookie.pop("sameSite", None)
+        try:
+            bot.add_cookie(cookie)
+        except Exception as e:
+            print(f"[WARNING] Could not copy cookie {cookie.get('name')}: {e}")
+    return bot
+
+
+def build_workers(bot, base_url, count, mode="http", driver_factory=None, pool_size=8, pin=None):
+    """Build ``count`` shard workers sharing ``bot``'s authenticated session.
+
+    In browser mode ``bot`` itself is worker 0 and the rest are started with
+    ``driver_factory(pin=pin)``. Without a factory, browser mode falls back to
+    HTTP workers.
+    """
+    if mode == "browser" and driver_factory is not None:
+        workers = [BrowserPageWorker(bot, base_url)]
+        for _ in range(count - 1):
+            try:
+                workers.append(BrowserPageWorker(clone_browser(bot, driver_factory, base_url, pin), base_url, owns_bot=True))
+            except Exception as e:
+                print(f"[WARNING] Could not start shard browser: {e}")
+                break
+        return workers
+    return [HttpPageWorker(session_from_driver(bot, pool_size=pool_size, referer=base_url), base_url)
+            for _ in range(count)]
+
+
+def run_shards(workers, shards, handle_page, total_pages, log=None):
+    """Run ``shards[i]`` on ``workers[i]`` in parallel.
+
+    ``handle_page(worker, page, tender_links)`` does the per-page work and
+    returns the number of tenders it processed. Returns ``{page: count}``.
+    """
+    def emit(msg):
+        if log:
+            log(msg)
+        print(msg)
+
+    results = {}
+    lock = threading.Lock()
+
+    def work(worker_idx, worker, pages):
+        for page in pages:
+            emit(f"[INFO] [WORKER {worker_idx + 1}] SCRAPING PAGE [{page}/{total_pages}]")
+            try:
+                tender_links = worker.tender_links(page)
+                count = handle_page(worker, page, tender_links)
+            except Exception as e:
+                emit(f"[ERROR] [WORKER {worker_idx + 1}] Page {page} failed: {e}")
+                count = 0
+            with lock:
+                results[page] = count
+            emit(f"[INFO] [WORKER {worker_idx + 1}] COMPLETED PAGE [{page}/{total_pages}] - {count} TENDERS PROCESSED")
+
+    started = time.time()
+    threads = []
+    for worker_idx, (worker, pages) in enumerate(zip(workers, shards)):
+        if not pages:
+            continue
+        emit(f"[INFO] [WORKER {worker_idx + 1}] ({worker.kind}) PAGES {pages[0]}-{pages[-1]}")
+        t = threading.Thread(target=work, args=(worker_idx, worker, pages), daemon=True)
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+    emit(f"[METRIC] {len(results)} PAGES SCRAPED BY {len(threads)} WORKERS IN {time.time() - started:.1f}s")
+    return results
+
+
+def check_pinned_clones():
+    """Shard browsers cloned for a pinned captcha session start on its node.
+
+    Runs against two ``local`` stand-in nodes with stub browsers, no WebDriver
+    needed: ``python eproc_shards.py``.
+    """
+    try:
+        from .remote_pool import RemoteNodePool
+    except ImportError:
+        from remote_pool import RemoteNodePool
+
+    class StubBrowser:
+        def get(self, url):
+            pass
+
+        def get_cookies(self):
+            return [{"name": "JSESSIONID", "value": "1", "sameSite": "Lax"}]
+
+        def add_cookie(self, cookie):
+            pass
+
+        def quit(self):
+            pass
+
+    pool = RemoteNodePool([("local-1", 4), ("local-2", 4)])
+
+    def factory(pin=None):
+        return pool.acquire(None, local_factory=StubBrowser, pin=pin)
+
+    captcha_bot = factory()
+    pool.pin("session-1", captcha_bot)
+    # Unpinned, the next browser would go to the emptier node
+    clones = [clone_browser(captcha_bot, factory, "https://example.org", pin="session-1") for _ in range(3)]
+    nodes = {clone.remote_node for clone in clones}
+    assert nodes == {captcha_bot.remote_node}, f"clones on {nodes}, captcha on {captcha_bot.remote_node}"
+    assert factory().remote_node != captcha_bot.remote_node, "unpinned browser should go to the idle node"
+    print(f"[INFO] PINNING OK: {len(clones)} shard browsers on {captcha_bot.remote_node}")
+
+
+if __name__ == "__main__":
+    check_pinned_clones()
@@ -1,24 +1,33 @@
 
-import requests
 import pandas as pd
-import json
 from os import *
 from datetime import *
 from bs4 import BeautifulSoup
-import time
 import argparse
 import urllib3
+try:
+    from .gem_engine import make_gem_session, fetch_all, extract_rows, sweep
+    from .gem_delta import GemDeltaStore
+    from .output_sink import write_rows
+except ImportError:
+    from gem_engine import make_gem_session, fetch_all, extract_rows, sweep
+    from gem_delta import GemDeltaStore
+    from output_sink import write_rows
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 parser = argparse.ArgumentParser(description="Scrapes data from the GeM website and saves as Excel files.")
-parser.add_argument("--startingpage", type=int, required=True, help="Page number to start from.")
-parser.add_argument("--totalpages", type=int, required=True, help="Total pages to scrape.")
+parser.add_argument("--startingpage", type=int, required=False, default=1, help="Page number to start from.")
+parser.add_argument("--totalpages", type=int, required=False, help="Last page to scrape, default every page with results (pages per state/city with --sweep).")
 parser.add_argument("--username", type=str, required=True, help="Username to fill the Excel.")
-parser.add_argument("--state_index", type=int, required=True, help="Enter the state index to scrape.")
+parser.add_argument("--state_index", type=int, required=False, help="Enter the state index to scrape.")
+parser.add_argument("--sweep", action="store_true", help="Scrape every state (split into cities when large) in one run.")
+parser.add_argument("--delta", action="store_true", help="Only write bids that are new or changed since the last run.")
 # Change city_input argument to not required and default to empty string
 parser.add_argument("--city_input", type=str, required=False, default="", help="Enter city name or else skip.")
 parser.add_argument("--days_interval", type=int, required=False, help="Page number to start from.")
 parser.add_argument("--run_id", type=str, required=True, help="Unique run identifier.")
 args = parser.parse_args()
+if not args.sweep and args.state_index is None:
+    parser.error("--state_index is required unless --sweep is given")
 BASEDIR = path.dirname(path.dirname(path.abspath(__file__)))  # Go up one level to backend/
 OUTPUTDIR = path.join(BASEDIR, "outputs", "gem", args.run_id)
 makedirs(OUTPUTDIR,exist_ok=True)
@@ -207,97 +216,115 @@ def select_dates():
             tomorrow=tomorrow.strftime("%y-%m-%d")
         today=today.strftime("%y-%m-%d")
         return today,tomorrow
+def write_page(state, city, pgno, docs, today, prefix="gem_output"):
+    if not docs:
+        print(f"No bid data found on page {pgno}.")
+        return
+    df = pd.DataFrame(extract_rows(docs, username, state))
+    df['End Date'] = pd.to_datetime(df['End Date']).dt.strftime('%d-%m-%Y %H:%M:%S')
+    print(f"\nExtracted Bid Data for {state}{' ' + city if city else ''} Page :{pgno}:")
+    print(df)
+
+    file = f"{prefix}_of_page_{pgno}_dated_{today}.xlsx"
+    filepath = path.join(OUTPUTDIR, file)
+
+    try:
+        # Rows go to an NDJSON sink, the workbook is built when downloaded
+        write_rows(filepath, df.to_dict('records'), list(df.columns))
+        print(f"New file '{filepath}' created and data written.")
+        print(f"File written: {filepath}")
+    except Exception as e:
+        print(f"Error occurred while handling Excel file: {str(e)}")
+
+def delta_writer(store, write):
+    """Wrap a page writer so only new/changed bids reach it."""
+    def on_page(pgno, docs):
+        fresh = store.new_or_changed(docs)
+        if docs and not fresh:
+            print(f"No new bids on page {pgno}.")
+            return
+        write(pgno, fresh)
+    return on_page
+
+def log_delta(label, store):
+    s = store.summary()
+    print(f"[METRIC] GEM DELTA {label}: {s['new']} new, {s['changed']} changed, {s['unchanged']} unchanged, "
+          f"high-water {s['high_water'] or '-'}")
+
+def file_prefix(state, city):
+    name = "_".join(part for part in (state, city) if part)
+    return "gem_" + "".join(c if c.isalnum() else "_" for c in name).strip("_").lower()
+
 # Function to make the request and extract bid data
 def fetch_bid_data(state, city, today, tommorrow):
     print("state:", state, "city:", city, "today:", today, "end date:", tommorrow)
     totalpages = args.totalpages
     startingpage = args.startingpage
 
-    pgno = startingpage
-    while True:
-        if pgno == totalpages:
-            print("SCRAPING COMPLETED")
-            break
+    on_page = lambda pgno, docs: write_page(state, city, pgno, docs, today)
+    stale = None
+    store = None
+    if args.delta:
+        store = GemDeltaStore.for_target(state, city)
+        on_page = delta_writer(store, on_page)
+        stale = store.is_stale_page
 
-        payload = {
-            "payload": json.dumps({
-                "searchType": "con",
-                "state_name_con": state,
-                "city_name_con": city,
-                "bidEndFromCon": today,
-                "bidEndToCon": tommorrow,
-                "page": pgno
-            }),
-            "csrf_bd_gem_nk": "88bd48d4f34489018bbc590b787ff22f"
-        }
-
-        url = "https://bidplus.gem.gov.in/search-bids"
-
-        for attempt in range(2):  # Try max 2 times
-            try:
-                time.sleep(1.5)
-                response = requests.post(url, headers=headers, cookies=cookies, data=payload, verify=False,timeout=5)
-
-                if response.status_code == 200:
-                    response_data = response.json()
-                    docs = response_data.get('response', {}).get('response', {}).get('docs', [])
-                    if docs:
-                        extracted_data = []
-                        for item in docs:
-                            bid_id = item.get('id', '')
-                            document_link = f"https://bidplus.gem.gov.in/showbidDocument/{bid_id}"
-                            extracted_data.append({
-                                "user name": username,
-                                'Bid No': item.get('b_bid_number', [''])[0],
-                                'Name of Work': item.get('b_category_name', [''])[0],
-                                "category": "N/A",
-                                'Ministry and Department': f"{item.get('ba_official_details_minName', [''])[0]} - {item.get('ba_official_details_deptName', [''])[0]}",
-                                'Quantity': item.get('b_total_quantity', [''])[0],
-                                "EMD": "N/A",
-                                "Exemption": "N/A",
-                                "Estimation Value": "N/A",
-                                "state": state,
-                                "location": "N/A",
-                                "Apply Mode": "Online",
-                                "Website Link": "https://bidplus.gem.gov.in/",
-                                "Document link": document_link,
-                                "Attachment link": document_link,
-                                'End Date': item.get('final_end_date_sort', [''])[0],
-                            })
-
-                        df = pd.DataFrame(extracted_data)
-                        df['End Date'] = pd.to_datetime(df['End Date']).dt.strftime('%d-%m-%Y %H:%M:%S')
-                        print(f"\nExtracted Bid Data for Page :{pgno}:")
-                        print(df)
+    session = make_gem_session(headers, cookies)
+    try:
+        # Page count comes from the first response, totalpages only caps it
+        fetch_all(session, state, city, today, tommorrow, cookies["csrf_gem_cookie"], on_page,
+                  first_page=startingpage, last_page=totalpages, stale=stale)
+    finally:
+        session.close()
+        if store is not None:
+            store.save()
+            log_delta(state + (f"/{city}" if city else ""), store)
+    print("SCRAPING COMPLETED")
 
-                        file = f"gem_output_of_page_{pgno}_dated_{today}.xlsx"
-                        filepath = path.join(OUTPUTDIR, file)
+# Every state in one run, one shared connection pool and worker pool
+def sweep_all_states(today, tommorrow):
+    print(f"Sweeping {len(valid_states)} states, end date {today} to {tommorrow}")
+    stores = {}
 
-                        try:
-                            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-                                df.to_excel(writer, index=False, sheet_name='Sheet1')
-                            print(f"New file '{filepath}' created and data written.")
-                            print(f"File written: {filepath}")
-                        except Exception as e:
-                            print(f"Error occurred while handling Excel file: {str(e)}")
+    def store_for(state, city):
+        if (state, city) not in stores:
+            stores[(state, city)] = GemDeltaStore.for_target(state, city)
+        return stores[(state, city)]
 
-                    else:
-                        print(f"No bid data found on page {pgno}.")
-                    break  # Break the retry loop if successful
+    def on_page(state, city, pgno, docs):
+        write = lambda n, rows: write_page(state, city, n, rows, today, prefix=file_prefix(state, city))
+        if args.delta:
+            write = delta_writer(store_for(state, city), write)
+        write(pgno, docs)
 
-                else:
-                    print(f"Attempt {attempt + 1}: Failed with status code {response.status_code}")
-            except Exception as e:
-                print(f"Attempt {attempt + 1}: Exception occurred on page {pgno} - {str(e)}")
+    stale = None
+    if args.delta:
+        stale = lambda state, city, docs: store_for(state, city).is_stale_page(docs)
 
-            if attempt == 1:
-                print(f"Skipping page {pgno} after 2 failed attempts.")
-        pgno += 1
+    session = make_gem_session(headers, cookies)
+    try:
+        progress = sweep(session, [(state, "") for state in valid_states], today, tommorrow,
+                         cookies["csrf_gem_cookie"], on_page,
+                         cities=valid_cities, max_pages=args.totalpages, stale=stale)
+    finally:
+        session.close()
+        for (state, city), store in stores.items():
+            store.save()
+            log_delta(state + (f"/{city}" if city else ""), store)
+    for target, p in sorted(progress.items()):
+        failed = f", failed pages {p['failed']}" if p["failed"] else ""
+        print(f"[INFO] {target}: {p['docs']} bids in {p['done']}/{p['pages']} pages{failed}")
+    print("SCRAPING COMPLETED")
 
 # Main function to run the script
 def main():
     try:
         print("gem.py started with arguments:", vars(args))
+        if args.sweep:
+            today, tommorrow = select_dates()
+            sweep_all_states(today, tommorrow)
+            print("Data fetch complete.")
+            return
         state, city = select_state_and_city(args.state_index, args.city_input)
         print(f"Selected state: {state}, city: {city}")
         if state:
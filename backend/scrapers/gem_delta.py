@@ -0,0 +1,143 @@
+"""
+Delta state for GeM runs, per state/city.
+
+Remembers every bid already written (bid number -> fingerprint of the fields
+the output rows are built from) and the high-water mark: the highest bid
+number and latest ``final_end_date_sort`` seen. A delta run then
+
+  * writes only bids that are new or whose fingerprint changed (e.g. the end
+    date was extended), and
+  * stops paging at the first page whose bids are all known and at or below
+    the high-water mark, since the search lists newest bids first.
+
+Bids whose end date has passed are dropped from the store on load; the search
+window starts today so they can't come back.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DELTA_DIR = os.path.join(BASE_DIR, "OUTPUT", "checkpoints", "gem")
+
+_FINGERPRINT_FIELDS = (
+    'b_bid_number',
+    'b_category_name',
+    'ba_official_details_minName',
+    'ba_official_details_deptName',
+    'b_total_quantity',
+    'final_end_date_sort',
+)
+
+
+def _first(item, field):
+    value = item.get(field, [''])
+    return value[0] if isinstance(value, list) and value else (value or '')
+
+
+def bid_sequence(bid_number):
+    """``GEM/2025/B/6123456`` -> 6123456 (0 if there is no number)."""
+    match = re.search(r"(\d+)\s*$", bid_number or "")
+    return int(match.group(1)) if match else 0
+
+
+def fingerprint(item):
+    raw = json.dumps([str(_first(item, field)) for field in _FINGERPRINT_FIELDS])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def target_key(state, city=""):
+    raw = f"{state}_{city}" if city else state
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", raw).strip("_").lower() or "default"
+
+
+class GemDeltaStore:
+    """Thread-safe JSON store for one state/city target."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        # bid number -> {"fp": fingerprint, "end": final_end_date_sort}
+        self.bids = {}
+        self.high_water = {"bid_number": "", "sequence": 0, "end_date": ""}
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+        self._load()
+
+    @classmethod
+    def for_target(cls, state, city="", delta_dir=DELTA_DIR):
+        return cls(os.path.join(delta_dir, target_key(state, city) + ".json"))
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Ignoring unreadable GeM delta state {self.file_path}: {e}")
+            return
+        now = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        self.bids = {k: v for k, v in data.get("bids", {}).items() if not v.get("end") or v["end"] >= now}
+        self.high_water = data.get("high_water", self.high_water)
+
+    def save(self):
+        with self._lock:
+            data = {
+                "updated": datetime.now().isoformat(),
+                "high_water": self.high_water,
+                "bids": self.bids,
+            }
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            tmp_path = self.file_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.file_path)
+
+    @property
+    def empty(self):
+        return not self.bids
+
+    def is_stale_page(self, docs):
+        """True when every bid on the page is known, unchanged and not newer
+        than the high-water mark, so later pages hold nothing new either."""
+        if not docs or self.empty:
+            return False
+        with self._lock:
+            for item in docs:
+                bid_number = _first(item, 'b_bid_number')
+                known = self.bids.get(bid_number)
+                if known is None or known["fp"] != fingerprint(item):
+                    return False
+                if bid_sequence(bid_number) > self.high_water["sequence"]:
+                    return False
+            return True
+
+    def new_or_changed(self, docs):
+        """Record ``docs`` and return the ones not written before or changed since."""
+        fresh = []
+        with self._lock:
+            for item in docs:
+                bid_number = _first(item, 'b_bid_number')
+                fp = fingerprint(item)
+                known = self.bids.get(bid_number)
+                if known is not None and known["fp"] == fp:
+                    self.counts["unchanged"] += 1
+                    continue
+                self.counts["changed" if known is not None else "new"] += 1
+                end_date = str(_first(item, 'final_end_date_sort'))
+                self.bids[bid_number] = {"fp": fp, "end": end_date}
+                fresh.append(item)
+                sequence = bid_sequence(bid_number)
+                if sequence > self.high_water["sequence"]:
+                    self.high_water["sequence"] = sequence
+                    self.high_water["bid_number"] = bid_number
+                if end_date > self.high_water["end_date"]:
+                    self.high_water["end_date"] = end_date
+        return fresh
+
+    def summary(self):
+        return dict(self.counts, known=len(self.bids), high_water=self.high_water["bid_number"])
@@ -0,0 +1,324 @@
+"""
+Concurrent GeM bid search fetcher.
+
+Keeps GEM_CONCURRENCY search pages in flight over one keep-alive session, under
+a shared GEM_RATE requests/second budget, and retries failed pages with
+jittered exponential backoff (GEM_RETRIES times) instead of sleeping 1.5s
+before every request.
+
+    session = make_gem_session(headers, cookies)
+    stats = fetch_all(session, state, city, start, end, csrf, on_page)
+
+``fetch_all`` reads the hit count (``numFound``) from the first page and
+schedules exactly the pages that hold results; an empty page cancels the
+pages after it.
+
+``on_page(page, docs)`` is called from the calling thread as pages complete, so
+Excel writing stays on one thread.
+
+``sweep`` does the same for many states in one run: every state is probed for
+its hit count, states with more than GEM_CITY_SPLIT_PAGES pages are split into
+their cities, and all pages share one session, one limiter and one pool of
+GEM_CONCURRENCY workers.
+"""
+
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from .http_pool import make_session, RateLimiter, request_with_retry
+except ImportError:
+    from http_pool import make_session, RateLimiter, request_with_retry
+
+GEM_URL = "https://bidplus.gem.gov.in/search-bids"
+GEM_SITE = "https://bidplus.gem.gov.in/"
+
+GEM_CONCURRENCY = int(os.environ.get("GEM_CONCURRENCY", "4"))
+GEM_RATE = float(os.environ.get("GEM_RATE", "4"))
+GEM_RETRIES = int(os.environ.get("GEM_RETRIES", "4"))
+GEM_TIMEOUT = int(os.environ.get("GEM_TIMEOUT", "15"))
+# Bids per search page, the portal's fixed page size
+GEM_PAGE_SIZE = 10
+GEM_CITY_SPLIT_PAGES = int(os.environ.get("GEM_CITY_SPLIT_PAGES", "100"))
+
+
+def make_gem_session(headers, cookies, pool_size=None):
+    session = make_session(pool_size or max(GEM_CONCURRENCY, 1), headers)
+    session.cookies.update(cookies)
+    # The portal's certificate chain does not verify
+    session.verify = False
+    return session
+
+
+def make_limiter(rate=None):
+    rate = GEM_RATE if rate is None else rate
+    return RateLimiter(rate, burst=max(1, GEM_CONCURRENCY))
+
+
+def build_payload(state, city, start, end, page, csrf):
+    return {
+        "payload": json.dumps({
+            "searchType": "con",
+            "state_name_con": state,
+            "city_name_con": city,
+            "bidEndFromCon": start,
+            "bidEndToCon": end,
+            "page": page
+        }),
+        "csrf_bd_gem_nk": csrf
+    }
+
+
+def _parse_search(response):
+    # ValueError on an HTML error page, retried like a network error
+    return response.json().get('response', {}).get('response', {})
+
+
+def fetch_page(session, state, city, start, end, page, csrf, limiter=None, retries=None, on_retry=None):
+    """The ``response.response`` object (``docs``, ``numFound``) for one search page."""
+    return request_with_retry(
+        session, "POST", GEM_URL,
+        data=build_payload(state, city, start, end, page, csrf),
+        timeout=GEM_TIMEOUT,
+        retries=GEM_RETRIES if retries is None else retries,
+        limiter=limiter,
+        parse=_parse_search,
+        label=f"GeM {_label(state, city)} page {page}",
+        on_retry=on_retry,
+    )
+
+
+def extract_rows(docs, username, state):
+    """Output rows for one page of search docs (same columns as gem.py always wrote)."""
+    rows = []
+    for item in docs:
+        bid_id = item.get('id', '')
+        document_link = f"https://bidplus.gem.gov.in/showbidDocument/{bid_id}"
+        rows.append({
+            "user name": username,
+            'Bid No': item.get('b_bid_number', [''])[0],
+            'Name of Work': item.get('b_category_name', [''])[0],
+            "category": "N/A",
+            'Ministry and Department': f"{item.get('ba_official_details_minName', [''])[0]} - {item.get('ba_official_details_deptName', [''])[0]}",
+            'Quantity': item.get('b_total_quantity', [''])[0],
+            "EMD": "N/A",
+            "Exemption": "N/A",
+            "Estimation Value": "N/A",
+            "state": state,
+            "location": "N/A",
+            "Apply Mode": "Online",
+            "Website Link": GEM_SITE,
+            "Document link": document_link,
+            "Attachment link": document_link,
+            'End Date': item.get('final_end_date_sort', [''])[0],
+        })
+    return rows
+
+
+def page_count(result, page_size=GEM_PAGE_SIZE):
+    """Number of search pages for a ``response.response`` object."""
+    return int(math.ceil(int(result.get('numFound', 0) or 0) / float(page_size)))
+
+
+def plan_pages(first, first_page=1, last_page=None):
+    """Pages ``first_page..N`` to fetch, N from ``numFound`` of the already
+    fetched ``first_page`` (capped at ``last_page``)."""
+    docs = first.get('docs', [])
+    page_size = GEM_PAGE_SIZE
+    if first_page == 1 and docs and int(first.get('numFound', 0) or 0) > len(docs):
+        # A full first page tells the real page size
+        page_size = len(docs)
+    total = page_count(first, page_size)
+    if last_page:
+        total = min(total, last_page)
+    return list(range(first_page, total + 1))
+
+
+def _label(state, city):
+    return f"{state}/{city}" if city else state
+
+
+def fetch_pages(session, state, city, start, end, pages, csrf, on_page, workers=None, limiter=None,
+                stop_on_empty=True, stale=None):
+    """Fetch ``pages`` concurrently and hand each page's docs to ``on_page``.
+
+    Pages that still fail after the retries are logged and skipped. With
+    ``stop_on_empty`` an empty page cancels every later page not yet started,
+    as does a page for which ``stale(docs)`` is true (delta runs).
+    Returns counts and timings for the run.
+    """
+    pages = list(pages)
+    workers = max(1, min(workers or GEM_CONCURRENCY, len(pages) or 1))
+    limiter = limiter or make_limiter()
+    stats = {"pages": len(pages), "ok": 0, "empty": 0, "failed": [], "retries": 0, "docs": 0, "cancelled": 0}
+
+    def count_retry(error):
+        stats["retries"] += 1
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_page, session, state, city, start, end, page, csrf, limiter,
+                            None, count_retry): page
+            for page in pages
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            if future.cancelled():
+                stats["cancelled"] += 1
+                continue
+            try:
+                docs = future.result().get('docs', [])
+            except Exception as e:
+                print(f"[ERROR] Skipping GeM page {page} after {GEM_RETRIES + 1} attempts: {e}")
+                stats["failed"].append(page)
+                continue
+            stats["ok"] += 1
+            stats["docs"] += len(docs)
+            if not docs:
+                stats["empty"] += 1
+                if stop_on_empty:
+                    _cancel_after(futures, page, lambda key: key, _label(state, city))
+            elif stale is not None and stale(docs):
+                _cancel_after(futures, page, lambda key: key, _label(state, city), "already known")
+            on_page(page, docs)
+
+    stats["elapsed"] = round(time.time() - started, 1)
+    stats["failed"].sort()
+    print(f"[METRIC] GEM {_label(state, city)}: {stats['ok']}/{stats['pages']} pages, "
+          f"{stats['docs']} bids, {stats['retries']} retries, {stats['cancelled']} skipped "
+          f"in {stats['elapsed']}s "
+          f"({workers} in flight, {limiter.rate:g} req/s)")
+    return stats
+
+
+def _cancel_after(futures, last_page, page_of, label, reason="empty"):
+    """Cancel the not yet started futures for pages after ``last_page``."""
+    cancelled = sum(1 for future, key in futures.items() if page_of(key) > last_page and future.cancel())
+    if cancelled:
+        print(f"[INFO] GeM {label}: page {last_page} is {reason}, skipping {cancelled} later pages")
+
+
+def fetch_all(session, state, city, start, end, csrf, on_page, first_page=1, last_page=None,
+              workers=None, limiter=None, stale=None):
+    """Fetch ``first_page`` to read the hit count, then exactly the pages that
+    hold results (up to ``last_page`` if given)."""
+    limiter = limiter or make_limiter()
+    first = fetch_page(session, state, city, start, end, first_page, csrf, limiter)
+    pages = plan_pages(first, first_page, last_page)
+    print(f"[INFO] GeM {_label(state, city)}: {first.get('numFound', 0)} bids, "
+          f"{len(pages)} pages to fetch ({first_page}-{pages[-1] if pages else first_page})")
+    docs = first.get('docs', [])
+    done = not docs or (stale is not None and stale(docs))
+    on_page(first_page, docs)
+    if done:
+        if docs:
+            print(f"[INFO] GeM {_label(state, city)}: page {first_page} is already known, nothing newer")
+        return {"pages": 1, "ok": 1, "empty": int(not docs), "failed": [], "retries": 0, "docs": len(docs),
+                "cancelled": max(len(pages) - 1, 0)}
+    return fetch_pages(session, state, city, start, end, pages[1:], csrf, on_page, workers, limiter,
+                       stale=stale)
+
+
+def sweep(session, targets, start, end, csrf, on_page, cities=None, max_pages=None,
+          split_pages=None, workers=None, limiter=None, stale=None):
+    """Fetch every page of every ``(state, city)`` target in one shared pool.
+
+    States in ``cities`` whose hit count is over ``split_pages`` pages are
+    replaced by one target per city. ``max_pages`` caps the pages fetched per
+    target. ``on_page(state, city, page, docs)`` runs on the calling thread.
+    ``stale(state, city, docs)`` true ends that target early (delta runs).
+    Returns per-target stats keyed by "STATE" / "STATE/CITY".
+    """
+    cities = cities or {}
+    split_pages = GEM_CITY_SPLIT_PAGES if split_pages is None else split_pages
+    workers = max(1, workers or GEM_CONCURRENCY)
+    limiter = limiter or make_limiter()
+    progress = {}
+    retries = []
+    started = time.time()
+
+    def probe(state, city):
+        return fetch_page(session, state, city, start, end, 1, csrf, limiter, None, retries.append)
+
+    def probe_all(executor, pending):
+        futures = {executor.submit(probe, state, city): (state, city) for state, city in pending}
+        for future in as_completed(futures):
+            state, city = futures[future]
+            try:
+                yield state, city, future.result()
+            except Exception as e:
+                print(f"[ERROR] GeM {_label(state, city)}: first page failed, skipping: {e}")
+                progress[_label(state, city)] = {"pages": 0, "done": 0, "docs": 0, "failed": [1]}
+
+    def plan(state, city, first):
+        pages = plan_pages(first, 1, max_pages)
+        key = _label(state, city)
+        progress[key] = {"pages": len(pages), "done": 0, "docs": 0, "failed": [], "found": first.get('numFound', 0)}
+        if not pages:
+            return []
+        docs = first.get('docs', [])
+        known = stale is not None and stale(state, city, docs)
+        deliver(state, city, 1, docs)
+        if known:
+            print(f"[INFO] GeM {key}: page 1 is already known, nothing newer")
+            return []
+        return [(state, city, page) for page in pages[1:]]
+
+    def deliver(state, city, page, docs):
+        p = progress[_label(state, city)]
+        p["done"] += 1
+        p["docs"] += len(docs)
+        on_page(state, city, page, docs)
+        print(f"[PROGRESS] GEM {_label(state, city)}: {p['done']}/{p['pages']} pages, {p['docs']} bids")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        jobs = []
+        split = []
+        for state, city, first in probe_all(executor, targets):
+            pages = len(plan_pages(first))
+            if not city and state in cities and pages > split_pages:
+                print(f"[INFO] GeM {state}: {first.get('numFound')} bids ({pages} pages), splitting into "
+                      f"{len(cities[state])} cities")
+                split.append((state, first))
+                continue
+            jobs.extend(plan(state, city, first))
+        for state, first in split:
+            # Some city lists repeat a name
+            city_targets = [(state, city) for city in dict.fromkeys(cities[state])]
+            found = 0
+            for _, city, city_first in probe_all(executor, city_targets):
+                found += int(city_first.get('numFound', 0) or 0)
+                jobs.extend(plan(state, city, city_first))
+            if found < int(first.get('numFound', 0) or 0):
+                print(f"[WARNING] GeM {state}: cities cover {found} of {first.get('numFound')} bids")
+
+        futures = {
+            executor.submit(fetch_page, session, state, city, start, end, page, csrf, limiter,
+                            None, retries.append): (state, city, page)
+            for state, city, page in jobs
+        }
+        for future in as_completed(futures):
+            state, city, page = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                docs = future.result().get('docs', [])
+            except Exception as e:
+                print(f"[ERROR] Skipping GeM {_label(state, city)} page {page}: {e}")
+                progress[_label(state, city)]["failed"].append(page)
+                continue
+            if not docs or (stale is not None and stale(state, city, docs)):
+                target_futures = {f: key for f, key in futures.items() if key[:2] == (state, city)}
+                _cancel_after(target_futures, page, lambda key: key[2], _label(state, city),
+                              "empty" if not docs else "already known")
+            deliver(state, city, page, docs)
+
+    total_docs = sum(p["docs"] for p in progress.values())
+    total_pages = sum(p["done"] for p in progress.values())
+    print(f"[METRIC] GEM SWEEP: {len(progress)} targets, {total_pages} pages, {total_docs} bids, "
+          f"{len(retries)} retries in {time.time() - started:.1f}s ({workers} in flight, {limiter.rate:g} req/s)")
+    return progress
@@ -0,0 +1,156 @@
+"""
+Pooled requests sessions that reuse a logged-in / captcha-solved browser.
+
+Same idea as the cookie copy in ireps.py, but the session keeps a connection
+pool big enough for the worker threads that share it.
+
+``RateLimiter`` and ``request_with_retry`` are for scrapers that keep several
+requests in flight against one portal: a shared requests-per-second budget and
+jittered exponential backoff instead of fixed sleeps.
+"""
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, headers=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def sync_cookies(session, bot):
+    """Copy the browser's current cookies into ``session``."""
+    for cookie in bot.get_cookies():
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+    return session
+
+
+def session_from_driver(bot, pool_size=DEFAULT_POOL_SIZE, referer=None):
+    """Build a pooled session carrying the browser's cookies and user agent,
+    so the portal sees the same session the captcha was solved in."""
+    headers = {}
+    try:
+        headers["User-Agent"] = bot.execute_script("return navigator.userAgent;")
+    except Exception as e:
+        print(f"[WARNING] Could not read browser user agent: {e}")
+    if referer:
+        headers["Referer"] = referer
+    session = make_session(pool_size, headers)
+    return sync_cookies(session, bot)
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RetryableStatus(Exception):
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class Cancelled(Exception):
+    """Raised by ``request_with_retry`` when its ``cancelled`` check turns true."""
+
+
+def _sleep(seconds, cancelled=None, step=0.25):
+    # time.sleep that wakes up early once ``cancelled()`` is true
+    deadline = time.monotonic() + seconds
+    while True:
+        if cancelled is not None and cancelled():
+            raise Cancelled()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(step, remaining))
+
+
+class RateLimiter:
+    """Token bucket shared by worker threads: on average at most ``rate``
+    requests per second, with bursts of up to ``burst``. ``rate <= 0`` means
+    no limit."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter for retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request_with_retry(session, method, url, retries=4, limiter=None, backoff=1.0, parse=None,
+                       label=None, on_retry=None, cancelled=None, **kwargs):
+    """``session.request`` with rate limiting and jittered exponential backoff.
+
+    Connection errors, 429/5xx responses and exceptions raised by
+    ``parse(response)`` are retried; other 4xx raise straight away. Returns
+    ``parse(response)`` if given, else the response. ``cancelled`` is an
+    optional callable checked before each attempt and during backoff; once it
+    returns true ``Cancelled`` is raised.
+    """
+    label = label or url
+    for attempt in range(retries + 1):
+        if cancelled is not None and cancelled():
+            raise Cancelled()
+        if limiter is not None:
+            limiter.acquire()
+        retry_after = None
+        try:
+            response = session.request(method, url, **kwargs)
+            if response.status_code in RETRY_STATUSES:
+                raise RetryableStatus(response)
+            response.raise_for_status()
+            return parse(response) if parse else response
+        except requests.HTTPError:
+            raise
+        except Exception as e:
+            if attempt == retries:
+                raise
+            if isinstance(e, RetryableStatus):
+                retry_after = e.response.headers.get("Retry-After")
+            delay = backoff_delay(attempt, backoff)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            print(f"[WARNING] {label}: attempt {attempt + 1} failed ({e}), retrying in {delay:.1f}s")
+            if on_retry:
+                on_retry(e)
+            _sleep(delay, cancelled)
@@ -1,10 +1,83 @@
-import pandas as pd
 import time
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
 from os import *
 import os
+try:
+    from .output_sink import write_rows
+    from .ireps_parser import parse_results, save_fixture, COLUMNS
+    from .http_pool import session_from_driver, sync_cookies, RateLimiter, request_with_retry, Cancelled
+except ImportError:
+    from output_sink import write_rows
+    from ireps_parser import parse_results, save_fixture, COLUMNS
+    from http_pool import session_from_driver, sync_cookies, RateLimiter, request_with_retry, Cancelled
+
+# Pages kept in flight over the one browser session, and the shared
+# requests-per-second budget for the portal
+IREPS_CONCURRENCY = int(os.environ.get("IREPS_CONCURRENCY", "3"))
+IREPS_RATE = float(os.environ.get("IREPS_RATE", "1"))
+IREPS_RETRIES = int(os.environ.get("IREPS_RETRIES", "3"))
+IREPS_TIMEOUT = int(os.environ.get("IREPS_TIMEOUT", "15"))
+
+BASE_URL = "https://www.ireps.gov.in/epsn/anonymSearch.do"
+
+
+def _stopped(session):
+    return bool(session and session.get("stop_flag", False))
+
+
+def fetch_results_page(session_req, page, payload, headers, limiter, session=None):
+    """POST one results page; ``(rows, expired)`` as from ``parse_results``."""
+    def parse(response):
+        save_fixture(response.text, page)
+        return parse_results(response.text)
+
+    print(f"[DEBUG] Requesting page {page}")
+    return request_with_retry(
+        session_req, "POST", BASE_URL,
+        retries=IREPS_RETRIES - 1,
+        limiter=limiter,
+        backoff=2.0,
+        parse=parse,
+        label=f"IREPS page {page}",
+        cancelled=lambda: _stopped(session),
+        headers=headers,
+        data=dict(payload, pageNo=str(page)),
+        timeout=IREPS_TIMEOUT,
+    )
+
+
+def _result(future, session):
+    # future.result() that gives up as soon as the stop flag is set
+    while True:
+        if _stopped(session):
+            raise Cancelled()
+        try:
+            return future.result(timeout=0.5)
+        except FutureTimeout:
+            continue
+
+
+def _cancel(inflight):
+    for future in inflight.values():
+        future.cancel()
+    inflight.clear()
+
+
+def reauthenticate(bot, session_req, log_callback):
+    """Re-copy the browser's cookies into the requests session. The browser
+    keeps the captcha-solved session alive, so this is usually enough after
+    the copied JSESSIONID goes stale."""
+    log_callback("🔑 Session expired, refreshing cookies from the browser")
+    print("[INFO] IREPS session expired, re-syncing cookies from the browser")
+    try:
+        session_req.cookies.clear()
+        sync_cookies(session_req, bot)
+        return True
+    except Exception as e:
+        print(f"[ERROR] Could not re-sync IREPS cookies: {e}")
+        return False
+
 
 def scrape_with_selenium(bot, name, starting_page, log_callback, session_id, session=None):
     print("[DEBUG] Entered scrape_with_selenium")
@@ -13,17 +86,12 @@ def scrape_with_selenium(bot, name, starting_page, log_callback, session_id, ses
     os.makedirs(OUTPUTDIR, exist_ok=True)
     try:
         log_callback("[DEBUG] Scraper started")
-        # 1. Copy cookies from Selenium to Requests
-        cookies = bot.get_cookies()
-        session_req = requests.Session()
-        for cookie in cookies:
-            session_req.cookies.set(cookie['name'], cookie['value'])
+        # 1. Pooled session carrying the browser's cookies
+        session_req = session_from_driver(bot, pool_size=IREPS_CONCURRENCY, referer=BASE_URL)
         # 2. Define request parameters
-        base_url = "https://www.ireps.gov.in/epsn/anonymSearch.do"
         headers = {
-            "User-Agent": "Mozilla/5.0",
             "Content-Type": "application/x-www-form-urlencoded",
-            "Referer": "https://www.ireps.gov.in/epsn/anonymSearch.do"
+            "Referer": BASE_URL
         }
         today = datetime.today().strftime("%d/%m/%Y")
         payload = {
@@ -43,91 +111,76 @@ def scrape_with_selenium(bot, name, starting_page, log_callback, session_id, ses
             "selectDate": "TENDER_OPENING_DATE",
             "submit": "All Active Tenders"
         }
-        # 3. Loop through all pages and save each page to its own Excel file
+        limiter = RateLimiter(IREPS_RATE)
+        # 3. Keep up to IREPS_CONCURRENCY pages in flight, write them in page
+        # order and stop at the first page without data
         page = int(starting_page)
+        next_page = page
+        inflight = {}
+        reauthed = False
         output_files = []
-        while True:
-            # Check for stop flag
-            if session and session.get("stop_flag", False):
-                log_callback("🛑 Scraping stopped by user")
-                print("[DEBUG] Stop flag detected, breaking loop")
-                break
-            payload["pageNo"] = str(page)
-            # Retry logic for request
-            max_retries = 3
-            retry_delay = 5  # seconds
-            for attempt in range(max_retries):
-                try:
-                    print(f"[DEBUG] Requesting page {page}, attempt {attempt+1}")
-                    response = session_req.post(base_url, headers=headers, data=payload, timeout=15)
-                    break  # Success
-                except requests.exceptions.RequestException as e:
-                    log_callback(f"⚠️ Error on page {page}, attempt {attempt+1}: {e}")
-                    print(f"[ERROR] RequestException on page {page}, attempt {attempt+1}: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay)
-                    else:
-                        log_callback("❌ Maximum retry attempts reached. Exiting.")
-                        print("[ERROR] Maximum retry attempts reached. Exiting loop.")
-                        return output_files
-            soup = BeautifulSoup(response.text, "html.parser")
-            # Check for session timeout or redirect
-            if soup.title and "Login" in soup.title.string:
-                log_callback("🔒 Session appears to have expired. Please restart and log in again.")
-                print("[DEBUG] Session expired detected in HTML.")
-                break
-            # Locate the target table
-            tables = soup.find_all("table")
-            target_table = None
-            header_index = None
-            for table in tables:
-                rows = table.find_all("tr")
-                for idx, row in enumerate(rows):
-                    cells = [cell.get_text(strip=True) for cell in row.find_all(["td", "th"])]
-                    if any("Deptt./Rly. Unit" in cell for cell in cells):
-                        target_table = table
-                        header_index = idx
-                        break
-                if target_table:
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=IREPS_CONCURRENCY)
+        try:
+            while True:
+                # Check for stop flag
+                if _stopped(session):
+                    log_callback("🛑 Scraping stopped by user")
+                    print("[DEBUG] Stop flag detected, breaking loop")
                     break
-            if not target_table or header_index is None:
-                log_callback(f"📭 No more data found on page {page}. Stopping.")
-                print(f"[DEBUG] No target table found on page {page}, breaking loop.")
-                break
-            rows = target_table.find_all("tr")
-            page_data = []
-            for row in rows[header_index + 1:]:
-                cols = [cell.get_text(strip=True) for cell in row.find_all("td")]
-                if cols:
-                    page_data.append(cols)
-            if page_data:
-                df = pd.DataFrame(page_data)
-                df = df.iloc[32:56, 0:7]  # Keep only first 7 columns
-                df.columns = [
-                    "Deptt./Rly. Unit",
-                    "Tender No",
-                    "Tender Title",
-                    "Status",
-                    "Work Area",
-                    "Due Date/Time",
-                    "Due Days"
-                ]
-                PATH = os.path.join(OUTPUTDIR, f"tenders_page_{page}.xlsx")
-                print(f"[DEBUG] Saving Excel file to: {PATH}")
+                while len(inflight) < IREPS_CONCURRENCY:
+                    inflight[next_page] = executor.submit(
+                        fetch_results_page, session_req, next_page, payload, headers, limiter, session)
+                    next_page += 1
                 try:
-                    df.to_excel(PATH, index=False)
-                    print(f"[DEBUG] Saved Excel file: {PATH}")
+                    page_rows, expired = _result(inflight.pop(page), session)
+                except Cancelled:
+                    continue
                 except Exception as e:
-                    print(f"[ERROR] Exception saving Excel file: {e}")
-                    log_callback(f"[ERROR] Exception saving Excel file: {e}")
-                output_files.append(PATH)
-                log_callback(f"✅ Saved page {page} to '{PATH}'")
-            else:
-                log_callback(f"📭 Page {page} had no data rows. Stopping.")
-                print(f"[DEBUG] Page {page} had no data rows, breaking loop.")
-                break
-            page += 1
-            time.sleep(3)  # Be polite to the server
+                    log_callback(f"⚠️ Error on page {page}: {e}")
+                    log_callback("❌ Maximum retry attempts reached. Exiting.")
+                    print(f"[ERROR] Page {page} failed after {IREPS_RETRIES} attempts: {e}")
+                    break
+                # Check for session timeout or redirect
+                if expired:
+                    # Pages already in flight used the same stale cookies
+                    _cancel(inflight)
+                    next_page = page
+                    if reauthed or not reauthenticate(bot, session_req, log_callback):
+                        log_callback("🔒 Session appears to have expired. Please restart and log in again.")
+                        print("[DEBUG] Session expired detected in HTML.")
+                        break
+                    reauthed = True
+                    continue
+                reauthed = False
+                if page_rows is None:
+                    log_callback(f"📭 No more data found on page {page}. Stopping.")
+                    print(f"[DEBUG] No target table found on page {page}, breaking loop.")
+                    break
+                if page_rows:
+                    PATH = os.path.join(OUTPUTDIR, f"tenders_page_{page}.xlsx")
+                    print(f"[DEBUG] Saving Excel file to: {PATH}")
+                    try:
+                        # NDJSON sink, the workbook is built when downloaded
+                        write_rows(PATH, page_rows, COLUMNS)
+                        print(f"[DEBUG] Saved Excel file: {PATH}")
+                    except Exception as e:
+                        print(f"[ERROR] Exception saving Excel file: {e}")
+                        log_callback(f"[ERROR] Exception saving Excel file: {e}")
+                    output_files.append(PATH)
+                    log_callback(f"✅ Saved page {page} to '{PATH}'")
+                else:
+                    log_callback(f"📭 Page {page} had no data rows. Stopping.")
+                    print(f"[DEBUG] Page {page} had no data rows, breaking loop.")
+                    break
+                page += 1
+        finally:
+            # Pages past the last one (or everything, on stop) are not needed
+            _cancel(inflight)
+            executor.shutdown(wait=False, cancel_futures=True)
+        elapsed = time.monotonic() - started
+        print(f"[METRIC] IREPS: {len(output_files)} pages in {elapsed:.1f}s "
+              f"({IREPS_CONCURRENCY} in flight, {IREPS_RATE} req/s)")
         print(f"[DEBUG] scrape_with_selenium finished, output_files: {output_files}")
         return output_files
     except Exception as e:
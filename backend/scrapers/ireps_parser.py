@@ -0,0 +1,232 @@
+"""
+IREPS search results parser.
+
+The results table is nested inside layout tables, so instead of walking every
+<table>/<tr> and slicing rows by position this finds the header row that
+holds the "Deptt./Rly. Unit" text and reads the data rows next to it, with
+lxml and one XPath when lxml is installed (BeautifulSoup otherwise).
+
+    rows, expired = parse_results(html)          # list of dicts, one per tender
+
+``fixtures/ireps/`` holds synthetic pages in the results layout the old
+``iloc[32:56]`` slice was written for (full pages, a short last page, a page
+past the end, the login page) with their expected outcome in
+``expected.json``. Set IREPS_SAVE_FIXTURES=1 to keep real result pages there
+too; pages not listed in expected.json must parse exactly like the old slice.
+
+    python ireps_parser.py                   # check the fixtures, then benchmark
+    python ireps_parser.py page.html ...     # benchmark these pages only
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BASE_DIR, "fixtures", "ireps")
+SAVE_FIXTURES = os.environ.get("IREPS_SAVE_FIXTURES", "0") == "1"
+
+HEADER_TEXT = "Deptt./Rly. Unit"
+COLUMNS = [
+    "Deptt./Rly. Unit",
+    "Tender No",
+    "Tender Title",
+    "Status",
+    "Work Area",
+    "Due Date/Time",
+    "Due Days",
+]
+
+# The innermost row holding the header text
+_HEADER_ROW_XPATH = f"//text()[contains(., '{HEADER_TEXT}')]/ancestor::tr[1]"
+# Rows of that row's own table, not of tables nested in it
+_TABLE_ROWS_XPATH = "ancestor::table[1]/tr | ancestor::table[1]/*/tr"
+
+
+def _cell_text(cell):
+    # Same text as BeautifulSoup get_text(strip=True)
+    return "".join(part.strip() for part in cell.itertext())
+
+
+def _row_dict(cells):
+    return dict(zip(COLUMNS, cells[:len(COLUMNS)]))
+
+
+def _is_data_row(cells):
+    return len(cells) >= len(COLUMNS) and cells[0] and cells[0] != HEADER_TEXT
+
+
+def is_login_page(title):
+    return bool(title) and "Login" in title
+
+
+def _parse_lxml(html):
+    tree = lxml_html.fromstring(html)
+    title = tree.findtext(".//title")
+    if is_login_page(title):
+        return [], True
+    header_rows = tree.xpath(_HEADER_ROW_XPATH)
+    if not header_rows:
+        return None, False
+    rows = []
+    # The header text can also show up outside the results table, take the
+    # first header row that has data rows after it
+    for header in header_rows:
+        table_rows = header.xpath(_TABLE_ROWS_XPATH)
+        after = table_rows[table_rows.index(header) + 1:] if header in table_rows else []
+        for tr in after:
+            cells = [_cell_text(td) for td in tr.iterchildren("td")]
+            if _is_data_row(cells):
+                rows.append(_row_dict(cells))
+        if rows:
+            break
+    return rows, False
+
+
+def _parse_soup(html):
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.title and is_login_page(soup.title.string):
+        return [], True
+    header_rows = [text.find_parent("tr") for text in soup.find_all(string=lambda s: s and HEADER_TEXT in s)]
+    header_rows = [tr for tr in header_rows if tr is not None]
+    if not header_rows:
+        return None, False
+    rows = []
+    for header in header_rows:
+        table = header.find_parent("table")
+        table_rows = [tr for tr in table.find_all("tr") if tr.find_parent("table") is table]
+        after = table_rows[table_rows.index(header) + 1:] if header in table_rows else []
+        for tr in after:
+            cells = [td.get_text(strip=True) for td in tr.find_all("td", recursive=False)]
+            if _is_data_row(cells):
+                rows.append(_row_dict(cells))
+        if rows:
+            break
+    return rows, False
+
+
+def parse_results(html):
+    """``(rows, session_expired)`` for one results page.
+
+    ``rows`` is None when the page has no results table at all (past the last
+    page), else a list of dicts keyed by COLUMNS.
+    """
+    if lxml_html is not None:
+        return _parse_lxml(html)
+    return _parse_soup(html)
+
+
+def parse_results_legacy(html):
+    """The previous table walk + ``iloc[32:56]`` slice, kept for benchmarks."""
+    soup = BeautifulSoup(html, "html.parser")
+    target_table = None
+    header_index = None
+    for table in soup.find_all("table"):
+        rows = table.find_all("tr")
+        for idx, row in enumerate(rows):
+            cells = [cell.get_text(strip=True) for cell in row.find_all(["td", "th"])]
+            if any(HEADER_TEXT in cell for cell in cells):
+                target_table = table
+                header_index = idx
+                break
+        if target_table:
+            break
+    if target_table is None:
+        return None
+    page_data = []
+    for row in target_table.find_all("tr")[header_index + 1:]:
+        cols = [cell.get_text(strip=True) for cell in row.find_all("td")]
+        if cols:
+            page_data.append(cols)
+    return [_row_dict(cols[:7]) for cols in page_data[32:56]]
+
+
+def save_fixture(html, page):
+    """Keep a raw result page for benchmarks (IREPS_SAVE_FIXTURES=1)."""
+    if not SAVE_FIXTURES:
+        return None
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"page_{page}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    return path
+
+
+def check_fixtures(fixture_dir=FIXTURE_DIR):
+    """Compare parse_results with the expected outcome of each fixture page,
+    and with parse_results_legacy where the old slice was right. Returns the
+    list of failures."""
+    expected_path = os.path.join(fixture_dir, "expected.json")
+    expected = {}
+    if os.path.exists(expected_path):
+        with open(expected_path, encoding="utf-8") as f:
+            expected = json.load(f)
+    failures = []
+    paths = sorted(glob.glob(os.path.join(fixture_dir, "*.html")))
+    for path in paths:
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+        rows, expired = parse_results(page)
+        spec = expected.get(name, {"matches_legacy": True})
+        if "rows" in spec and (None if rows is None else len(rows)) != spec["rows"]:
+            failures.append(f"{name}: {None if rows is None else len(rows)} rows, expected {spec['rows']}")
+        if "expired" in spec and expired != spec["expired"]:
+            failures.append(f"{name}: expired={expired}, expected {spec['expired']}")
+        if spec.get("matches_legacy") and rows != parse_results_legacy(page):
+            failures.append(f"{name}: rows differ from the legacy parser")
+    for failure in failures:
+        print(f"[ERROR] IREPS FIXTURE {failure}")
+    print(f"[INFO] IREPS FIXTURES: {len(paths) - len({f.split(':')[0] for f in failures})}/{len(paths)} pages OK "
+          f"({'lxml' if lxml_html is not None else 'bs4'})")
+    return failures
+
+
+def benchmark(paths, repeat=5):
+    """Average per-page parse time of the legacy and the new parser."""
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        print("[WARNING] No IREPS fixtures to benchmark")
+        return None
+
+    def timed(parse):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            results = [parse(page) for page in pages]
+        return (time.perf_counter() - started) / (repeat * len(pages)), results
+
+    legacy_time, legacy_rows = timed(parse_results_legacy)
+    new_time, new_rows = timed(lambda page: parse_results(page)[0])
+    mismatched = sum(1 for old, new in zip(legacy_rows, new_rows) if old != new)
+    result = {
+        "pages": len(pages),
+        "legacy_ms": round(legacy_time * 1000, 2),
+        "new_ms": round(new_time * 1000, 2),
+        "speedup": round(legacy_time / new_time, 1) if new_time else None,
+        "parser": "lxml" if lxml_html is not None else "bs4",
+        "mismatched_pages": mismatched,
+    }
+    print(f"[METRIC] IREPS PARSE: legacy {result['legacy_ms']} ms/page, {result['parser']} {result['new_ms']} ms/page "
+          f"({result['speedup']}x) over {len(pages)} pages, {mismatched} pages with different rows")
+    return result
+
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        benchmark(sys.argv[1:])
+    else:
+        failed = check_fixtures()
+        benchmark(sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))))
+        sys.exit(1 if failed else 0)
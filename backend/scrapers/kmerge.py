@@ -74,82 +74,68 @@
 # """
 
 import os
-import glob
-import pandas as pd
-import fnmatch
+import argparse
+try:
+    from .output_sink import list_outputs
+    from .merge_engine import merge_outputs
+except ImportError:
+    from output_sink import list_outputs
+    from merge_engine import merge_outputs
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, "kpp")
 GOODS_DIR = os.path.join(OUTPUT_DIR, "goods")
 WORK_DIR = os.path.join(OUTPUT_DIR, "works")
 SERVICES_DIR = os.path.join(OUTPUT_DIR, "services")
-
-def merge_files_in_dir(dir_path, output_file_name):
-    dataframes = []
-    for root, dirs, files in os.walk(dir_path):
-        for file in files:
-            if file.endswith('.xlsx'):
-                file_path = os.path.join(root, file)
-                try:
-                    df = pd.read_excel(file_path, engine='openpyxl')
-                    dataframes.append(df)
-                except Exception as e:
-                    print(f"Error reading {file_path}: {e}")
-    if dataframes:
-        merged_df = pd.concat(dataframes, ignore_index=True)
-        output_file_path = os.path.join(dir_path, output_file_name)
-        merged_df.to_excel(output_file_path, index=False)
+SECTIONS = ["goods", "works", "services"]
+MERGED_NAMES = ['goods_merged.xlsx', 'works_merged.xlsx', 'services_merged.xlsx']
+
+def merge_files_in_dir(dir_path, output_file_name, output_dir=OUTPUT_DIR):
+    """Merge a section directory's files and that section's rows of the
+    combined kppp_tenders_* outputs kpp.py wrote to ``output_dir``."""
+    section = os.path.basename(dir_path)
+    paths = [file_path for name, file_path in list_outputs(dir_path).items() if name != output_file_name]
+    paths += list(list_outputs(output_dir, "kppp_tenders_*.xlsx").values())
+    output_file_path = os.path.join(dir_path, output_file_name)
+    # "where" only filters files that have a section column
+    result = merge_outputs(paths, output_file_path, spec={"where": {"section": section}}, build=True,
+                           read_kwargs={"engine": "openpyxl"})
+    if result["merged"]:
         print(f"Merged file saved to {output_file_path}")
     else:
         print("No valid Excel files were found to merge.")
 
-def merge_all_merged_files():
-    dataframes = []
-    for file in os.listdir(OUTPUT_DIR):
-        if file in ['goods_merged.xlsx', 'works_merged.xlsx', 'services_merged.xlsx']:
-            file_path = os.path.join(OUTPUT_DIR, file)
-            try:
-                df = pd.read_excel(file_path, engine='openpyxl')
-                dataframes.append(df)
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-    if dataframes:
-        merged_df = pd.concat(dataframes, ignore_index=True)
-        output_file_path = os.path.join(OUTPUT_DIR, 'all_merged.xlsx')
-        merged_df.to_excel(output_file_path, index=False)
+def merge_all_merged_files(output_dir=OUTPUT_DIR):
+    # Section merges live in their section directory, older runs left them in output_dir;
+    # other runs' subdirectories are not walked
+    candidates = [os.path.join(output_dir, section, f"{section}_merged.xlsx") for section in SECTIONS]
+    candidates += [os.path.join(output_dir, name) for name in MERGED_NAMES]
+    paths = [file_path for file_path in candidates if os.path.exists(file_path)]
+    output_file_path = os.path.join(output_dir, 'all_merged.xlsx')
+    result = merge_outputs(paths, output_file_path, build=True, read_kwargs={"engine": "openpyxl"})
+    if result["merged"]:
         print(f"All merged file saved to {output_file_path}")
     else:
         print("No valid merged Excel files were found.")
 
 def main():
-    section = input("Choose option (goods/works/services) or press enter to merge all: ").strip().lower()
-    if section == "goods":
-        merge_files_in_dir(GOODS_DIR, "goods_merged.xlsx")
-    elif section == "works":
-        merge_files_in_dir(WORK_DIR, "works_merged.xlsx")
-    elif section == "services":
-        merge_files_in_dir(SERVICES_DIR, "services_merged.xlsx")
+    parser = argparse.ArgumentParser(description="Merges the KPPP scraper's output files.")
+    parser.add_argument("--section", choices=SECTIONS + ["all"], required=False,
+                        help="Section to merge, asked for when not given.")
+    parser.add_argument("--run_id", type=str, required=False, default="",
+                        help="Merge the outputs of kpp.py --run_id, under kpp/<run_id>.")
+    args = parser.parse_args()
+
+    output_dir = os.path.join(OUTPUT_DIR, args.run_id) if args.run_id else OUTPUT_DIR
+    section = args.section
+    if section is None:
+        section = input("Choose option (goods/works/services) or press enter to merge all: ").strip().lower()
+    if section in SECTIONS:
+        merge_files_in_dir(os.path.join(output_dir, section), f"{section}_merged.xlsx", output_dir)
     else:
-        merge_files_in_dir(GOODS_DIR, "goods_merged.xlsx")
-        merge_files_in_dir(WORK_DIR, "works_merged.xlsx")
-        merge_files_in_dir(SERVICES_DIR, "services_merged.xlsx")
+        for name in SECTIONS:
+            merge_files_in_dir(os.path.join(output_dir, name), f"{name}_merged.xlsx", output_dir)
         # Merge all merged files
-        dataframes = []
-        for root, dirs, files in os.walk(OUTPUT_DIR):
-            for file in files:
-                if file.endswith('_merged.xlsx'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        df = pd.read_excel(file_path, engine='openpyxl')
-                        dataframes.append(df)
-                    except Exception as e:
-                        print(f"Error reading {file_path}: {e}")
-        if dataframes:
-            merged_df = pd.concat(dataframes, ignore_index=True)
-            output_file_path = os.path.join(OUTPUT_DIR, 'all_merged.xlsx')
-            merged_df.to_excel(output_file_path, index=False)
-            print(f"All merged file saved to {output_file_path}")
-        else:
-            print("No valid merged Excel files were found.")
+        merge_all_merged_files(output_dir)
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
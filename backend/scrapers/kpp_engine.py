@@ -0,0 +1,276 @@
+"""
+Concurrent KPPP (Karnataka eProcurement) tender crawler.
+
+GOODS, WORKS and SERVICES are crawled at the same time over one keep-alive
+session, under a shared KPPP_RATE requests/second budget and one pool of
+KPPP_CONCURRENCY workers, so a full crawl takes about as long as the slowest
+section instead of the sum of all three.
+
+    session = make_kppp_session()
+    stats = crawl(session, ["goods", "works", "services"], on_page)
+
+Each section first asks for page 0 with the largest page size in
+KPPP_PAGE_SIZES the API accepts, reads the page count from that response and
+then schedules exactly the remaining pages. When the response carries no
+total, pages are fetched a few ahead until a short page comes back.
+
+``on_page(section, page, records)`` is called from the calling thread, so the
+caller can append to one sink without locking.
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+try:
+    from .http_pool import make_session, RateLimiter, request_with_retry
+except ImportError:
+    from http_pool import make_session, RateLimiter, request_with_retry
+
+KPPP_API = "https://kppp.karnataka.gov.in/supplier-registration-service/v1/api/portal-service"
+KPPP_SITE = "https://kppp.karnataka.gov.in/"
+
+KPPP_CONCURRENCY = int(os.environ.get("KPPP_CONCURRENCY", "6"))
+KPPP_RATE = float(os.environ.get("KPPP_RATE", "5"))
+KPPP_RETRIES = int(os.environ.get("KPPP_RETRIES", "4"))
+KPPP_TIMEOUT = int(os.environ.get("KPPP_TIMEOUT", "30"))
+# Page sizes to try, largest first; the portal UI itself asks for 18/19
+KPPP_PAGE_SIZES = [int(s) for s in os.environ.get("KPPP_PAGE_SIZES", "500,200,100,50,19").split(",") if s.strip()]
+
+KPPP_TOKEN = os.environ.get(
+    "KPPP_TOKEN",
+    "eyJhbGciOiJSUzI1NiIsInR5cCIgOiAiSldUIiwia2lkIiA6ICI0SlRLQW1QY2dFNFJtRFBvWC0tdXowN2hkQUJDcXpBOXAya3pSOWd1cjBVIn0.eyJleHAiOjE2ODE4ODgwNTIsImlhdCI6MTY4MTg4NDQ1MiwiYXV0aF90aW1lIjoxNjgxODgyNjgyLCJqdGkiOiJiZWEyYzkxYy0xN2QwLTRiOTctODE2NC1iMTZiNDIzMDFlMmYiLCJpc3MiOiJodHRwczovL3d3dy5nb2stZXByb2MyLmluL2F1dGgvcmVhbG1zL2Vwcm9jdXJlbWVudC1kZXYiLCJhdWQiOiJhY2NvdW50Iiwic3ViIjoiOTNiMzcwNWMtMWE0My00OWY1LWE2OTEtZjQwYWE2MmJhN2JmIiwidHlwIjoiQmVhcmVyIiwiYXpwIjoiZXByb2MtYXV0aCIsIm5vbmNlIjoiMGRjMmI3MmQtNWU3NC00OGMwLTgwNTEtNDUzYzI3ZDkyODhiIiwic2Vzc2lvbl9zdGF0ZSI6IjIwM2UwZGRlLTlmMDEtNDMyOS1hZDU3LWY5ZGFiN2IzNDQ5ZSIsImFsbG93ZWQtb3JpZ2lucyI6WyJodHRwczovL3d3dy5nb2stZXByb2MyLmluLyoiLCIqIl0sInJlYWxtX2FjY2VzcyI6eyJyb2xlcyI6WyJvZmZsaW5lX2FjY2VzcyIsInVtYV9hdXRob3JpemF0aW9uIl19LCJyZXNvdXJjZV9hY2Nlc3MiOnsiYWNjb3VudCI6eyJyb2xlcyI6WyJtYW5hZ2UtYWNjb3VudCIsIm1hbmFnZS1hY2NvdW50LWxpbmtzIiwidmlldy1wcm9maWxlIl19fSwic2NvcGUiOiJvcGVuaWQgZW1haWwgcHJvZmlsZSIsInNpZCI6IjIwM2UwZGRlLTlmMDEtNDMyOS1hZDU3LWY5ZGFiN2IzNDQ5ZSIsImVtYWlsX3ZlcmlmaWVkIjpmYWxzZSwidXNlclR5cGUiOiJTIiwicHJlZmVycmVkX3VzZXJuYW1lIjoiczEwMDE3In0.SqnoDJ_77XzajQ7oBlXSpLzTVnjMdx3Dp87nEBPL9Yt-s54-wn4dDavGpTW2gLPwqT0F3fMd0gkeubXIQBddpM-2Ju27r4s4wbR6DuGnueNbCcQFaRQAWrb7xi37qdZIe1TulrcBdkbHAGt7MKLmXUCM7PNY9MM9XtzWRiC2Vz82yA2VxiKdKS7SHwF6agDE0oMa2OYvrviJw_JYYEggT2RFOgaiyu3_3SFxK3G96v9D5gezTK1_P4te7ZJy9M5yI_dHv-p8ghO-BgKiEwe2kNV6rhWgD-i1fD2-Kge92bY4yrk4b8rBoRk20yE_2ukZ2w_VY68q-ztVPgGWHjtZBA",
+)
+
+HEADERS = {
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Content-Type": "application/json",
+    "Origin": "https://kppp.karnataka.gov.in",
+    "Post": "CONTRACTOR-EPROC-CONTRACTOR",
+    "Referer": KPPP_SITE,
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+    "sec-ch-ua": '"Chromium";v="128", "Not;A=Brand";v="24", "Google Chrome";v="128"',
+    "sec-ch-ua-mobile": "?0",
+    "sec-ch-ua-platform": '"Windows"',
+}
+
+_COMMON_FILTERS = {
+    "tenderNumber": "",
+    "status": "PUBLISHED",
+    "publishedFromDate": None,
+    "publishedToDate": None,
+    "title": "",
+    "location": None,
+    "tenderClosureFromDate": None,
+    "tenderClosureToDate": None,
+}
+
+# section -> (search endpoint, request body)
+SECTIONS = {
+    "goods": (f"{KPPP_API}/search-eproc-tenders", dict(_COMMON_FILTERS, category="GOODS")),
+    "works": (f"{KPPP_API}/works/search-eproc-tenders", dict(_COMMON_FILTERS, category="WORKS", workCategoryId=None)),
+    "services": (f"{KPPP_API}/services/search-eproc-tenders", dict(_COMMON_FILTERS, category="SERVICES", tenderType="OPEN")),
+}
+
+# Keys the search response may carry its totals under
+_TOTAL_PAGES_KEYS = ("totalPages", "totalPage", "pageCount")
+_TOTAL_RECORDS_KEYS = ("totalElements", "totalRecords", "totalCount", "total", "count")
+
+
+def make_kppp_session(pool_size=None, token=None):
+    headers = dict(HEADERS, Authorization=f"Bearer {token or KPPP_TOKEN}")
+    return make_session(pool_size or max(KPPP_CONCURRENCY, 1), headers)
+
+
+def make_limiter(rate=None):
+    rate = KPPP_RATE if rate is None else rate
+    return RateLimiter(rate, burst=max(1, KPPP_CONCURRENCY))
+
+
+def records_of(body):
+    """Tender dicts of a search response (``{"data": [...]}`` or a bare list)."""
+    if isinstance(body, dict):
+        data = body.get("data", [])
+    else:
+        data = body
+    if not isinstance(data, list):
+        print("[WARNING] Unexpected KPPP response format.")
+        return []
+    if not all(isinstance(item, dict) for item in data):
+        print("[WARNING] KPPP response list does not contain dictionaries.")
+        return []
+    return data
+
+
+def _find_total(body, keys):
+    if not isinstance(body, dict):
+        return None
+    for holder in (body, body.get("page"), body.get("pageable"), body.get("meta")):
+        if not isinstance(holder, dict):
+            continue
+        for key in keys:
+            value = holder.get(key)
+            if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+                return int(value)
+    return None
+
+
+def page_count(body, page_size):
+    """Pages in the section, or None when the response does not say."""
+    pages = _find_total(body, _TOTAL_PAGES_KEYS)
+    if pages is not None:
+        return pages
+    records = _find_total(body, _TOTAL_RECORDS_KEYS)
+    if records is not None:
+        return math.ceil(records / page_size) if page_size else 0
+    return None
+
+
+def fetch_page(session, section, page, size, limiter=None, retries=None):
+    """Raw JSON body of one 0-based search page."""
+    url, body = SECTIONS[section]
+    return request_with_retry(
+        session, "POST", url,
+        retries=KPPP_RETRIES if retries is None else retries,
+        limiter=limiter,
+        parse=lambda response: response.json(),
+        label=f"KPPP {section} page {page}",
+        json=body,
+        params={"page": str(page), "size": str(size), "order-by-tender-publish": "true"},
+        timeout=KPPP_TIMEOUT,
+    )
+
+
+def probe(session, section, limiter=None, sizes=None):
+    """Fetch page 0 with the largest accepted page size.
+
+    Returns ``(size, pages, records)``. ``size`` is what the server actually
+    returned per page when it caps the request below what was asked for;
+    ``pages`` is None when the response has no totals. Without totals a
+    short page 0 is taken as the cap too, so the section runs until the
+    first short or empty page rather than stopping after page 0.
+    """
+    sizes = sizes or KPPP_PAGE_SIZES
+    last_error = None
+    for size in sizes:
+        try:
+            body = fetch_page(session, section, 0, size, limiter, retries=1)
+        except requests.HTTPError as e:
+            # Page size rejected, try the next one down
+            print(f"[WARNING] KPPP {section}: size={size} rejected ({e})")
+            last_error = e
+            continue
+        records = records_of(body)
+        total_records = _find_total(body, _TOTAL_RECORDS_KEYS)
+        total_pages = _find_total(body, _TOTAL_PAGES_KEYS)
+        if total_records is not None:
+            capped = total_records > len(records)
+        elif total_pages is not None:
+            capped = total_pages > 1
+        else:
+            capped = True
+        if records and len(records) < size and capped:
+            print(f"[INFO] KPPP {section}: asked for {size} per page, server returns {len(records)}")
+            size = len(records)
+        pages = page_count(body, size)
+        print(f"[INFO] KPPP {section}: page size {size}, {len(records)} records on page 0, "
+              f"{pages if pages is not None else 'unknown'} pages")
+        return size, pages, records
+    raise last_error
+
+
+def crawl(session, sections, on_page, workers=None, limiter=None, max_pages=None, lookahead=None):
+    """Crawl ``sections`` concurrently; ``on_page(section, page, records)`` is
+    called on the calling thread as pages arrive. Returns per-section stats."""
+    workers = workers or KPPP_CONCURRENCY
+    limiter = limiter or make_limiter()
+    lookahead = lookahead or max(1, workers // max(1, len(sections)))
+    started = time.time()
+    stats = {s: {"size": None, "pages": None, "done": 0, "failed": 0, "records": 0} for s in sections}
+    # section -> next page to schedule / last page (exclusive) once known
+    next_page = {}
+    end_page = {}
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit_page(section, page):
+            future = executor.submit(fetch_page, session, section, page, stats[section]["size"], limiter)
+            futures[future] = (section, page)
+
+        def top_up(section):
+            # Keep ``lookahead`` pages of a section without totals in flight
+            in_flight = sum(1 for s, _ in futures.values() if s == section)
+            while in_flight < lookahead and next_page[section] < end_page.get(section, float("inf")):
+                submit_page(section, next_page[section])
+                next_page[section] += 1
+                in_flight += 1
+
+        for section in sections:
+            futures[executor.submit(probe, session, section, limiter)] = (section, None)
+
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                section, page = futures.pop(future)
+                s = stats[section]
+                if future.cancelled():
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[ERROR] KPPP {section} page {page if page is not None else 0}: {e}")
+                    s["failed"] += 1
+                    if page is None:
+                        end_page[section] = 0
+                    elif section not in end_page:
+                        top_up(section)
+                    continue
+                if page is None:
+                    size, pages, records = result
+                    s["size"], s["pages"] = size, pages
+                    page, last = 0, pages
+                    if max_pages is not None:
+                        last = min(last, max_pages) if last is not None else max_pages
+                    next_page[section] = 1
+                    # probe already shrank size to a capped page 0, so only
+                    # an empty page 0 (or the totals) ends the section here
+                    if not records:
+                        last = 1
+                    if last is not None:
+                        end_page[section] = last
+                        for p in range(1, last):
+                            submit_page(section, p)
+                        next_page[section] = last
+                else:
+                    records = records_of(result)
+                if records:
+                    s["done"] += 1
+                    s["records"] += len(records)
+                    on_page(section, page, records)
+                    print(f"[PROGRESS] KPPP {section}: page {page + 1}"
+                          f"{'/' + str(end_page[section]) if section in end_page else ''}, {s['records']} tenders")
+                if section in end_page and s["pages"] is not None:
+                    continue
+                if not records or len(records) < s["size"]:
+                    # A short page is the last one, drop the pages after it
+                    end_page[section] = min(end_page.get(section, page + 1), page + 1)
+                    for other, (sec, p) in list(futures.items()):
+                        if sec == section and p is not None and p > page and other.cancel():
+                            futures.pop(other, None)
+                else:
+                    top_up(section)
+
+    elapsed = time.time() - started
+    for section, s in stats.items():
+        print(f"[METRIC] KPPP {section}: {s['done']} pages of {s['size']}, {s['records']} tenders, "
+              f"{s['failed']} failed")
+    total = sum(s["records"] for s in stats.values())
+    print(f"[METRIC] KPPP: {total} tenders in {elapsed:.1f}s ({len(sections)} sections, {workers} workers)")
+    return stats
@@ -0,0 +1,296 @@
+"""
+One merge engine for every scraper's output files.
+
+Input files (NDJSON sinks or workbooks) are read and normalised in a pool of
+MERGE_WORKERS processes; each file's rows are streamed, in file order, to an
+NDJSON sink as soon as they arrive, so only a few files are ever held in
+memory. The sink is then turned into the requested output:
+
+  * ``.ndjson`` - the sink itself
+  * ``.xlsx``   - the sink next to it, workbook built now (``build=True``) or
+                  on download, as for scraper outputs
+  * ``.csv``    - streamed from the sink, with every column seen
+
+    result = merge_outputs(paths, "merged.csv", spec, progress=on_progress)
+    result["rows"], result["columns"], result["failed"]
+
+``spec`` is a plain dict of vectorised normalisation steps, applied to each
+file in this order (all optional):
+
+    dedupe_before     bool  drop rows already written, across all files, compared
+                            as read (before any step below), like drop_duplicates()
+                            on the raw concatenated files
+    drop_header_rows  list  drop rows that repeat the header, as values
+    where             dict  keep rows whose column equals the value (when the column exists)
+    contains          str   keep rows where any cell contains this text (case-insensitive)
+    drop_columns      list
+    copy_columns      dict  dst -> src, only when dst already exists
+    fill              dict  column -> value, only when the column exists
+    move_before       dict  column -> column it should come before
+    rename            dict  old -> new (duplicate names after renaming keep the first)
+    truncate          dict  column -> length, as strings
+    date_format       dict  column -> strftime format
+    columns           list  keep only these
+    dropna_all        bool  drop rows with no values
+    dedupe            bool  drop rows already written, across all files
+
+``extras`` maps an input path to constant columns added to its rows (source
+file, session...). ``progress(done, total, rows)`` is called after every
+file.
+"""
+
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .output_sink import read_output, read_rows, build_excel, sink_path_for, SINK_EXT
+except ImportError:
+    from output_sink import read_output, read_rows, build_excel, sink_path_for, SINK_EXT
+
+MERGE_WORKERS = int(os.environ.get("MERGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+READ_CHUNK_ROWS = 5000
+# Raw row hash carried from normalize to the writer for ``dedupe_before``
+ROW_HASH_COLUMN = "__row_hash"
+
+
+def _row_hashes(df):
+    # Row hashes over the sorted columns, so column order doesn't matter
+    ordered = df[sorted(df.columns)]
+    try:
+        return pd.util.hash_pandas_object(ordered, index=False)
+    except TypeError:
+        # Nested (list/dict) cells aren't hashable as they are
+        return pd.util.hash_pandas_object(ordered.astype(str), index=False)
+
+
+def normalize(df, spec):
+    """Apply ``spec`` to one file's DataFrame, column-wise."""
+    spec = spec or {}
+    raw_hashes = _row_hashes(df) if spec.get("dedupe_before") and len(df.columns) else None
+    header = spec.get("drop_header_rows")
+    if header and len(df.columns) == len(header) and len(df):
+        repeated = (df.astype(str).to_numpy() == np.array(header, dtype=object)).all(axis=1)
+        df = df[~repeated]
+
+    for column, value in (spec.get("where") or {}).items():
+        if column in df.columns:
+            df = df[df[column] == value]
+    needle = spec.get("contains")
+    if needle and len(df):
+        hits = np.zeros(len(df), dtype=bool)
+        for column in df.columns:
+            hits |= df[column].astype(str).str.contains(needle, case=False, regex=False, na=False).to_numpy()
+        df = df[hits]
+
+    drop = [c for c in spec.get("drop_columns") or [] if c in df.columns]
+    if drop:
+        df = df.drop(columns=drop)
+    df = df.copy()
+    for dst, src in (spec.get("copy_columns") or {}).items():
+        if dst in df.columns and src in df.columns:
+            df[dst] = df[src]
+    for column, value in (spec.get("fill") or {}).items():
+        if column in df.columns:
+            df[column] = value
+    for column, before in (spec.get("move_before") or {}).items():
+        if column in df.columns and before in df.columns:
+            order = [c for c in df.columns if c != column]
+            order.insert(order.index(before), column)
+            df = df[order]
+
+    if spec.get("rename"):
+        df = df.rename(columns=spec["rename"])
+        df = df.loc[:, ~df.columns.duplicated()]
+    for column, length in (spec.get("truncate") or {}).items():
+        if column in df.columns:
+            df[column] = df[column].astype(str).str.slice(0, length)
+    for column, fmt in (spec.get("date_format") or {}).items():
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce").dt.strftime(fmt)
+    if spec.get("columns"):
+        keep = set(spec["columns"])
+        df = df[[c for c in df.columns if c in keep]]
+    if spec.get("dropna_all"):
+        df = df.dropna(how="all")
+
+    # Workbook dates as plain text, the way to_csv wrote them
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+    if raw_hashes is not None:
+        df = df.assign(**{ROW_HASH_COLUMN: raw_hashes.reindex(df.index)})
+    return df
+
+
+def load_file(path, spec=None, extra=None, read_kwargs=None):
+    """Read and normalise one input file (runs in a worker process)."""
+    df = read_output(path, **(read_kwargs or {}))
+    df = normalize(df, spec)
+    for column, value in (extra or {}).items():
+        df[column] = value
+    return df
+
+
+class _SinkWriter:
+    """Appends DataFrame chunks to an NDJSON file, tracking the column union."""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = []
+        self._seen = set()
+        self.rows = 0
+        self._hashes = set()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(path, "w", encoding="utf-8")
+
+    def _drop_written(self, df, hashes=None):
+        hashes = (_row_hashes(df) if hashes is None else hashes).to_numpy()
+        fresh = np.array([h not in self._hashes for h in hashes], dtype=bool)
+        # Duplicates within the chunk itself
+        fresh &= ~pd.Series(hashes).duplicated().to_numpy()
+        self._hashes.update(hashes[fresh].tolist())
+        return df[fresh]
+
+    def write(self, df, dedupe=False):
+        if ROW_HASH_COLUMN in df.columns:
+            # dedupe_before: compare the rows as they were read
+            hashes = df[ROW_HASH_COLUMN]
+            df = df.drop(columns=ROW_HASH_COLUMN)
+            if len(df):
+                df = self._drop_written(df, hashes)
+        elif dedupe and len(df):
+            df = self._drop_written(df)
+        for column in df.columns:
+            if column not in self._seen:
+                self._seen.add(column)
+                self.columns.append(column)
+        if len(df):
+            text = df.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+            self._fh.write(text if text.endswith("\n") else text + "\n")
+            self.rows += len(df)
+        return len(df)
+
+    def close(self):
+        self._fh.close()
+
+
+def _write_csv(sink_path, csv_path, columns):
+    tmp_path = csv_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in read_rows(sink_path):
+            writer.writerow(row)
+    os.replace(tmp_path, csv_path)
+
+
+def _loaded(paths, spec, extras, read_kwargs, workers):
+    """Yield ``(path, DataFrame or exception)`` in input order, keeping at most
+    2 x workers files in flight."""
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            try:
+                yield path, load_file(path, spec, extras.get(path), read_kwargs)
+            except Exception as e:
+                yield path, e
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        queue = iter(paths)
+        for path in queue:
+            pending.append((path, executor.submit(load_file, path, spec, extras.get(path), read_kwargs)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            path, future = pending.popleft()
+            try:
+                yield path, future.result()
+            except Exception as e:
+                yield path, e
+            for next_path in queue:
+                pending.append((next_path, executor.submit(load_file, next_path, spec, extras.get(next_path), read_kwargs)))
+                break
+
+
+def merge_outputs(paths, output_path, spec=None, extras=None, progress=None, workers=None, build=False,
+                  read_kwargs=None):
+    """Merge ``paths`` into ``output_path`` (.csv, .xlsx or .ndjson).
+
+    Returns ``{"output", "rows", "files", "merged", "failed", "columns"}``;
+    ``failed`` lists ``(path, error)`` for files that could not be read.
+    """
+    spec = spec or {}
+    extras = extras or {}
+    workers = MERGE_WORKERS if workers is None else workers
+    started = time.time()
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext == SINK_EXT:
+        sink_path = output_path
+    elif ext == ".xlsx":
+        sink_path = sink_path_for(output_path)
+    else:
+        sink_path = output_path + ".part"
+
+    writer = _SinkWriter(sink_path)
+    failed = []
+    merged = 0
+    try:
+        for done, (path, result) in enumerate(_loaded(list(paths), spec, extras, read_kwargs, workers), 1):
+            if isinstance(result, Exception):
+                print(f"[ERROR] Error reading {path}: {result}")
+                failed.append((path, str(result)))
+            else:
+                writer.write(result, dedupe=spec.get("dedupe", False))
+                merged += 1
+            if progress:
+                progress(done, len(paths), writer.rows)
+    finally:
+        writer.close()
+
+    if ext == ".xlsx":
+        if build:
+            build_excel(sink_path, writer.columns, output_path)
+    elif ext != SINK_EXT:
+        _write_csv(sink_path, output_path, writer.columns)
+        os.remove(sink_path)
+
+    print(f"[METRIC] MERGE: {merged}/{len(paths)} files, {writer.rows} rows -> {os.path.basename(output_path)} "
+          f"in {time.time() - started:.1f}s ({workers} workers)")
+    return {
+        "output": output_path,
+        "rows": writer.rows,
+        "files": len(paths),
+        "merged": merged,
+        "failed": failed,
+        "columns": writer.columns,
+    }
+
+
+def iter_merged(result, chunksize=READ_CHUNK_ROWS):
+    """DataFrame chunks of a merge result, with missing values as None, for
+    inserting into a database without loading the whole file."""
+    output = result["output"]
+    if output.endswith(".csv"):
+        # As text, like the rows that were merged: no per-chunk type guessing
+        # (leading zeros, 5 -> 5.0); only empty cells are missing
+        chunks = pd.read_csv(output, chunksize=chunksize, dtype=str, keep_default_na=False, na_values=[""])
+    else:
+        source = output if output.endswith(SINK_EXT) else sink_path_for(output)
+        chunks = pd.read_json(source, lines=True, chunksize=chunksize, dtype=False, convert_dates=False)
+    for chunk in chunks:
+        chunk = chunk.reindex(columns=result["columns"])
+        yield chunk.astype(object).where(pd.notnull(chunk), None)
+
+
+def load_merged(result):
+    """The whole merge result as one DataFrame."""
+    chunks = list(iter_merged(result))
+    if not chunks:
+        return pd.DataFrame(columns=result["columns"])
+    return pd.concat(chunks, ignore_index=True)
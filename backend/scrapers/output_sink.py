@@ -0,0 +1,227 @@
+"""
+Append-only row sinks for scraper sessions.
+
+Rows are appended as NDJSON (one JSON object per line) to a single open file
+per session and flushed every few rows / seconds, so a crash loses at most
+the last unflushed batch. The Excel workbook is only built from the NDJSON
+when the session finishes or when somebody downloads it.
+
+Page-at-a-time scrapers (gem, ireps, ap, ts) call ``write_rows`` with the
+workbook path they used to write; it writes ``<name>.ndjson`` instead. File
+listings, downloads and merges go through ``list_outputs`` / ``read_output`` /
+``resolve_output`` so they see the workbook name either way. Set
+LAZY_EXCEL=0 to build every workbook straight away.
+"""
+
+import fnmatch
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+SINK_EXT = ".ndjson"
+FLUSH_EVERY = 20
+FLUSH_INTERVAL = 5.0
+LAZY_EXCEL = os.environ.get("LAZY_EXCEL", "1") == "1"
+
+
+def sink_path_for(xlsx_path):
+    return os.path.splitext(xlsx_path)[0] + SINK_EXT
+
+
+def xlsx_path_for(sink_path):
+    return os.path.splitext(sink_path)[0] + ".xlsx"
+
+
+class RowSink:
+    """Thread-safe NDJSON appender with periodic flushes.
+
+    ``on_flush(sink)`` is called after every flush that wrote new rows,
+    which is where callers emit their ``[FILE_WRITTEN]`` progress line.
+    """
+
+    def __init__(self, path, headers, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL, on_flush=None):
+        self.path = path
+        self.headers = list(headers)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.rows_written = 0
+        self._pending = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def append(self, row):
+        if not isinstance(row, dict):
+            row = dict(zip(self.headers, row))
+        line = json.dumps(row, ensure_ascii=False, default=str)
+        with self._lock:
+            self._fh.write(line + "\n")
+            self.rows_written += 1
+            self._pending += 1
+            due = self._pending >= self.flush_every or time.time() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        with self._lock:
+            if self._fh.closed or not self._pending:
+                return
+            self._fh.flush()
+            self._pending = 0
+            self._last_flush = time.time()
+        if self.on_flush:
+            self.on_flush(self)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.close()
+
+
+def read_rows(sink_path):
+    """Yield the dict rows of an NDJSON sink, skipping a torn last line."""
+    with open(sink_path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                print(f"[WARNING] Skipping unreadable row in {os.path.basename(sink_path)}")
+
+
+def load_dataframe(sink_path, headers=None):
+    rows = list(read_rows(sink_path))
+    if headers is None:
+        # Union of keys, for sinks whose rows don't all share one shape
+        return pd.DataFrame(rows)
+    return pd.DataFrame(rows, columns=headers)
+
+
+def build_excel(sink_path, headers=None, xlsx_path=None, date_column=None, date_input_format=None):
+    """Write the sink's rows to an .xlsx next to it. Reuses the workbook if it
+    is already newer than the sink."""
+    xlsx_path = xlsx_path or xlsx_path_for(sink_path)
+    if os.path.exists(xlsx_path) and os.path.getmtime(xlsx_path) >= os.path.getmtime(sink_path):
+        return xlsx_path
+    df = load_dataframe(sink_path, headers)
+    writer = pd.ExcelWriter(xlsx_path, engine='xlsxwriter', date_format="dd-mm-yyyy", datetime_format="dd-mm-yyyy hh:mm:ss")
+    writer.book.strings_to_urls = False
+    if date_column and date_column in df.columns:
+        df[date_column] = pd.to_datetime(df[date_column], format=date_input_format, errors='coerce')
+    df.to_excel(writer, index=False)
+    if date_column and date_column in df.columns:
+        worksheet = writer.sheets[list(writer.sheets.keys())[0]]
+        date_format = writer.book.add_format({'num_format': 'dd-mm-yyyy hh:mm:ss'})
+        date_col_idx = list(df.columns).index(date_column)
+        worksheet.set_column(date_col_idx, date_col_idx, 22, date_format)
+    writer.close()
+    return xlsx_path
+
+
+def write_rows(xlsx_path, rows, headers=None, **build_kwargs):
+    """Write one output file's rows as an NDJSON sink next to ``xlsx_path``.
+
+    The workbook is built on download (or right away with LAZY_EXCEL=0).
+    Returns the path written.
+    """
+    sink_path = sink_path_for(xlsx_path)
+    os.makedirs(os.path.dirname(sink_path) or ".", exist_ok=True)
+    tmp_path = sink_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        for row in rows:
+            if not isinstance(row, dict):
+                row = dict(zip(headers, row))
+            fh.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+    os.replace(tmp_path, sink_path)
+    if not LAZY_EXCEL:
+        return build_excel(sink_path, headers, xlsx_path, **build_kwargs)
+    return sink_path
+
+
+def list_outputs(directory, pattern="*.xlsx"):
+    """Map of workbook name -> file to read, for an output directory.
+
+    Sinks are listed under their workbook name and preferred over a workbook
+    of the same name, which may be a stale build. ``pattern`` matches the
+    workbook name.
+    """
+    outputs = {}
+    if not os.path.isdir(directory):
+        return outputs
+    names = sorted(os.listdir(directory))
+    for name in names:
+        if name.endswith(".xlsx") and fnmatch.fnmatch(name, pattern):
+            outputs[name] = os.path.join(directory, name)
+    for name in names:
+        if name.endswith(SINK_EXT):
+            xlsx_name = os.path.basename(xlsx_path_for(name))
+            if fnmatch.fnmatch(xlsx_name, pattern):
+                outputs[xlsx_name] = os.path.join(directory, name)
+    return outputs
+
+
+def read_output(file_path, **read_kwargs):
+    """DataFrame of a sink or a workbook."""
+    if file_path.endswith(SINK_EXT):
+        return load_dataframe(file_path)
+    return pd.read_excel(file_path, **read_kwargs)
+
+
+def resolve_output(directory, filename, **build_kwargs):
+    """Path of a downloadable workbook, building (and caching) it from its
+    sink if needed."""
+    file_path = os.path.join(directory, filename)
+    sink_path = sink_path_for(file_path)
+    if filename.endswith(".xlsx") and os.path.exists(sink_path):
+        return build_excel(sink_path, xlsx_path=file_path, **build_kwargs)
+    return file_path
+
+
+def output_exists(directory, filename):
+    file_path = os.path.join(directory, filename)
+    return os.path.exists(file_path) or (filename.endswith(".xlsx") and os.path.exists(sink_path_for(file_path)))
+
+
+def remove_output(directory, filename):
+    """Delete a workbook and its sink. Returns False if neither existed."""
+    file_path = os.path.join(directory, filename)
+    removed = False
+    for p in (file_path, sink_path_for(file_path)) if filename.endswith(".xlsx") else (file_path,):
+        if os.path.exists(p):
+            os.remove(p)
+            removed = True
+    return removed
+
+
+# One open sink per output file, shared by every worker thread of a session
+_SINKS = {}
+_SINKS_LOCK = threading.Lock()
+
+
+def open_sink(path, headers, on_flush=None, **kwargs):
+    with _SINKS_LOCK:
+        sink = _SINKS.get(path)
+        if sink is None:
+            sink = RowSink(path, headers, on_flush=on_flush, **kwargs)
+            _SINKS[path] = sink
+        return sink
+
+
+def close_sink(path):
+    with _SINKS_LOCK:
+        sink = _SINKS.pop(path, None)
+    if sink is not None:
+        sink.close()
+    return sink
@@ -0,0 +1,257 @@
+"""
+Remote WebDriver nodes (Selenium Grid / standalone selenium containers).
+
+With REMOTE_WEBDRIVER_NODES set, driver_factory.create_driver starts browsers
+on these nodes instead of on the API host:
+
+    REMOTE_WEBDRIVER_NODES="http://10.0.0.5:4444|4,http://10.0.0.6:4444|8,local|1"
+
+Each entry is ``url|slots`` (slots default to 2). ``local`` is a stand-in node
+that starts the browser on this machine, for tests and single-host setups;
+several stand-ins can be listed as ``local-1``, ``local-2``...
+
+New sessions go to the healthy node with the lowest in_use/slots ratio. A node
+that fails to start a session is skipped for NODE_RETRY_SECONDS.
+
+Captcha sessions are pinned: after ``pin_session(session_id, driver)`` every
+browser created with ``pin=session_id`` (e.g. shard browsers that reuse the
+captcha cookies) lands on the same node, so the portal sees one client.
+"""
+
+import os
+import threading
+import time
+
+from selenium import webdriver
+
+DEFAULT_SLOTS = 2
+NODE_RETRY_SECONDS = 60
+SLOT_TIMEOUT = 120
+LOCAL_NODE = "local"
+
+# CDP over the remote end, the vendor prefix differs per browser
+_CDP_ENDPOINTS = {
+    "chrome": "/session/$sessionId/goog/cdp/execute",
+    "MicrosoftEdge": "/session/$sessionId/ms/cdp/execute",
+    "msedge": "/session/$sessionId/ms/cdp/execute",
+}
+
+
+class NoNodeAvailable(Exception):
+    """Every node is full or down."""
+
+
+class NodeDriver(webdriver.Remote):
+    """Remote driver that gives its node slot back on quit()."""
+
+    node = None
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        endpoint = _CDP_ENDPOINTS.get(self.caps.get("browserName", ""))
+        if endpoint is None:
+            raise NotImplementedError(f"CDP not available for {self.caps.get('browserName')}")
+        executor = self.command_executor
+        if hasattr(executor, "add_command"):
+            executor.add_command("executeCdpCommand", "POST", endpoint)
+        else:
+            executor._commands["executeCdpCommand"] = ("POST", endpoint)
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+    def quit(self):
+        try:
+            super().quit()
+        finally:
+            if self.node is not None:
+                node, self.node = self.node, None
+                node.pool.release(node)
+
+
+class Node:
+    def __init__(self, pool, url, slots=DEFAULT_SLOTS):
+        self.pool = pool
+        self.url = url
+        self.slots = max(1, int(slots))
+        self.in_use = 0
+        self.started = 0
+        self.failures = 0
+        self.down_until = 0
+
+    @property
+    def is_local(self):
+        return self.url == LOCAL_NODE or self.url.startswith(LOCAL_NODE + "-")
+
+    def available(self, now):
+        return self.in_use < self.slots and now >= self.down_until
+
+    def load(self):
+        return self.in_use / self.slots
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "slots": self.slots,
+            "in_use": self.in_use,
+            "started": self.started,
+            "failures": self.failures,
+            "healthy": time.time() >= self.down_until,
+        }
+
+
+def parse_nodes(spec):
+    """``"url|slots,url"`` -> ``[(url, slots), ...]``"""
+    nodes = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, slots = item.partition("|")
+        nodes.append((url.strip().rstrip("/"), int(slots) if slots.strip() else DEFAULT_SLOTS))
+    return nodes
+
+
+class RemoteNodePool:
+    def __init__(self, nodes):
+        self.nodes = [Node(self, url, slots) for url, slots in nodes]
+        self._cond = threading.Condition()
+        self._pins = {}
+
+    # --- slot bookkeeping -------------------------------------------------
+
+    def _reserve(self, pin=None, timeout=SLOT_TIMEOUT):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                if pin is not None and pin in self._pins:
+                    node = self._pins[pin]
+                    candidates = [node] if node.available(now) else []
+                else:
+                    candidates = [n for n in self.nodes if n.available(now)]
+                if candidates:
+                    node = min(candidates, key=Node.load)
+                    node.in_use += 1
+                    return node
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise NoNodeAvailable(f"No WebDriver node slot free after {timeout}s")
+                # Downed nodes come back without a notify, re-check periodically
+                self._cond.wait(min(remaining, 5))
+
+    def release(self, node):
+        with self._cond:
+            node.in_use = max(node.in_use - 1, 0)
+            self._cond.notify_all()
+
+    def _mark_down(self, node, error):
+        print(f"[WARNING] WebDriver node {node.url} failed, skipping it for {NODE_RETRY_SECONDS}s: {error}")
+        with self._cond:
+            node.failures += 1
+            node.down_until = time.time() + NODE_RETRY_SECONDS
+        self.release(node)
+
+    # --- sessions -------------------------------------------------------------
+
+    def acquire(self, options, local_factory=None, pin=None, timeout=SLOT_TIMEOUT):
+        """Start a browser on the least-loaded node (or the pinned one)."""
+        tried = set()
+        while True:
+            node = self._reserve(pin, timeout)
+            if node.url in tried:
+                self.release(node)
+                raise NoNodeAvailable("Every WebDriver node failed to start a session")
+            tried.add(node.url)
+            try:
+                if node.is_local:
+                    driver = local_factory()
+                    driver.remote_node = node.url
+                    # Local drivers free the slot on quit too
+                    self._wrap_local_quit(driver, node)
+                else:
+                    driver = NodeDriver(command_executor=node.url, options=options)
+                    driver.node = node
+                    driver.remote_node = node.url
+            except Exception as e:
+                self._mark_down(node, e)
+                if pin is not None and pin in self._pins:
+                    # A pinned session can't move to another node
+                    raise
+                continue
+            node.started += 1
+            print(f"[INFO] WEBDRIVER NODE {node.url}: session started ({node.in_use}/{node.slots} slots)")
+            return driver
+
+    def _wrap_local_quit(self, driver, node):
+        original_quit = driver.quit
+        released = []
+
+        def quit():
+            try:
+                original_quit()
+            finally:
+                if not released:
+                    released.append(True)
+                    self.release(node)
+
+        driver.quit = quit
+
+    # --- pinning ----------------------------------------------------------------
+
+    def node_of(self, driver):
+        url = getattr(driver, "remote_node", None)
+        for node in self.nodes:
+            if node.url == url:
+                return node
+        return None
+
+    def pin(self, key, driver):
+        node = self.node_of(driver)
+        if node is None:
+            return False
+        with self._cond:
+            self._pins[key] = node
+        return True
+
+    def unpin(self, key):
+        with self._cond:
+            self._pins.pop(key, None)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "nodes": [node.stats() for node in self.nodes],
+                "pinned_sessions": {key: node.url for key, node in self._pins.items()},
+            }
+
+
+_node_pool = None
+_node_pool_lock = threading.Lock()
+
+
+def get_node_pool():
+    """The configured RemoteNodePool, or None when REMOTE_WEBDRIVER_NODES is unset."""
+    global _node_pool
+    with _node_pool_lock:
+        if _node_pool is None:
+            nodes = parse_nodes(os.environ.get("REMOTE_WEBDRIVER_NODES", ""))
+            if not nodes:
+                return None
+            _node_pool = RemoteNodePool(nodes)
+            print(f"[INFO] Using {len(nodes)} WebDriver nodes: {', '.join(url for url, _ in nodes)}")
+        return _node_pool
+
+
+def pin_session(session_id, driver):
+    pool = get_node_pool()
+    if pool is not None:
+        pool.pin(session_id, driver)
+
+
+def unpin_session(session_id):
+    pool = get_node_pool()
+    if pool is not None:
+        pool.unpin(session_id)
+
+
+def node_stats():
+    pool = get_node_pool()
+    return pool.stats() if pool is not None else {"nodes": [], "pinned_sessions": {}}
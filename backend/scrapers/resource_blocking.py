@@ -0,0 +1,161 @@
+"""
+Per-portal network blocking profiles for Selenium drivers.
+
+Detail pages pull in images, fonts and tracker scripts that the scrapers never
+look at. ``apply_profile(driver, "eproc")`` tells a Chromium driver (Edge or
+Chrome) via CDP ``Network.setBlockedURLs`` to drop them. Stylesheets are kept:
+some portals hide/show tabs with CSS and Selenium's clickability checks depend
+on it.
+
+The NIC captcha (``#captchaImage``) is an inline image, so blocking image files
+does not touch it. If a portal ever serves it as a file, ``ensure_captcha_visible``
+lifts the block and reloads before the captcha is read.
+
+Set RESOURCE_BLOCKING=0 to turn blocking off, BLOCK_PROFILE=<name> to force one
+profile everywhere. ``benchmark_profile`` loads a page with and without the
+profile and reports the bytes and load time saved.
+"""
+
+import os
+import threading
+
+IMAGES = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.webp", "*.svg", "*.ico"]
+FONTS = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
+MEDIA = ["*.mp4", "*.webm", "*.mp3", "*.swf"]
+TRACKERS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*addthis.com*",
+]
+
+PROFILES = {
+    "off": [],
+    "eproc": IMAGES + FONTS + MEDIA + TRACKERS,
+    "ireps": IMAGES + FONTS + MEDIA + TRACKERS,
+    # AP/TS have not been checked with images off yet, keep them
+    "ap": FONTS + MEDIA + TRACKERS,
+    "ts": FONTS + MEDIA + TRACKERS,
+}
+
+BLOCKING_ENABLED = os.environ.get("RESOURCE_BLOCKING", "1") == "1"
+FORCED_PROFILE = os.environ.get("BLOCK_PROFILE")
+# Set BLOCKING_BENCH=1 to benchmark the profile on the first page load
+BLOCKING_BENCH = os.environ.get("BLOCKING_BENCH", "0") == "1"
+
+_CAPTCHA_LOADED_JS = """
+var img = document.getElementById('captchaImage');
+if (!img) { return true; }
+return img.complete && img.naturalWidth > 0;
+"""
+
+_PAGE_METRICS_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+var res = performance.getEntriesByType('resource');
+var bytes = nav ? (nav.transferSize || 0) : 0;
+for (var i = 0; i < res.length; i++) { bytes += res[i].transferSize || 0; }
+return {
+    bytes: bytes,
+    requests: res.length + 1,
+    load_ms: nav ? Math.round(nav.loadEventEnd - nav.startTime) : 0
+};
+"""
+
+# profile -> totals from benchmark_profile runs
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def profile_patterns(profile):
+    if FORCED_PROFILE:
+        profile = FORCED_PROFILE
+    if profile not in PROFILES:
+        print(f"[WARNING] Unknown blocking profile {profile}, nothing blocked")
+        return []
+    return PROFILES[profile]
+
+
+def _set_blocked(driver, patterns):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def apply_profile(driver, profile):
+    """Block ``profile``'s resources on ``driver``. Returns False if not applied."""
+    if not BLOCKING_ENABLED:
+        return False
+    if not hasattr(driver, "execute_cdp_cmd"):
+        print("[WARNING] Driver has no CDP support, resource blocking skipped")
+        return False
+    patterns = profile_patterns(profile)
+    try:
+        _set_blocked(driver, patterns)
+    except Exception as e:
+        print(f"[WARNING] Could not apply blocking profile {profile}: {e}")
+        return False
+    driver.blocking_profile = profile
+    print(f"[DEBUG] Blocking profile {profile}: {len(patterns)} URL patterns")
+    return True
+
+
+def clear_blocking(driver):
+    if hasattr(driver, "execute_cdp_cmd"):
+        _set_blocked(driver, [])
+    driver.blocking_profile = None
+
+
+def ensure_captcha_visible(driver):
+    """Lift blocking and reload if the captcha image on the page did not load."""
+    if getattr(driver, "blocking_profile", None) is None:
+        return True
+    if driver.execute_script(_CAPTCHA_LOADED_JS):
+        return True
+    print("[WARNING] Captcha image blocked, reloading without resource blocking")
+    clear_blocking(driver)
+    driver.refresh()
+    return False
+
+
+def page_metrics(driver):
+    """Bytes transferred, request count and load time of the current page."""
+    return driver.execute_script(_PAGE_METRICS_JS) or {"bytes": 0, "requests": 0, "load_ms": 0}
+
+
+def benchmark_profile(driver, url, profile):
+    """Load ``url`` without and then with ``profile`` (cache disabled) and
+    return what the profile saved. The driver keeps the profile afterwards."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+    try:
+        _set_blocked(driver, [])
+        driver.get(url)
+        before = page_metrics(driver)
+        _set_blocked(driver, profile_patterns(profile))
+        driver.get(url)
+        after = page_metrics(driver)
+    finally:
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+    driver.blocking_profile = profile
+    result = {
+        "profile": profile,
+        "bytes_saved": before["bytes"] - after["bytes"],
+        "requests_saved": before["requests"] - after["requests"],
+        "load_ms_saved": before["load_ms"] - after["load_ms"],
+        "before": before,
+        "after": after,
+    }
+    with _stats_lock:
+        totals = _stats.setdefault(profile, {"runs": 0, "bytes_saved": 0, "load_ms_saved": 0})
+        totals["runs"] += 1
+        totals["bytes_saved"] += result["bytes_saved"]
+        totals["load_ms_saved"] += result["load_ms_saved"]
+    print(f"[METRIC] BLOCKING PROFILE {profile}: saved {result['bytes_saved'] / 1024:.0f} KB, "
+          f"{result['requests_saved']} requests, {result['load_ms_saved']} ms on {url}")
+    return result
+
+
+def blocking_stats():
+    with _stats_lock:
+        return {profile: dict(totals) for profile, totals in _stats.items()}
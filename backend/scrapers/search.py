@@ -2,23 +2,25 @@
 import os
 from selenium import webdriver
 from webdriver_manager.chrome import ChromeDriverManager as CM
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 import argparse
+from urllib.parse import urljoin
 
 
 # Here we are importing the attachment downloader
 # module which uses cookies to download
 try:
-    from downloader import *
+    from .downloader import DownloadManager, DOWNLOAD_WORKERS
 except ImportError:
-    print("[WARNING] downloader module not found, attachment download disabled")
-    pass
+    try:
+        from downloader import DownloadManager, DOWNLOAD_WORKERS
+    except ImportError:
+        DownloadManager = None
+        print("[WARNING] downloader module not found, attachment download disabled")
 
 try:
     from cap_solver import solve_captcha
@@ -26,10 +28,62 @@ except ImportError:
     print("[WARNING] cap_solver module not found, captcha solving disabled")
     def solve_captcha(image_data):
         return None
-from time import sleep
+
+try:
+    from .eproc_detail import extract_detail_fields, RoundTripCounter, compare_round_trips
+except ImportError:
+    from eproc_detail import extract_detail_fields, RoundTripCounter, compare_round_trips
+
+try:
+    from .http_pool import session_from_driver, sync_cookies
+    from .eproc_http import fetch_all_detail_fields, HTTP_WORKERS
+except ImportError:
+    from http_pool import session_from_driver, sync_cookies
+    from eproc_http import fetch_all_detail_fields, HTTP_WORKERS
+
+try:
+    from .eproc_shards import get_total_pages, page_url, split_pages, build_workers, run_shards
+except ImportError:
+    from eproc_shards import get_total_pages, page_url, split_pages, build_workers, run_shards
+
+try:
+    from .eproc_prefetch import ListingPrefetcher
+except ImportError:
+    from eproc_prefetch import ListingPrefetcher
+
+try:
+    from .browser_pool import get_pool
+except ImportError:
+    from browser_pool import get_pool
+
+try:
+    from .eproc_checkpoint import ScrapeCheckpoint, date_window
+except ImportError:
+    from eproc_checkpoint import ScrapeCheckpoint, date_window
+
+try:
+    from .resource_blocking import ensure_captcha_visible, benchmark_profile, BLOCKING_BENCH
+except ImportError:
+    from resource_blocking import ensure_captcha_visible, benchmark_profile, BLOCKING_BENCH
+
+try:
+    from .driver_factory import create_driver, minimize, maximize
+except ImportError:
+    from driver_factory import create_driver, minimize, maximize
+
+try:
+    from .waits import wait_dom_ready, wait_for_value, wait_for_windows, log_wait_stats
+except ImportError:
+    from waits import wait_dom_ready, wait_for_value, wait_for_windows, log_wait_stats
+
+try:
+    from .output_sink import open_sink, close_sink, build_excel, xlsx_path_for, SINK_EXT
+except ImportError:
+    from output_sink import open_sink, close_sink, build_excel, xlsx_path_for, SINK_EXT
 import pandas as pd
 from os import path, makedirs
-from datetime import date
+from datetime import date, datetime
+import uuid
 from datetime import timedelta
 # driver = webdriver.Chrome()
 today = date.today()
@@ -41,12 +95,19 @@ today = date.today()
 #NEXT_PAGE_URL = f"{BASE_URL}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp="
 TIMEOUT = 6
 
+# Set EPROC_ROUND_TRIP_BENCH=1 to log old vs new WebDriver round-trips
+# on the first tender of every page
+ROUND_TRIP_BENCH = os.environ.get("EPROC_ROUND_TRIP_BENCH", "0") == "1"
+
 BASE_DIR = path.dirname(path.abspath(__file__))
 OUTPUT_DIR = path.join(BASE_DIR, "OUTPUT")
 DOWNLOAD_DIR = path.join(BASE_DIR, "OUTPUT", "Downloaded_Documents")
 
 ATTACHMENT_PATHS = []
 
+EPROC_HEADERS = (["Bid User", "Tender ID", "Name of Work", "Tender Category", "Department", "Quantity", "EMD", "Exemption", 
+                  "ECV", "State Name", "Location", "Apply Mode", "Website", "Document Link", "Closing Date", "Pincode", "Attachments"])
+
 if not path.exists(DOWNLOAD_DIR):
     makedirs(DOWNLOAD_DIR)
 
@@ -62,9 +123,7 @@ def solve_captcha_attachment(bot:webdriver.Chrome):
     # solved_captcha = solve_captcha(image_data)       
     solvcap=input("enter captcha:").strip()
     bot.find_element(By.ID, "captchaText").send_keys(solvcap)
-
-
-    sleep(2)
+    wait_for_value(bot, By.ID, "captchaText", solvcap, timeout=2, replaces=2)
 
     bot.find_element(By.XPATH, "//input[@title='Submit']").click()
 
@@ -80,17 +139,21 @@ def solve_captcha_attachment(bot:webdriver.Chrome):
         return False
 
 
-def solve_captcha_main(bot:webdriver.Chrome, captcha=None):
+def solve_captcha_main(bot:webdriver.Chrome, captcha=None, captcha_callback=None):
     WebDriverWait(bot, TIMEOUT).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
+    if not ensure_captcha_visible(bot):
+        WebDriverWait(bot, TIMEOUT).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
 
     image_data = bot.find_element(By.ID, "captchaImage").get_attribute("src")
     if captcha is not None:
         solvcap = captcha.strip()
+    elif captcha_callback is not None:
+        # e.g. the batch runner's shared operator queue
+        solvcap = (captcha_callback(image_data) or "").strip()
     else:
         solvcap = input("enter captcha:").strip()       
     bot.find_element(By.ID, "captchaText").send_keys(solvcap)
-    
-    sleep(2)
+    wait_for_value(bot, By.ID, "captchaText", solvcap, timeout=2, replaces=2)
     bot.find_element(By.XPATH, "//input[@title='Search']").click()
 
     print("[BIDALERT INFO] SUBMIT BUTTON CLICKED")
@@ -149,206 +212,70 @@ def select_options(bot:webdriver.Chrome):
         bot.find_element(By.ID, "toDate").clear()
         bot.find_element(By.ID, "toDate").send_keys(new_yesterday2_date)
 
-def get_basic_details(bot:webdriver.Chrome):
-
-    organisation_chain = ""
-    organisation_chain_filter = "Organisation Chain"
-
-    tender_reference_number = ""
-    tender_reference_number_filter = "Tender Reference Number"
-
-    tender_id = ""
-    tender_id_filter = "Tender ID"
-    
-    
-    tender_type = ""
-    tender_type_filter = "Tender Category"
-    
-    tender_category = ""
-    tender_category_filter = "Tender Category"
-
-
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-
-            if organisation_chain_filter == captain_text:
-                organisation_chain = field.text.strip()
-            if tender_reference_number_filter == captain_text:
-                tender_reference_number = field.text.strip()
-            if tender_id_filter == captain_text:
-                tender_id = field.text.strip()
-            
-            if tender_type_filter == captain_text:
-                tender_type = field.text.strip()
-            if tender_category_filter == captain_text:
-                tender_category = field.text.strip()
-            
-
-    return organisation_chain, tender_reference_number, tender_id, tender_category, tender_type
-
-
-def get_fee_details(bot:webdriver.Chrome):
-
-    tender_fee = ""
-    tender_fee_filter = "Tender Fee in ₹"
-
-    fee_payable_to = ""
-    fee_payable_to_filter = "Fee Payable To"
-
-    exepm_allowed = ""
-    exep_filter = "Tender Fee Exemption Allowed"
-
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-
-            if tender_fee_filter == captain_text:
-                tender_fee = field.text.strip()
-            if fee_payable_to_filter == captain_text:
-                fee_payable_to = field.text.strip()
-            if exep_filter == captain_text:
-                exepm_allowed = field.text.strip()
-
-    return tender_fee, fee_payable_to, exepm_allowed
-
-def get_emd_details(bot:webdriver.Chrome):
-    
-    emd_amout = ""
-    emd_amout_filter = "EMD Amount in ₹"
-
-    emd_payable_to = ""
-    emd_payable_to_filter = "EMD Payable To"
-
-    emd_exepm_allowed = ""
-    emd_exepm_allowed_filter = "EMD through BG/ST or EMD Exemption Allowed"
-
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-
-            if emd_amout_filter == captain_text:
-                emd_amout = field.text.strip()
-            if emd_payable_to_filter == captain_text:
-                emd_payable_to = field.text.strip()
-            if emd_exepm_allowed_filter == captain_text:
-                emd_exepm_allowed = field.text.strip()
-
-    return emd_amout, emd_payable_to, emd_exepm_allowed
-
-def get_work_details(bot:webdriver.Chrome):
-    title = ""
-    title_filter = "Title"
-
-    word_desc = ""
-    word_desc_filter = "Work Description"
-
-    tander_value_in = ""
-    tander_value_in_filter = "Tender Value in ₹"
-
-    location = ""
-    location_filter = "Location"
-
-    pincode = ""
-    pincode_filter = "Pincode"   
-   
-    
-    pre_bid_address = ""
-    pre_bid_address_filter = "Pre Bid Meeting Address"
-
-    pre_bid_date = ""
-    pre_bid_date_filter = "Pre Bid Meeting Date"
-
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-
-            if title_filter in captain_text:
-                title = field.text.strip()
-            if tander_value_in_filter in captain_text:
-                tander_value_in = field.text.strip()
-            if location_filter in captain_text:
-                location = field.text.strip()
-            if pincode_filter in captain_text:
-                pincode = field.text.strip()            
-            if pre_bid_address_filter in captain_text:
-                pre_bid_address = field.text.strip()
-            if pre_bid_date_filter in captain_text:
-                pre_bid_date = field.text.strip()
-            if word_desc_filter in captain_text:
-                word_desc = field.text.strip()
-
-    return title, word_desc, tander_value_in, location, pincode, pre_bid_date, pre_bid_address
-
-def get_critical_dates(bot:webdriver.Chrome):
-    
-    published_date = ""
-    published_date_filter = "Published Date"
-
-    bid_sub_end_date = ""
-    bid_sub_end_date_filter = "Bid Submission End Date"
-
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-
-            if published_date_filter == captain_text:
-                published_date = field.text.strip()
-            if bid_sub_end_date_filter == captain_text:
-                bid_sub_end_date = field.text.strip()
-
-    return published_date, bid_sub_end_date
-
-def get_tander_address(bot:webdriver.Chrome):
-
-    address = ""
-    address_filter = "Address"
-
-    page_content = bot.find_element(By.CLASS_NAME, "page_content")
-    tablebgs = page_content.find_elements(By.CLASS_NAME, "tablebg")
-    for tablebg in tablebgs:
-        td_field = tablebg.find_elements(By.CLASS_NAME, "td_field")
-        td_caption = tablebg.find_elements(By.CLASS_NAME, "td_caption")
-
-        for field, captain in zip(td_field, td_caption):
-            captain_text = captain.text.strip()
-
-            if address_filter == captain_text:
-                address = field.text.strip()
-
-    return address
-
-def get_attachment(bot:webdriver.Chrome, tender_id, is_cap_solved=False):
-    global ATTACHMENT_PATHS
+def get_basic_details(bot:webdriver.Chrome, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return (fields["organisation_chain"], fields["tender_reference_number"], fields["tender_id"],
+            fields["tender_category"], fields["tender_type"])
+
+
+def get_fee_details(bot:webdriver.Chrome, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["tender_fee"], fields["fee_payable_to"], fields["fee_exemption_allowed"]
+
+def get_emd_details(bot:webdriver.Chrome, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["emd_amount"], fields["emd_payable_to"], fields["emd_exemption_allowed"]
+
+def get_work_details(bot:webdriver.Chrome, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return (fields["title"], fields["work_description"], fields["tender_value"], fields["location"],
+            fields["pincode"], fields["pre_bid_meeting_date"], fields["pre_bid_meeting_address"])
+
+def get_critical_dates(bot:webdriver.Chrome, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["published_date"], fields["bid_submission_end_date"]
+
+def get_tander_address(bot:webdriver.Chrome, fields=None):
+    if fields is None:
+        fields = extract_detail_fields(bot)
+    return fields["address"]
+
+_DOWNLOADS = None
+# The portal asks for the download captcha once per session
+ATTACHMENT_CAPTCHA_DONE = False
+
+def attachment_downloads(bot):
+    """Shared download manager, on a pooled session with the browser's cookies."""
+    global _DOWNLOADS
+    if _DOWNLOADS is None:
+        _DOWNLOADS = DownloadManager(session_from_driver(bot, pool_size=DOWNLOAD_WORKERS))
+    else:
+        sync_cookies(_DOWNLOADS.session, bot)
+    return _DOWNLOADS
+
+def close_attachment_downloads():
+    """Shut the download pool down at the end of a run and log its counters."""
+    global _DOWNLOADS
+    if _DOWNLOADS is not None:
+        _DOWNLOADS.close()
+        _DOWNLOADS = None
+
+def get_attachment(bot:webdriver.Chrome, tender_id, base_url, is_cap_solved=False):
+    """Download the documents of the tender open in the current (detail)
+    window; returns their file paths, one per line, for the Attachments column."""
+    global ATTACHMENT_PATHS, ATTACHMENT_CAPTCHA_DONE
     ATTACHMENT_PATHS = []
+    if DownloadManager is None:
+        return ""
+    detail_window = bot.current_window_handle
+    window_count = len(bot.window_handles)
     try:
-    
-        doc_links = []
+        downloads = []
         print("[INFO] GETTING DOC LINKS")
 
         a_tags = bot.find_elements(By.XPATH, "//a[starts-with(@id,'DirectLink_')]")
@@ -356,67 +283,57 @@ def get_attachment(bot:webdriver.Chrome, tender_id, is_cap_solved=False):
 
         for a_tag in a_tags:
             try:
-                link =  a_tag.get_attribute("href").strip()
+                link = (a_tag.get_attribute("href") or "").strip()
                 title = a_tag.text
 
                 if len(link) > 0:
                     if ".pdf" in title or "Downlaod" in title or "as zip" in title:
                         
-                        if not link.startswith(BASE_URL):
-                            link = BASE_URL + link
+                        link = urljoin(base_url, link)
 
                         # Here we will get the captcha 1st time when we will try to download
-                        # the attachment We will click the link if captcha is not solved 
-                        # othewise we will use requests to download the attachment
-                        if not is_cap_solved:
-                            # if 'nt' in  os.name:
-                                # a_tag.send_keys(Keys.CONTROL + Keys.ENTER)
-                            # else:
-                                # a_tag.send_keys(Keys.COMMAND + Keys.ENTER)
-                            
-                            # print("[INFO] CLICKED DOC DOWNLOAD LINK:- ", title)
-
+                        # the attachment. Once it is solved (or the portal didn't ask)
+                        # the browser's cookies are enough to download with requests
+                        if not (is_cap_solved or ATTACHMENT_CAPTCHA_DONE):
                             while True:
                                 try:
                                     # solve_captcha_attachment will return True if the capctha was solved
                                     # If it was solved we will call get_attachment with True otherwise False
                                     did_handle_cap = solve_captcha_attachment(bot)
                                     if did_handle_cap:
-                                        return get_attachment(bot, tender_id, True)
+                                        ATTACHMENT_CAPTCHA_DONE = True
+                                        bot.switch_to.window(detail_window)
+                                        return get_attachment(bot, tender_id, base_url, True)
                                 except:
-                                    bot.switch_to.window(bot.window_handles[0])
+                                    ATTACHMENT_CAPTCHA_DONE = True
+                                    bot.switch_to.window(detail_window)
                                     break
 
-                    # Lets download attachment using requests module 
-                    all_cookies = bot.get_cookies()
-                    cookie = all_cookies[0]['value']
-                    # We are download the attachment it will return valid downloaded path
-                    # of the attachment file
-                    file_path = download_file(tender_id, DOWNLOAD_DIR, link, cookie)
-                    if file_path is not None:
-                        ATTACHMENT_PATHS.append(file_path)
+                        # Queue the attachment on the download pool, it streams to disk
+                        # with the browser's cookies while the other links are queued
+                        downloads.append(attachment_downloads(bot).submit(tender_id, DOWNLOAD_DIR, link))
             
-            except:
-                pass
-
-        sleep(2)
-        if len(bot.window_handles) > 1:
-            print("[INFO] CLOSED 2nd WINDOW!")
-            bot.close()
-            sleep(1)
-            bot.switch_to.window(bot.window_handles[0])
+            except Exception as e:
+                print(f"[WARNING] Skipping attachment link of tender {tender_id}: {e}")
 
+        if downloads:
+            ATTACHMENT_PATHS.extend(attachment_downloads(bot).wait(downloads))
 
-        doc_links = list(set(doc_links))
+        # Downloads that open a window do so right away, no need to wait long
+        if wait_for_windows(bot, window_count + 1, timeout=0.5, replaces=2):
+            print("[INFO] CLOSED DOWNLOAD WINDOW!")
+            bot.switch_to.window(bot.window_handles[-1])
+            bot.close()
+        bot.switch_to.window(detail_window)
 
-        return "\n".join(doc_links)
-    except:
-        return []
+        return "\n".join(ATTACHMENT_PATHS)
+    except Exception as e:
+        print(f"[ERROR] Failed to get attachments of tender {tender_id}: {e}")
+        return ""
 
 def save_to_excel(data_list, idx, file_name, session_id=None):
               
-    headers = (["Bid User", "Tender ID", "Name of Work", "Tender Category", "Department", "Quantity", "EMD", "Exemption", 
-                "ECV", "State Name", "Location", "Apply Mode", "Website", "Document Link", "Closing Date", "Pincode", "Attachments"])
+    headers = EPROC_HEADERS
 
     # Debug logging - use print for backend console and log callback if available
     debug_msg = f"[DEBUG] save_to_excel called with session_id: {session_id}"
@@ -431,7 +348,7 @@ def save_to_excel(data_list, idx, file_name, session_id=None):
     # Use session-based directory if session_id is provided
     if session_id:
         # Use the outputs/eproc directory structure
-        session_dir = path.join(path.dirname(BASE_DIR), "outputs", "eproc", session_id)
+        session_dir = session_output_dir(session_id)
         debug_msg = f"[DEBUG] Session directory: {session_dir}"
         print(debug_msg)
         
@@ -485,76 +402,232 @@ def save_to_excel(data_list, idx, file_name, session_id=None):
 
     return file_path
 
-def get_all_detail(bot: webdriver.Chrome, tender_links, base_url, log=None, session_id=None, page_num=1, file_name=None):
-    all_detail = []
-    for idx, link in enumerate(tender_links):
-        msg = f"[BIDALERT INFO] GETTING TENDER [{idx+1}/{len(tender_links)}]"
+def build_tender_row(fields, base_url, attachment_links=""):
+    """Turn an extracted detail map into a row in save_to_excel's header order."""
+    return [
+        '', fields["tender_id"], fields["work_description"], fields["tender_type"], fields["organisation_chain"], '',
+        fields["emd_amount"], fields["emd_exemption_allowed"], fields["tender_value"], '', fields["location"], 'Online',
+        base_url, '', fields["bid_submission_end_date"], fields["pincode"], attachment_links
+    ]
+
+def session_output_dir(session_id):
+    # Runs without a session (the CLI) write to OUTPUT, as save_to_excel did
+    if not session_id:
+        return OUTPUT_DIR
+    return path.join(path.dirname(BASE_DIR), "outputs", "eproc", session_id)
+
+def session_sink_path(session_id, file_name):
+    """One NDJSON sink per session and tender type, e.g. open-tenders_output.ndjson"""
+    stem = file_name.replace("_page-{}.xlsx", "").replace(".xlsx", "")
+    return path.join(session_output_dir(session_id), stem + SINK_EXT)
+
+def run_file_name(file_name):
+    """Per-run file name for runs without a session (the CLI and /scrape/),
+    e.g. open-tenders_output_20240101-093000-1a2b3c_page-{}.xlsx, so a run
+    doesn't append to an earlier run's sink or share one with a concurrent run."""
+    stamp = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    return file_name.replace("_page-{}.xlsx", f"_{stamp}_page-{{}}.xlsx")
+
+def emit_file_written(sink_path, session_id, log=None):
+    # The frontend lists/downloads the workbook name, built from the sink on demand
+    if not session_id:
+        return
+    msg = f"[FILE_WRITTEN] {path.basename(xlsx_path_for(sink_path))} {session_id}"
+    print(msg)
+    if log:
+        log(msg)
+
+def save_tender_file(tender_data, tender_count, total, page_num, file_name, session_id, log=None,
+                     checkpoint=None, link=None):
+    """Append one tender row to the session's sink (no per-tender workbook).
+
+    Returns False if the checkpoint already has this tender. A failed write
+    is raised, and the tender is not counted as scraped.
+    """
+    # Claimed up front so two shards can't both append it
+    if checkpoint is not None and not checkpoint.claim_tender(tender_data[1], link):
+        msg = f"[INFO] TENDER {tender_data[1]} ALREADY SCRAPED, SKIPPING"
         if log:
             log(msg)
-        print(msg)  # Always print for backend terminal
-        bot.execute_script("window.open(arguments[0]);", link)
-        bot.switch_to.window(bot.window_handles[1])
-        try:
-            WebDriverWait(bot, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "page_content")))
-            organisation_chain, _, tender_id, _, tender_category = get_basic_details(bot)
-            _, _, exepm_allowed = get_fee_details(bot)
-            emd_amout, _, emd_exepm_allowed = get_emd_details(bot)
-            title, word_desc, tander_value_in, location, pincode, _, _ = get_work_details(bot)
-            published_date, bid_sub_end_date = get_critical_dates(bot)
-            attachment_links = ""
-            tender_data = [
-                '', tender_id, word_desc, tender_category, organisation_chain, '',
-                emd_amout, emd_exepm_allowed, tander_value_in, '', location, 'Online',
-                base_url, '', bid_sub_end_date, pincode, attachment_links
-            ]
-            all_detail.append(tender_data)
-            
-            # Save individual tender file immediately if session_id is provided
-            if session_id and file_name:
-                try:
-                    tender_count = idx + 1
-                    log_msg = f"[INFO] SAVING TENDER [{tender_count}/{len(tender_links)}] TO EXCEL FILE"
-                    if log:
-                        log(log_msg)
-                    print(log_msg)
-                    
-                    # Create individual tender file name
-                    tender_file_name = file_name.replace("_page-{}.xlsx", f"_page-{page_num}_tender-{tender_count}.xlsx")
-                    excel_path = save_to_excel([tender_data], tender_count, tender_file_name, session_id)
-                    
-                    success_msg = f"[INFO] TENDER [{tender_count}/{len(tender_links)}] SAVED TO EXCEL FILE {excel_path}"
-                    if log:
-                        log(success_msg)
-                    print(success_msg)
-                except Exception as e:
-                    error_msg = f"[ERROR] Failed to save tender {tender_count} file: {e}"
+        print(msg)
+        return False
+    if not file_name:
+        return True
+    try:
+        sink = open_sink(session_sink_path(session_id, file_name), EPROC_HEADERS,
+                         on_flush=lambda s: emit_file_written(s.path, session_id, log))
+        sink.append(tender_data)
+        print(f"[INFO] TENDER [{tender_count}/{total}] OF PAGE {page_num} APPENDED TO {path.basename(sink.path)}")
+    except Exception as e:
+        if checkpoint is not None:
+            checkpoint.release_tender(tender_data[1], link)
+        error_msg = f"[ERROR] Failed to save tender {tender_count}: {e}"
+        if log:
+            log(error_msg)
+        print(error_msg)
+        raise
+    return True
+
+def finalize_session_output(session_id, file_name, log=None):
+    """Close the session sink and build its Excel workbook once."""
+    if not file_name:
+        return None
+    sink_path = session_sink_path(session_id, file_name)
+    sink = close_sink(sink_path)
+    if not path.exists(sink_path):
+        return None
+    try:
+        excel_path = build_excel(sink_path, EPROC_HEADERS, date_column="Closing Date", date_input_format="%d/%m/%Y")
+    except Exception as e:
+        error_msg = f"[ERROR] Failed to build Excel file from {path.basename(sink_path)}: {e}"
+        if log:
+            log(error_msg)
+        print(error_msg)
+        return None
+    rows = sink.rows_written if sink else "all"
+    msg = f"[INFO] {rows} TENDERS SAVED TO EXCEL FILE {excel_path}"
+    if log:
+        log(msg)
+    print(msg)
+    emit_file_written(sink_path, session_id, log)
+    return excel_path
+
+def filter_scraped_links(checkpoint, tender_links, page_num, log=None):
+    """Drop DirectLinks the checkpoint has already scraped."""
+    if checkpoint is None:
+        return tender_links
+    new_links = checkpoint.new_links(tender_links)
+    skipped = len(tender_links) - len(new_links)
+    if skipped:
+        msg = f"[INFO] PAGE {page_num}: SKIPPING {skipped} ALREADY SCRAPED TENDERS"
+        if log:
+            log(msg)
+        print(msg)
+    return new_links
+
+def get_all_detail(bot: webdriver.Chrome, tender_links, base_url, log=None, session_id=None, page_num=1, file_name=None,
+                   checkpoint=None, failed=None, attachments=False):
+    """Scrape and save each tender; links that fail are added to ``failed``.
+    With ``attachments`` each tender's documents are downloaded too."""
+    all_detail = []
+    with RoundTripCounter(bot) as round_trips:
+        for idx, link in enumerate(tender_links):
+            msg = f"[BIDALERT INFO] GETTING TENDER [{idx+1}/{len(tender_links)}]"
+            if log:
+                log(msg)
+            print(msg)  # Always print for backend terminal
+            bot.execute_script("window.open(arguments[0]);", link)
+            bot.switch_to.window(bot.window_handles[1])
+            try:
+                WebDriverWait(bot, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "page_content")))
+                if ROUND_TRIP_BENCH and idx == 0:
+                    bench = compare_round_trips(bot)
+                    bench_msg = f"[METRIC] DETAIL EXTRACTION ROUND-TRIPS: before={bench['before']} after={bench['after']}"
                     if log:
-                        log(error_msg)
-                    print(error_msg)
+                        log(bench_msg)
+                    print(bench_msg)
+                # One execute_script for the whole caption -> value map
+                fields = extract_detail_fields(bot)
+                attachment_links = get_attachment(bot, fields["tender_id"], base_url) if attachments else ""
+                tender_data = build_tender_row(fields, base_url, attachment_links)
+            
+                # Save individual tender file immediately if session_id is provided
+                if save_tender_file(tender_data, idx + 1, len(tender_links), page_num, file_name, session_id, log,
+                                    checkpoint, link):
+                    all_detail.append(tender_data)
                     
-        except Exception as e:
-            err_msg = f"[ERROR] Skipping tender due to error: {e}"
-            if log:
-                log(err_msg)
-            print(err_msg)
-        finally:
-            bot.close()
-            bot.switch_to.window(bot.window_handles[0])
+            except Exception as e:
+                err_msg = f"[ERROR] Skipping tender due to error: {e}"
+                if log:
+                    log(err_msg)
+                print(err_msg)
+                if failed is not None:
+                    failed.append(link)
+            finally:
+                bot.close()
+                bot.switch_to.window(bot.window_handles[0])
+    if tender_links:
+        metric_msg = f"[METRIC] PAGE {page_num}: {round_trips.count} WebDriver round-trips for {len(tender_links)} tenders ({round_trips.count / len(tender_links):.1f} per tender)"
+        if log:
+            log(metric_msg)
+        print(metric_msg)
     return all_detail
 
+def browser_detail_fields(bot: webdriver.Chrome, link):
+    """Open one tender in a second window and read its details."""
+    bot.execute_script("window.open(arguments[0]);", link)
+    bot.switch_to.window(bot.window_handles[1])
+    try:
+        WebDriverWait(bot, 10).until(EC.presence_of_element_located((By.CLASS_NAME, "page_content")))
+        return extract_detail_fields(bot)
+    finally:
+        bot.close()
+        bot.switch_to.window(bot.window_handles[0])
+
+def get_all_detail_http(bot: webdriver.Chrome, tender_links, base_url, log=None, session_id=None, page_num=1, file_name=None,
+                        http_session=None, workers=HTTP_WORKERS, checkpoint=None, failed=None):
+    """Like get_all_detail, but fetches DirectLink pages over HTTP with the
+    browser's cookies. Tenders that fail over HTTP are retried in the browser
+    unless ``bot`` is None (shard workers don't own a browser)."""
+    def emit(msg):
+        if log:
+            log(msg)
+        print(msg)
+
+    if http_session is None:
+        http_session = session_from_driver(bot, pool_size=workers, referer=base_url)
+    elif bot is not None:
+        sync_cookies(http_session, bot)
+
+    results, elapsed = fetch_all_detail_fields(http_session, tender_links, max_workers=workers)
+    if tender_links:
+        emit(f"[METRIC] PAGE {page_num}: FETCHED {len(tender_links)} TENDERS OVER HTTP IN {elapsed:.2f}s ({workers} workers)")
+
+    all_detail = []
+    if failed is None:
+        failed = []
+    for idx, (link, fields, error) in enumerate(results):
+        emit(f"[BIDALERT INFO] GETTING TENDER [{idx+1}/{len(tender_links)}]")
+        if error is not None and bot is None:
+            emit(f"[ERROR] Skipping tender due to error: {error}")
+            failed.append(link)
+            continue
+        if error is not None:
+            emit(f"[WARNING] HTTP fetch failed for tender {idx+1} ({error}), retrying in browser")
+            try:
+                fields = browser_detail_fields(bot, link)
+            except Exception as e:
+                emit(f"[ERROR] Skipping tender due to error: {e}")
+                failed.append(link)
+                continue
+        tender_data = build_tender_row(fields, base_url)
+        try:
+            if save_tender_file(tender_data, idx + 1, len(tender_links), page_num, file_name, session_id, log,
+                                checkpoint, link):
+                all_detail.append(tender_data)
+        except Exception:
+            failed.append(link)
+    return all_detail
+
+def finish_page(checkpoint, window, page, total_pages, failed, log=None):
+    """Mark a page done only if none of its tenders failed; otherwise it is
+    scraped again on resume, where tenders already saved are skipped."""
+    if checkpoint is None:
+        return
+    if failed:
+        msg = f"[WARNING] PAGE {page}: {len(failed)} TENDERS FAILED, PAGE LEFT FOR THE NEXT RUN TO RETRY"
+        if log:
+            log(msg)
+        print(msg)
+        # Keep the tenders that did save, so the retry skips them
+        checkpoint.save()
+        return
+    checkpoint.mark_page_done(window, page, total_pages)
+
     
 def start():
-    options = Options()
-    prefs = {"download_restrictions": 3}
-    options.add_experimental_option(
-        "prefs", prefs
-    )
-    PATH=BASE_DIR+"\\edgedriver_win64\\msedgedriver.exe"
-    chromedriver_path = PATH
-    servicee = Service(executable_path=chromedriver_path)
-    #bot = webdriver.Chrome(service=Service(CM().install()), options=options)
-    bot = webdriver.Edge(service=servicee,options=options)
-    bot.minimize_window()
+    bot = make_eproc_edge()
+    minimize(bot)
     bot.get(URL)
     try:
          close_button = bot.find_element(By.CLASS_NAME, "alertbutclose")
@@ -565,7 +638,7 @@ def start():
 
     print("[BIDALERT INFO] WELCOME ** BID ALERT *** USER :: PAGE LOADED ")    
     
-    sleep(2)
+    wait_dom_ready(bot, replaces=2)
     select_options(bot)
 
     while True:
@@ -583,13 +656,7 @@ def start():
 
     start_page = int((input("[BIDALERT INFO] ENTER  *** STARTING PAGE NUMBER *** ")))
     
-    # Try to maximize window safely, but don't fail if it doesn't work
-    try:
-        bot.maximize_window()
-        print("[DEBUG] Window maximized successfully")
-    except Exception as e:
-        print(f"[WARNING] Could not maximize window: {e}")
-        # Continue without maximizing
+    maximize(bot)
 
     for idx in range(start_page,int(total_pages)+1):
         # ALL THE TANDERS APPEARS ON THIS TABLE    
@@ -628,45 +695,38 @@ def start():
 
     input("[BIDALERT INFO] DEAR BIDALERT EMPLOYEE SCAPING SUCCESS PRESS *** ENTER KEY *** TO CLOSE")
 
+def make_eproc_edge():
+    # Edge on Windows, headless Chromium/Edge on Linux (see driver_factory)
+    return create_driver(arguments=["--disable-plugins"], prefs={"download_restrictions": 3},
+                         blocking_profile="eproc")
+
 def run_eproc_scraper(
     base_url,
     tender_type,
     days_interval,
     start_page,
-    captcha=None
+    captcha=None,
+    resume=True,
+    attachments=False
 ):
     print(f"[DEBUG] Starting run_eproc_scraper with base_url={base_url}, tender_type={tender_type}, days_interval={days_interval}, start_page={start_page}, captcha={captcha}")
     bot = None  # Initialize bot to None
+    lease = None
+    file_name = ""
+    excel_path = None
     try:
-        options = Options()
-        # options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-plugins')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        prefs = {"download_restrictions": 3}
-        options.add_experimental_option("prefs", prefs)
+        # Warm driver from the pool, returned (reset) in finally
+        lease = get_pool("eproc-edge-cli", make_eproc_edge).lease()
+        bot = lease.driver
         
-        # Use a more robust way to define the driver path
-        driver_path = path.join(BASE_DIR, "edgedriver_win64", "msedgedriver.exe")
-        service = Service(executable_path=driver_path)
-        bot = webdriver.Edge(service=service, options=options)
-        
-        # Try to minimize window safely, but don't fail if it doesn't work
-        try:
-            bot.minimize_window()
-            print("[DEBUG] Window minimized successfully")
-        except Exception as e:
-            print(f"[WARNING] Could not minimize window: {e}")
-            # Continue without minimizing
+        minimize(bot)
         
         URL = f"{base_url}?page=FrontEndAdvancedSearch&service=page"
         print(f"[DEBUG] Navigating to URL: {URL}")
-        bot.get(URL)
+        if BLOCKING_BENCH:
+            benchmark_profile(bot, URL, "eproc")
+        else:
+            bot.get(URL)
         
         try:
             close_button = bot.find_element(By.CLASS_NAME, "alertbutclose")
@@ -676,7 +736,7 @@ def run_eproc_scraper(
             print("[DEBUG] Popup not present.")
             
         print("[BIDALERT INFO] WELCOME ** BID ALERT *** USER :: PAGE LOADED ")    
-        sleep(2)
+        wait_dom_ready(bot, replaces=2)
         
         print("[DEBUG] Setting tender type and date interval...")
         WebDriverWait(bot, TIMEOUT).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
@@ -695,6 +755,7 @@ def run_eproc_scraper(
             bot.find_element(By.ID, "TenderType").send_keys("Limited Tender")
             bot.find_element(By.ID, "TenderType").click()
             FILE_NAME = "limited-tenders_output_page-{}.xlsx"
+        file_name = run_file_name(FILE_NAME)
             
         bot.execute_script('document.getElementById("fromDate").removeAttribute("readonly")')
         bot.execute_script('document.getElementById("toDate").removeAttribute("readonly")')
@@ -734,59 +795,95 @@ def run_eproc_scraper(
             
         print(f"[BIDALERT INFO] FOUND {total_pages} PAGES TO SCRAPE")
         start_page = int(start_page)
+        window = "|".join(date_window(days_interval))
+        checkpoint = ScrapeCheckpoint.for_portal(base_url, tender_type) if resume else None
+        done_pages = set()
+        if checkpoint is not None:
+            done_pages = checkpoint.pages_done(window)
+            resumed = checkpoint.resume_page(window, start_page, total_pages)
+            if resumed != start_page:
+                print(f"[BIDALERT INFO] RESUMING FROM PAGE {resumed} (CHECKPOINT {checkpoint.file_path})")
+            start_page = resumed
+        current_page = 1
         
-        # Try to maximize window safely, but don't fail if it doesn't work
-        try:
-            bot.maximize_window()
-            print("[DEBUG] Window maximized successfully")
-        except Exception as e:
-            print(f"[WARNING] Could not maximize window: {e}")
-            # Continue without maximizing
+        maximize(bot)
         
         for idx in range(start_page, total_pages + 1):
+            if idx in done_pages:
+                print(f"[BIDALERT INFO] PAGE [{idx}/{total_pages}] ALREADY SCRAPED, SKIPPING")
+                continue
             print(f"[BIDALERT INFO] SCRAPING PAGE [{idx}/{total_pages}]")
             try:
+                if idx != current_page:
+                    next_page_url = page_url(base_url, idx)
+                    print(f"[DEBUG] Navigating to page: {next_page_url}")
+                    bot.get(next_page_url)
+                    current_page = idx
                 list_table = bot.find_element(By.ID, "table")
                 a_tags = list_table.find_elements(By.TAG_NAME, "a")
                 tender_links = [a.get_attribute("href") for a in a_tags if "DirectLink" in a.get_attribute("href")]
                 print(f"[DEBUG] Found {len(tender_links)} tender links on page {idx}")
+                tender_links = filter_scraped_links(checkpoint, tender_links, idx)
                 
-                # Process each tender individually and save file for each
-                tender_count = 0
-                for d in get_all_detail(bot, tender_links, base_url):
-                    tender_count += 1
-                    # Save individual tender to Excel file
-                    print(f"[BIDALERT INFO] SAVING TENDER [{tender_count}/{len(tender_links)}] TO EXCEL FILE")
-                    
-                    # Create individual tender file name
-                    tender_file_name = FILE_NAME.replace("_page-{}.xlsx", f"_page-{idx}_tender-{tender_count}.xlsx")
-                    try:
-                        excel_path = save_to_excel([d], tender_count, tender_file_name)
-                        print(f"[BIDALERT INFO] TENDER [{tender_count}/{len(tender_links)}] SAVED TO EXCEL FILE {excel_path}")
-                    except Exception as e:
-                        print(f"[ERROR] Exception during saving Excel file for tender {tender_count}: {e}")
+                # Tenders are appended to the run's sink as they are scraped
+                failed = []
+                all_detail = get_all_detail(bot, tender_links, base_url, page_num=idx, file_name=file_name,
+                                            checkpoint=checkpoint, failed=failed, attachments=attachments)
+                print(f"[BIDALERT INFO] COMPLETED PAGE [{idx}/{total_pages}] - {len(all_detail)} TENDERS PROCESSED")
+                finish_page(checkpoint, window, idx, total_pages, failed)
                         
             except Exception as e:
                 print(f"[ERROR] Exception during page scraping [{idx}]: {e}")
                 
             print("-" * 60)
-            
-            if idx < total_pages:
-                try:
-                    next_page_url = f"{base_url}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp={idx+1}"
-                    print(f"[DEBUG] Navigating to next page: {next_page_url}")
-                    bot.get(next_page_url)
-                except Exception as e:
-                    print(f"[ERROR] Exception during navigation to next page: {e}")
                     
         print("[INFO] E-PROC SCRAPING COMPLETED")
         
     except Exception as e:
         print(f"[ERROR] Exception during scraping: {e}")
     finally:
-        if bot:
-            print("[BIDALERT INFO] Edge browser closed after scraping.")
-            bot.quit()
+        if lease:
+            print("[BIDALERT INFO] Edge browser returned to pool after scraping.")
+            lease.release()
+        close_attachment_downloads()
+        # One workbook for the whole run, built from the streamed rows
+        excel_path = finalize_session_output(None, file_name)
+    return excel_path
+
+def run_sharded_pages(bot, base_url, start_page, total_pages, page_workers, detail_mode,
+                      worker_driver_factory, http_workers, log, session_id, file_name,
+                      checkpoint=None, window=None):
+    """Scrape start_page..total_pages with page_workers parallel shard workers."""
+    mode = "browser" if detail_mode != "http" and worker_driver_factory is not None else "http"
+    done_pages = checkpoint.pages_done(window) if checkpoint is not None else set()
+    shards = split_pages(start_page, total_pages, page_workers, done_pages)
+    if not shards:
+        log("[INFO] ALL PAGES ALREADY SCRAPED")
+        return {}
+    # Shard browsers reuse the captcha cookies, so they start on its pinned node
+    workers = build_workers(bot, base_url, len(shards), mode, worker_driver_factory, http_workers, pin=session_id)
+    if len(workers) < len(shards):
+        # Some shard browsers failed to start, spread the pages over the ones we have
+        shards = split_pages(start_page, total_pages, len(workers), done_pages)
+    log(f"[INFO] SPLITTING PAGES {start_page}-{total_pages} ACROSS {len(workers)} {mode.upper()} WORKERS")
+
+    def handle_page(worker, page, tender_links):
+        tender_links = filter_scraped_links(checkpoint, tender_links, page, log)
+        failed = []
+        if worker.kind == "browser":
+            all_detail = get_all_detail(worker.bot, tender_links, base_url, log, session_id, page, file_name,
+                                        checkpoint, failed)
+        else:
+            all_detail = get_all_detail_http(None, tender_links, base_url, log, session_id, page, file_name,
+                                             worker.session, http_workers, checkpoint, failed)
+        finish_page(checkpoint, window, page, total_pages, failed, log)
+        return len(all_detail)
+
+    try:
+        return run_shards(workers, shards, handle_page, total_pages, log)
+    finally:
+        for worker in workers:
+            worker.close()
 
 def run_eproc_scraper_with_bot(
     bot,
@@ -796,7 +893,14 @@ def run_eproc_scraper_with_bot(
     captcha=None,
     log_callback=None,
     base_url=None,
-    session_id=None
+    session_id=None,
+    detail_mode="browser",
+    http_workers=HTTP_WORKERS,
+    page_workers=1,
+    worker_driver_factory=None,
+    resume=True,
+    prefetch_next=False,
+    captcha_callback=None
 ):
     print(f"[DEBUG] run_eproc_scraper_with_bot called with session_id: {session_id}")
     print(f"[DEBUG] Bot object: {bot}")
@@ -805,6 +909,8 @@ def run_eproc_scraper_with_bot(
     print(f"[DEBUG] Start page: {start_page}")
     print(f"[DEBUG] Captcha: {captcha}")
     print(f"[DEBUG] Base URL: {base_url}")
+    print(f"[DEBUG] Detail mode: {detail_mode}")
+    print(f"[DEBUG] Prefetch next page: {prefetch_next}")
     
     def log(msg):
         if log_callback:
@@ -813,13 +919,14 @@ def run_eproc_scraper_with_bot(
             print(msg)
 
     log("[INFO] Scraping started...")
+    file_name = ""
+    prefetcher = None
     try:
         WebDriverWait(bot, 10).until(EC.element_to_be_clickable((By.ID, "captchaImage")))
         bot.find_element(By.ID, "dateCriteria").click()
         bot.find_element(By.ID, "dateCriteria").send_keys("Published Date")
         bot.find_element(By.ID, "dateCriteria").click()
         
-        file_name = ""
         if tender_type.lower() == 'o':
             bot.find_element(By.ID, "TenderType").click()
             bot.find_element(By.ID, "TenderType").send_keys("Open Tender")
@@ -830,6 +937,8 @@ def run_eproc_scraper_with_bot(
             bot.find_element(By.ID, "TenderType").send_keys("Limited Tender")
             bot.find_element(By.ID, "TenderType").click()
             file_name = "limited-tenders_output_page-{}.xlsx"
+        if file_name and not session_id:
+            file_name = run_file_name(file_name)
 
         bot.execute_script('document.getElementById("fromDate").removeAttribute("readonly")')
         bot.execute_script('document.getElementById("toDate").removeAttribute("readonly")')
@@ -853,46 +962,95 @@ def run_eproc_scraper_with_bot(
             bot.find_element(By.ID, "toDate").send_keys(new_yesterday2_date)
             
         while True:
-            did_handle_cap = solve_captcha_main(bot, captcha)
+            did_handle_cap = solve_captcha_main(bot, captcha, captcha_callback)
             if did_handle_cap or captcha is not None:
                 break
                 
-        try:
-            list_footer = bot.find_element(By.CLASS_NAME, "list_footer")
-            total_pages_link = list_footer.find_element(By.ID, "linkLast")
-            total_pages = int(total_pages_link.get_attribute("href").split("=")[-1].strip())
-        except:
-            total_pages = 1
+        total_pages = get_total_pages(bot)
             
         log(f"[INFO] FOUND {total_pages} PAGES TO SCRAPE")
         start_page = int(start_page)
+        if not base_url:
+            base_url = bot.current_url.split("?")[0]
+
+        # Resume where the last run of this search window stopped
+        window = "|".join(date_window(days_interval))
+        checkpoint = ScrapeCheckpoint.for_portal(base_url, tender_type) if resume else None
+        done_pages = set()
+        if checkpoint is not None:
+            done_pages = checkpoint.pages_done(window)
+            resumed = checkpoint.resume_page(window, start_page, total_pages)
+            if resumed != start_page:
+                log(f"[INFO] RESUMING FROM PAGE {resumed} (CHECKPOINT {path.basename(checkpoint.file_path)})")
+            start_page = resumed
+
+        page_workers = int(page_workers or 1)
+        if page_workers > 1 and total_pages - start_page >= 1:
+            run_sharded_pages(bot, base_url, start_page, total_pages, page_workers, detail_mode,
+                              worker_driver_factory, http_workers, log, session_id, file_name,
+                              checkpoint, window)
+            log("[INFO] E-PROC SCRAPING COMPLETED")
+            return
+
+        # Browser is only needed for search + captcha from here in http mode
+        http_session = None
+        if detail_mode == "http":
+            http_session = session_from_driver(bot, pool_size=http_workers, referer=base_url)
+            log(f"[INFO] DETAIL MODE: HTTP ({http_workers} workers)")
         
-        # Try to maximize window safely, but don't fail if it doesn't work
-        try:
-            bot.maximize_window()
-            log("[DEBUG] Window maximized successfully")
-        except Exception as e:
-            log(f"[WARNING] Could not maximize window: {e}")
-            # Continue without maximizing
+        maximize(bot)
         
-        for idx in range(start_page, total_pages + 1):
+        if prefetch_next:
+            # Next listing is fetched over HTTP while this page's details run
+            prefetcher = ListingPrefetcher(build_workers(bot, base_url, 1, "http")[0])
+            log("[INFO] PREFETCHING NEXT RESULTS PAGE WHILE DETAILS ARE FETCHED")
+
+        pages_to_scrape = [p for p in range(start_page, total_pages + 1) if p not in done_pages]
+        if len(pages_to_scrape) < total_pages - start_page + 1:
+            log(f"[INFO] {total_pages - start_page + 1 - len(pages_to_scrape)} PAGES ALREADY SCRAPED, SKIPPING")
+        current_page = 1
+        for pos, idx in enumerate(pages_to_scrape):
             log(f"[INFO] SCRAPING PAGE [{idx}/{total_pages}]")
-            list_table = bot.find_element(By.ID, "table")
-            a_tags = list_table.find_elements(By.TAG_NAME, "a")
-            tender_links = [a.get_attribute("href") for a in a_tags if "DirectLink" in a.get_attribute("href")]
+            prefetched = prefetcher.take(idx) if prefetcher else None
+            if prefetched is not None and not prefetched[0]:
+                # Empty listing usually means the portal didn't render the table, read it in the browser
+                prefetched = None
+            if prefetched is not None:
+                tender_links, waited, fetch_time = prefetched
+                log(f"[METRIC] PAGE {idx}: LISTING PREFETCHED, WAITED {waited:.2f}s, "
+                    f"{max(fetch_time - waited, 0):.2f}s OF NAVIGATION IDLE TIME REMOVED")
+            else:
+                if idx != current_page:
+                    bot.get(page_url(base_url, idx))
+                    current_page = idx
+                list_table = bot.find_element(By.ID, "table")
+                a_tags = list_table.find_elements(By.TAG_NAME, "a")
+                tender_links = [a.get_attribute("href") for a in a_tags if "DirectLink" in a.get_attribute("href")]
+            if prefetcher and pos + 1 < len(pages_to_scrape):
+                prefetcher.schedule(pages_to_scrape[pos + 1])
+            tender_links = filter_scraped_links(checkpoint, tender_links, idx, log)
             
             # Process each tender individually - files will be saved automatically in get_all_detail
-            all_detail = get_all_detail(bot, tender_links, base_url, log, session_id, idx, file_name)
+            failed = []
+            if detail_mode == "http":
+                all_detail = get_all_detail_http(bot, tender_links, base_url, log, session_id, idx, file_name,
+                                                 http_session, http_workers, checkpoint, failed)
+            else:
+                all_detail = get_all_detail(bot, tender_links, base_url, log, session_id, idx, file_name,
+                                            checkpoint, failed)
+            finish_page(checkpoint, window, idx, total_pages, failed, log)
             log(f"[INFO] COMPLETED PAGE [{idx}/{total_pages}] - {len(all_detail)} TENDERS PROCESSED")
             log("-" * 60)
-            
-            if idx < total_pages:
-                next_page_url = f"{base_url}?component=%24TablePages.linkPage&page=FrontEndAdvancedSearchResult&service=direct&session=T&sp=AFrontEndAdvancedSearchResult%2Ctable&sp={idx+1}"
-                bot.get(next_page_url)
                 
         log("[INFO] E-PROC SCRAPING COMPLETED")
     except Exception as e:
         log(f"[ERROR] Exception during scraping: {e}")
+    finally:
+        if prefetcher:
+            prefetcher.close()
+        # Build the session workbook from the streamed rows, even after a failure
+        finalize_session_output(session_id, file_name, log)
+        log_wait_stats(log)
 
 def main():
     parser = argparse.ArgumentParser(description="E-Procurement Scraper")
@@ -901,6 +1059,8 @@ def main():
     parser.add_argument('--days_interval', type=int, required=True, help='How many days back to scrape')
     parser.add_argument('--start_page', type=int, required=True, help='Starting page number')
     parser.add_argument('--captcha', type=str, required=False, help='Captcha value to use')
+    parser.add_argument('--no_resume', action='store_true', help='Ignore the checkpoint and rescrape every page')
+    parser.add_argument('--attachments', action='store_true', help='Download each tender\'s documents (asks for the download captcha once)')
     args = parser.parse_args()
 
     tender_type = args.tender_type
@@ -921,7 +1081,9 @@ def main():
         tender_type=tender_type,
         days_interval=days_interval,
         start_page=start_page,
-        captcha=captcha
+        captcha=captcha,
+        resume=not args.no_resume,
+        attachments=args.attachments
     )
 
 if __name__ == "__main__":
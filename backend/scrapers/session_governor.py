@@ -0,0 +1,221 @@
+"""
+Browser session governor.
+
+Interactive scrapers open a browser, hand its session_id to the frontend and
+wait for the user (captcha, start button...). Abandoned sessions used to stay
+open until the next restart. The governor:
+
+  * admits, queues or rejects new sessions against MAX_CONCURRENT_SESSIONS
+    and a free RAM / CPU budget;
+  * reaps sessions that have been idle for SESSION_TIMEOUT seconds (sessions
+    marked busy, i.e. actively scraping, are never reaped);
+  * reports session counts and per-session browser RSS.
+
+Usage:
+    governor.admit()                       # may wait in the queue or raise SessionRejected
+    governor.register(session_id, driver, close=...)
+    governor.touch(session_id) / governor.set_busy(session_id, True)
+    governor.release(session_id)           # calls close
+"""
+
+import os
+import threading
+import time
+
+try:
+    from config import MAX_CONCURRENT_SESSIONS, SESSION_TIMEOUT
+except ImportError:
+    try:
+        from backend.config import MAX_CONCURRENT_SESSIONS, SESSION_TIMEOUT
+    except ImportError:
+        print("[WARNING] config module not found, using default session limits")
+        MAX_CONCURRENT_SESSIONS = 5
+        SESSION_TIMEOUT = 3600
+
+try:
+    import psutil
+except ImportError:
+    print("[WARNING] psutil not installed, session RAM/CPU budget disabled")
+    psutil = None
+
+try:
+    from .browser_pool import driver_rss_mb
+except ImportError:
+    from browser_pool import driver_rss_mb
+
+MAX_QUEUED_SESSIONS = int(os.environ.get("MAX_QUEUED_SESSIONS", "10"))
+QUEUE_TIMEOUT = int(os.environ.get("SESSION_QUEUE_TIMEOUT", "120"))
+MIN_FREE_MB = int(os.environ.get("SESSION_MIN_FREE_MB", "768"))
+MAX_CPU_PERCENT = int(os.environ.get("SESSION_MAX_CPU_PERCENT", "90"))
+REAP_INTERVAL = 60
+
+
+class SessionRejected(Exception):
+    """No room for a new browser session and the queue is full (or timed out)."""
+
+
+class SessionGovernor:
+    def __init__(self, max_sessions=MAX_CONCURRENT_SESSIONS, idle_timeout=SESSION_TIMEOUT,
+                 max_queued=MAX_QUEUED_SESSIONS, queue_timeout=QUEUE_TIMEOUT,
+                 min_free_mb=MIN_FREE_MB, max_cpu_percent=MAX_CPU_PERCENT, reap_interval=REAP_INTERVAL):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.min_free_mb = min_free_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.reap_interval = reap_interval
+        self._sessions = {}
+        self._reserved = 0
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._reaper = None
+        self.counters = {"admitted": 0, "queued": 0, "rejected": 0, "reaped": 0}
+
+    # --- admission -------------------------------------------------------
+
+    def _budget_problem(self):
+        """Why a new session can't start right now, or None."""
+        if len(self._sessions) + self._reserved >= self.max_sessions:
+            return f"{self.max_sessions} sessions already open"
+        if psutil is not None:
+            free_mb = psutil.virtual_memory().available / (1024 * 1024)
+            if free_mb < self.min_free_mb:
+                return f"only {free_mb:.0f} MB RAM free"
+            cpu = psutil.cpu_percent(interval=None)
+            if cpu > self.max_cpu_percent:
+                return f"CPU at {cpu:.0f}%"
+        return None
+
+    def admit(self, timeout=None):
+        """Reserve a slot for a new session, waiting in the queue if needed."""
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._cond:
+            problem = self._budget_problem()
+            if problem is not None:
+                if self._queued >= self.max_queued:
+                    self.counters["rejected"] += 1
+                    raise SessionRejected(f"Too many sessions waiting ({problem})")
+                self._queued += 1
+                self.counters["queued"] += 1
+                print(f"[INFO] SESSION QUEUED: {problem}")
+                deadline = time.time() + timeout
+                try:
+                    while problem is not None:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            self.counters["rejected"] += 1
+                            raise SessionRejected(f"No session slot after {timeout}s ({problem})")
+                        # RAM/CPU change without notify, so re-check every few seconds
+                        self._cond.wait(min(remaining, 2))
+                        problem = self._budget_problem()
+                finally:
+                    self._queued -= 1
+            self._reserved += 1
+            self.counters["admitted"] += 1
+
+    def cancel(self):
+        """Give back a slot from admit() when the browser failed to start."""
+        with self._cond:
+            self._reserved = max(self._reserved - 1, 0)
+            self._cond.notify_all()
+
+    # --- sessions ----------------------------------------------------------
+
+    def register(self, session_id, driver=None, close=None, label=""):
+        now = time.time()
+        with self._cond:
+            self._reserved = max(self._reserved - 1, 0)
+            self._sessions[session_id] = {
+                "driver": driver,
+                "close": close,
+                "label": label,
+                "created": now,
+                "last_active": now,
+                "busy": False,
+            }
+        self._start_reaper()
+
+    def touch(self, session_id):
+        with self._cond:
+            entry = self._sessions.get(session_id)
+            if entry:
+                entry["last_active"] = time.time()
+
+    def set_busy(self, session_id, busy=True):
+        with self._cond:
+            entry = self._sessions.get(session_id)
+            if entry:
+                entry["busy"] = busy
+                entry["last_active"] = time.time()
+
+    def release(self, session_id, close=True):
+        with self._cond:
+            entry = self._sessions.pop(session_id, None)
+            self._cond.notify_all()
+        if entry and close and entry["close"]:
+            try:
+                entry["close"]()
+            except Exception as e:
+                print(f"[WARNING] Error closing session {session_id}: {e}")
+        return entry is not None
+
+    # --- reaping -----------------------------------------------------------
+
+    def reap_idle(self):
+        now = time.time()
+        with self._cond:
+            idle = [sid for sid, e in self._sessions.items()
+                    if not e["busy"] and now - e["last_active"] > self.idle_timeout]
+        for session_id in idle:
+            print(f"[INFO] REAPING SESSION {session_id}: idle for more than {self.idle_timeout}s")
+            if self.release(session_id):
+                self.counters["reaped"] += 1
+        return idle
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap_idle()
+            except Exception as e:
+                print(f"[ERROR] Session reaper failed: {e}")
+
+    def _start_reaper(self):
+        with self._cond:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+            self._reaper.start()
+
+    # --- reporting ---------------------------------------------------------
+
+    def stats(self):
+        now = time.time()
+        with self._cond:
+            entries = list(self._sessions.items())
+            queued, reserved = self._queued, self._reserved
+        sessions = []
+        for session_id, e in entries:
+            sessions.append({
+                "session_id": session_id,
+                "label": e["label"],
+                "busy": e["busy"],
+                "age_seconds": round(now - e["created"]),
+                "idle_seconds": round(now - e["last_active"]),
+                "rss_mb": round(driver_rss_mb(e["driver"]), 1) if e["driver"] is not None else 0,
+            })
+        return {
+            "open": len(entries),
+            "starting": reserved,
+            "queued": queued,
+            "max_sessions": self.max_sessions,
+            "idle_timeout": self.idle_timeout,
+            "total_rss_mb": round(sum(s["rss_mb"] for s in sessions), 1),
+            "sessions": sessions,
+            **self.counters,
+        }
+
+
+# One governor per process, shared by every entry point in it
+governor = SessionGovernor()
@@ -0,0 +1,129 @@
+"""
+Telangana tender detail ("second layer") fetcher.
+
+The first layer collects each tender's detail URL from the grid; a pool of
+TS_DETAIL_WORKERS threads then fetches the detail pages over one pooled
+requests session carrying the browser's cookies, instead of clicking every
+link, switching windows and closing them one at a time in the driver.
+
+    session = session_from_driver(driver, pool_size=TS_DETAIL_WORKERS)
+    pool = DetailPool(session)
+    futures = pool.submit(urls)          # while the driver moves on
+    details = pool.collect(futures)      # url -> {"Officer Inviting Bids": ..., ...}
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+try:
+    from .http_pool import request_with_retry
+except ImportError:
+    from http_pool import request_with_retry
+
+TS_DETAIL_WORKERS = int(os.environ.get("TS_DETAIL_WORKERS", "4"))
+TS_DETAIL_RETRIES = int(os.environ.get("TS_DETAIL_RETRIES", "2"))
+TS_DETAIL_TIMEOUT = int(os.environ.get("TS_DETAIL_TIMEOUT", "20"))
+
+MARKER = "Officer Inviting Bids"
+DETAIL_FIELDS = ["Officer Inviting Bids", "Bid Opening Authority", "Address", "Contact Details", "Email"]
+# Compiled once; each matches "<label> <value>" on one line of the table text
+_FIELD_PATTERNS = {field: re.compile(re.escape(field) + r"\s+(.+)") for field in DETAIL_FIELDS}
+
+
+def empty_details():
+    return {field: "" for field in DETAIL_FIELDS}
+
+
+def _table_texts(html):
+    # Text of each <table>, one line per row with cells joined by spaces,
+    # the way Selenium's table.text reads
+    if lxml_html is not None:
+        tree = lxml_html.fromstring(html)
+        for table in tree.iter("table"):
+            lines = (" ".join(" ".join(" ".join(cell.itertext()).split()) for cell in tr.iterchildren("td", "th"))
+                     for tr in table.iter("tr"))
+            yield "\n".join(line for line in lines if line)
+        return
+    soup = BeautifulSoup(html, "html.parser")
+    for table in soup.find_all("table"):
+        lines = (" ".join(" ".join(cell.get_text(" ").split()) for cell in tr.find_all(["td", "th"], recursive=False))
+                 for tr in table.find_all("tr"))
+        yield "\n".join(line for line in lines if line)
+
+
+def parse_detail(html):
+    """Officer/authority/contact fields of a detail page (blank when missing)."""
+    details = empty_details()
+    # The innermost table holding the marker is listed last
+    texts = [text for text in _table_texts(html) if MARKER in text]
+    if not texts:
+        return details
+    text = texts[-1]
+    for field, pattern in _FIELD_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            details[field] = match.group(1).strip()
+    return details
+
+
+def fetch_detail(session, url):
+    return request_with_retry(
+        session, "GET", url,
+        retries=TS_DETAIL_RETRIES,
+        parse=lambda response: parse_detail(response.text),
+        label=f"TS detail {url}",
+        timeout=TS_DETAIL_TIMEOUT,
+    )
+
+
+class DetailPool:
+    """Fetches detail pages on worker threads while the caller keeps paging."""
+
+    def __init__(self, session, workers=None):
+        self.session = session
+        self.executor = ThreadPoolExecutor(max_workers=workers or TS_DETAIL_WORKERS)
+        self.counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    def submit(self, urls):
+        """url -> future for every fetchable (http/https) url."""
+        futures = {}
+        for url in urls:
+            if not url or not url.startswith(("http://", "https://")):
+                self.counts["skipped"] += 1
+                continue
+            if url not in futures:
+                futures[url] = self.executor.submit(fetch_detail, self.session, url)
+        return futures
+
+    def collect(self, futures):
+        """Wait for ``futures`` and return url -> detail fields."""
+        details = {}
+        for url, future in futures.items():
+            try:
+                details[url] = future.result()
+                self.counts["ok"] += 1
+            except Exception as e:
+                print(f"[ERROR] TS detail {url}: {e}")
+                details[url] = empty_details()
+                self.counts["failed"] += 1
+        return details
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        print(f"[METRIC] TS DETAILS: {self.counts['ok']} fetched, {self.counts['failed']} failed, "
+              f"{self.counts['skipped']} without a fetchable link")
+
+
+def merge_details(rows, urls, details):
+    """Add the detail fields to each row, matched by its detail url."""
+    for row, url in zip(rows, urls):
+        row.update(details.get(url) or empty_details())
+    return rows
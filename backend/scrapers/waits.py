@@ -0,0 +1,164 @@
+"""
+Readiness waits for Selenium scrapers.
+
+Use these instead of fixed ``sleep()`` calls. Every wait polls a condition
+until it holds or its deadline passes, and records how long it actually took.
+Pass ``replaces=<seconds>`` with the length of the sleep the wait took over and
+``wait_stats()`` / ``log_wait_stats()`` also report the time saved.
+
+    wait_dom_ready(bot, replaces=2)
+    wait_for_element(bot, By.ID, "captchaImage", "clickable")
+    wait_network_idle(bot, replaces=14)
+    wait_until(bot, lambda d: len(d.window_handles) > 1, timeout=2, name="new window")
+
+Waits return the condition's value, or None on timeout (like the sleeps they
+replace, callers carry on). Pass ``required=True`` to raise TimeoutException.
+"""
+
+import threading
+import time
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.support import expected_conditions as EC
+
+DEFAULT_TIMEOUT = 15
+POLL_INTERVAL = 0.1
+NETWORK_IDLE_MS = 500
+
+_IGNORED = (NoSuchElementException, StaleElementReferenceException)
+
+_NETWORK_STATE_JS = """
+var jq = (window.jQuery && window.jQuery.active) || 0;
+return [document.readyState, performance.getEntriesByType('resource').length, jq];
+"""
+
+_CONDITIONS = {
+    "present": EC.presence_of_element_located,
+    "visible": EC.visibility_of_element_located,
+    "clickable": EC.element_to_be_clickable,
+}
+
+# wait name -> {"count", "timeouts", "total", "max", "saved"}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name, elapsed, timed_out, replaces):
+    with _stats_lock:
+        s = _stats.setdefault(name, {"count": 0, "timeouts": 0, "total": 0.0, "max": 0.0, "saved": 0.0})
+        s["count"] += 1
+        s["total"] += elapsed
+        s["max"] = max(s["max"], elapsed)
+        if timed_out:
+            s["timeouts"] += 1
+        if replaces is not None:
+            s["saved"] += replaces - elapsed
+
+
+def wait_until(driver, condition, timeout=DEFAULT_TIMEOUT, name="condition", replaces=None,
+               required=False, poll=POLL_INTERVAL):
+    """Poll ``condition(driver)`` until it is truthy or ``timeout`` passes."""
+    started = time.time()
+    deadline = started + timeout
+    while True:
+        try:
+            value = condition(driver)
+        except _IGNORED:
+            value = None
+        if value:
+            _record(name, time.time() - started, False, replaces)
+            return value
+        if time.time() >= deadline:
+            _record(name, time.time() - started, True, replaces)
+            if required:
+                raise TimeoutException(f"Timed out after {timeout}s waiting for {name}")
+            return None
+        time.sleep(poll)
+
+
+def wait_dom_ready(driver, timeout=DEFAULT_TIMEOUT, replaces=None, required=False):
+    """Wait for ``document.readyState == 'complete'``."""
+    return wait_until(
+        driver,
+        lambda d: d.execute_script("return document.readyState") == "complete",
+        timeout=timeout, name="dom ready", replaces=replaces, required=required,
+    )
+
+
+def wait_network_idle(driver, idle_ms=NETWORK_IDLE_MS, timeout=DEFAULT_TIMEOUT, replaces=None, required=False):
+    """Wait until the page is loaded and no new resources (or jQuery AJAX calls)
+    have started for ``idle_ms``."""
+    state = {"count": -1, "since": time.time()}
+
+    def idle(d):
+        ready, count, ajax = d.execute_script(_NETWORK_STATE_JS)
+        now = time.time()
+        if count != state["count"] or ajax:
+            state["count"] = count
+            state["since"] = now
+            return False
+        return ready == "complete" and (now - state["since"]) * 1000 >= idle_ms
+
+    return wait_until(driver, idle, timeout=timeout, name="network idle", replaces=replaces, required=required)
+
+
+def wait_for_element(driver, by, value, condition="present", timeout=DEFAULT_TIMEOUT, replaces=None,
+                     required=False):
+    """Wait for an element to be present, visible or clickable and return it."""
+    check = _CONDITIONS[condition]((by, value))
+
+    def found(d):
+        try:
+            return check(d)
+        except WebDriverException:
+            return None
+
+    return wait_until(driver, found, timeout=timeout, name=f"{condition} {value}", replaces=replaces,
+                      required=required)
+
+
+def wait_for_value(driver, by, value, expected, timeout=DEFAULT_TIMEOUT, replaces=None, required=False):
+    """Wait until an input's value equals ``expected`` (e.g. after send_keys)."""
+    return wait_until(driver, lambda d: d.find_element(by, value).get_attribute("value") == expected,
+                      timeout=timeout, name=f"value of {value}", replaces=replaces, required=required)
+
+
+def wait_for_windows(driver, count, timeout=DEFAULT_TIMEOUT, replaces=None, required=False):
+    """Wait until at least ``count`` windows are open."""
+    return wait_until(driver, lambda d: len(d.window_handles) >= count, timeout=timeout,
+                      name=f"{count} windows", replaces=replaces, required=required)
+
+
+def wait_stats():
+    with _stats_lock:
+        return {
+            name: {
+                "count": s["count"],
+                "timeouts": s["timeouts"],
+                "avg": round(s["total"] / s["count"], 3) if s["count"] else 0,
+                "max": round(s["max"], 3),
+                "saved": round(s["saved"], 1),
+            }
+            for name, s in _stats.items()
+        }
+
+
+def log_wait_stats(log=None):
+    """Print one [METRIC] line per wait and the total time saved over fixed sleeps."""
+    stats = wait_stats()
+    lines = [
+        f"[METRIC] WAIT {name}: {s['count']}x avg {s['avg']}s max {s['max']}s, "
+        f"{s['timeouts']} timeouts, {s['saved']}s saved"
+        for name, s in stats.items()
+    ]
+    lines.append(f"[METRIC] WAITS SAVED {sum(s['saved'] for s in stats.values()):.1f}s OVER FIXED SLEEPS")
+    for line in lines:
+        print(line)
+        if log:
+            log(line)
+    return stats